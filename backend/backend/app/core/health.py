@@ -1,35 +1,75 @@
-from fastapi import APIRouter, HTTPException
-import time
-import requests
+from fastapi import APIRouter, HTTPException, Request, Response
+import asyncio
+import logging
+import os
+from typing import Optional
+import httpx
+import orjson
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-def check_model_ready():
-    max_wait = 1200  # 20 minutos máximo
-    start_time = time.time()
+OLLAMA_URL = "http://localhost:11434"
+
+# Respostas constantes serializadas uma única vez
+HEALTH_BODY = orjson.dumps({"status": "ok", "model": "phi3"})
+READY_BODY = orjson.dumps({"status": "ready"})
+
+# Permite que proxies/LBs reaproveitem respostas dos probes
+READY_HEADERS = {"Cache-Control": "public, max-age=2"}
+HEALTH_ETAG = 'W/"model-ready"'
+HEALTH_HEADERS = {"Cache-Control": "no-cache", "ETag": HEALTH_ETAG}
+
+# Cliente HTTP compartilhado, criado no startup e fechado no shutdown
+_client: Optional[httpx.AsyncClient] = None
+
+async def startup():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(base_url=OLLAMA_URL, timeout=5.0)
+
+async def shutdown():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+# Backoff exponencial entre probes enquanto o Ollama não responde
+READY_BACKOFF_INITIAL = float(os.getenv("READY_BACKOFF_INITIAL", "0.25"))
+READY_BACKOFF_MAX = float(os.getenv("READY_BACKOFF_MAX", "10.0"))
+PROBE_TIMEOUT = 2.0
+
+async def _probe():
+    try:
+        response = await _client.get("/api/tags", timeout=PROBE_TIMEOUT)
+        return response.status_code == 200 and "models" in response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning(f"Health check error: {str(e)}")
+        return False
+
+async def watch_model_ready(ready: asyncio.Event):
+    # Executado em background no startup: sinaliza o evento assim que o modelo
+    # responde pela primeira vez e encerra
+    if _client is None:
+        await startup()
+    delay = READY_BACKOFF_INITIAL
     
-    while True:
-        try:
-            response = requests.get("http://localhost:11434/api/tags")
-            if response.status_code == 200 and "models" in response.json():
-                return True
-        except Exception as e:
-            print(f"Health check error: {str(e)}")
-            
-        if time.time() - start_time > max_wait:
-            return False
-            
-        time.sleep(5)
+    while not await _probe():
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, READY_BACKOFF_MAX)
+    ready.set()
 
 @router.get("/health")
-async def health_check():
-    if not check_model_ready():
+async def health_check(request: Request):
+    if not request.app.state.model_ready.is_set():
         raise HTTPException(
             status_code=503,
             detail="Modelo carregando. Tente novamente em 5 minutos."
         )
-    return {"status": "ok", "model": "phi3"}
+    if request.headers.get("if-none-match") == HEALTH_ETAG:
+        return Response(status_code=304, headers=HEALTH_HEADERS)
+    return Response(content=HEALTH_BODY, media_type="application/json", headers=HEALTH_HEADERS)
 
 @router.get("/ready")
 async def readiness():
-    return {"status": "ready"}
+    return Response(content=READY_BODY, media_type="application/json", headers=READY_HEADERS)
@@ -1,11 +1,15 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
+import orjson
 from app.core import health
 from app.api import generate
 
-app = FastAPI(
+fastapi_app = FastAPI(
     title="AURAX API",
     description="API para o sistema AURAX com RAG e LLMs",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     openapi_tags=[
         {
             "name": "health",
@@ -19,9 +23,59 @@ app = FastAPI(
 )
 
 # Inclui os routers
-app.include_router(health.router, prefix="", tags=["health"])
-app.include_router(generate.router, prefix="", tags=["generate"])
+fastapi_app.include_router(health.router, prefix="", tags=["health"])
+fastapi_app.include_router(generate.router, prefix="", tags=["generate"])
 
-@app.get("/")
+async def start_model_watch():
+    # Aguarda o modelo fora do caminho das requisições
+    fastapi_app.state.model_ready = asyncio.Event()
+    fastapi_app.state.model_watch = asyncio.create_task(
+        health.watch_model_ready(fastapi_app.state.model_ready)
+    )
+
+async def stop_model_watch():
+    fastapi_app.state.model_watch.cancel()
+
+# Cliente HTTP compartilhado com o Ollama
+fastapi_app.add_event_handler("startup", health.startup)
+fastapi_app.add_event_handler("startup", start_model_watch)
+fastapi_app.add_event_handler("shutdown", stop_model_watch)
+fastapi_app.add_event_handler("shutdown", health.shutdown)
+
+ROOT_BODY = orjson.dumps({"message": "Bem-vindo ao AURAX API"})
+
+@fastapi_app.get("/")
 async def root():
-    return {"message": "Bem-vindo ao AURAX API"}
+    return Response(content=ROOT_BODY, media_type="application/json")
+
+
+class HealthInterceptor:
+    """
+    Middleware ASGI que responde aos probes de readiness antes do FastAPI
+    (sem middlewares, roteamento ou serialização por requisição)
+    """
+    
+    paths = ("/ready",)
+    
+    def __init__(self, app):
+        self.app = app
+        self.body = health.READY_BODY
+        self.headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(self.body)).encode()),
+            *((k.lower().encode(), v.encode()) for k, v in health.READY_HEADERS.items()),
+        ]
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.paths:
+            if scope["method"] not in ("GET", "HEAD"):
+                await send({"type": "http.response.start", "status": 405, "headers": [(b"allow", b"GET, HEAD")]})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({"type": "http.response.start", "status": 200, "headers": self.headers})
+            await send({"type": "http.response.body", "body": self.body if scope["method"] == "GET" else b""})
+            return
+        await self.app(scope, receive, send)
+
+
+app = HealthInterceptor(fastapi_app)
@@ -0,0 +1,129 @@
+"""
+Windowed request batching for AURAX
+Shared by the generation, embedding, search and knowledge base batchers
+"""
+
+import asyncio
+from typing import Any, Dict, Hashable, List, Set, Tuple
+
+# (caller's payload, future resolved with its result)
+BatchItem = Tuple[Any, asyncio.Future]
+
+
+class WindowedBatcher:
+    """
+    Collects requests that arrive within a short window and flushes them together
+    
+    Subclasses implement _flush, which turns a batch's payloads into one
+    result per payload. Each key gets its own queue and worker, so a batch
+    never mixes keys; batches are flushed in the background, so the next
+    window fills while the previous one is processed.
+    """
+    
+    def __init__(self, max_wait_ms: float, max_size: int):
+        """
+        Initialize the batcher
+        
+        Args:
+            max_wait_ms: How long to wait for more requests after the first one arrives
+            max_size: Batch size (as counted by _item_size) at which a batch is flushed without waiting further
+        """
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_size = max_size
+        self._queues: Dict[Hashable, asyncio.Queue] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+        self._inflight: Set[asyncio.Task] = set()
+    
+    async def _submit(self, payload: Any, key: Hashable = None) -> Any:
+        """Queue a payload under a key and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        self._queue_for(key).put_nowait((payload, future))
+        return await future
+    
+    def _queue_for(self, key: Hashable) -> asyncio.Queue:
+        """Return the queue for a key, starting its worker on first use"""
+        worker = self._workers.get(key)
+        if worker is None or worker.done():
+            self._queues[key] = asyncio.Queue()
+            self._workers[key] = asyncio.create_task(self._run(self._queues[key]))
+        return self._queues[key]
+    
+    def _item_size(self, payload: Any) -> int:
+        """How much of max_size a payload takes up"""
+        return 1
+    
+    async def _run(self, queue: asyncio.Queue):
+        """Drain a queue into batches bounded by size and wait time"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            size = self._item_size(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            
+            while size < self.max_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += self._item_size(item[0])
+            
+            self._dispatch(batch)
+    
+    def _dispatch(self, batch: List[BatchItem]):
+        """Flush a batch in the background"""
+        self._start(self._flush_batch(batch))
+    
+    def _start(self, flush) -> asyncio.Task:
+        """Run a flush as a task that close() can cancel"""
+        task = asyncio.create_task(flush)
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+        return task
+    
+    async def _flush_batch(self, batch: List[BatchItem]):
+        """Flush a batch and hand each caller its own result"""
+        batch = [item for item in batch if not item[1].done()]  # Drop callers that gave up
+        if not batch:
+            return
+        
+        try:
+            results = await self._flush([payload for payload, _future in batch])
+        except Exception as e:
+            for _payload, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_payload, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+    
+    async def _flush(self, payloads: List[Any]) -> List[Any]:
+        """
+        Process a batch
+        
+        Args:
+            payloads: Payloads of the callers still waiting, in arrival order
+        
+        Returns:
+            One result per payload
+        """
+        raise NotImplementedError
+    
+    async def close(self):
+        """Stop the workers and cancel queued and in-flight requests"""
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
+        
+        for queue in self._queues.values():
+            while not queue.empty():
+                queue.get_nowait()[1].cancel()
+        self._queues.clear()
+        
+        for task in list(self._inflight):
+            task.cancel()
@@ -3,8 +3,11 @@ AURAX LLM (Large Language Model) Module
 """
 
 from .ollama_client import ollama_client, OllamaClient
+from .async_batcher import generation_batcher, GenerationBatcher
 
 __all__ = [
     "ollama_client",
-    "OllamaClient"
+    "OllamaClient",
+    "generation_batcher",
+    "GenerationBatcher"
 ]
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+Generation request batcher for AURAX
+Groups LLM requests that arrive close together so the inference server sees them at once
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from config.settings import settings
+from ..batching import BatchItem, WindowedBatcher
+from .ollama_client import OllamaClient, ollama_client
+
+logger = logging.getLogger(__name__)
+
+# (prompt, model, generation kwargs)
+_Generation = Tuple[str, str, Dict[str, Any]]
+
+
+class GenerationBatcher(WindowedBatcher):
+    """
+    Collects generate requests for a short window and releases them together
+    """
+    
+    def __init__(
+        self,
+        client: OllamaClient,
+        max_wait_ms: float = 10.0,
+        max_batch: int = 8
+    ):
+        """
+        Initialize the batcher
+        
+        Args:
+            client: Ollama client used to run the generations
+            max_wait_ms: How long to wait for more requests after the first one arrives
+            max_batch: Maximum number of requests released together
+        """
+        super().__init__(max_wait_ms, max_batch)
+        self.client = client
+    
+    async def submit(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        **kwargs
+    ) -> Optional[str]:
+        """
+        Queue a generation request and wait for its response
+        
+        Args:
+            prompt: The input prompt for generation
+            model: Model name (uses the client default if None)
+            **kwargs: Additional parameters for generate_response
+        
+        Returns:
+            Generated text response or None if error
+        """
+        # One queue per model, so a batch never mixes models
+        model_name = model or self.client.default_model
+        return await self._submit((prompt, model_name, kwargs), key=model_name)
+    
+    def _dispatch(self, batch: List[BatchItem]):
+        """
+        Release a batch to the server
+        
+        Ollama has no multi-prompt endpoint, so the batch goes out as concurrent
+        calls that the server schedules together in its parallel slots
+        (OLLAMA_NUM_PARALLEL). Each caller is resolved as soon as its own
+        generation finishes, so a long generation does not hold up the short
+        ones. Shorter prompts are sent first, since prompt length is the only
+        size estimate available up front.
+        """
+        batch.sort(key=lambda item: len(item[0][0]))
+        logger.debug(f"Dispatching batch of {len(batch)} generation requests")
+        
+        for item in batch:
+            future = item[1]
+            if future.done():  # Caller gave up while queued
+                continue
+            task = self._start(self._flush_batch([item]))
+            # Nobody is waiting once the caller is cancelled, so stop its generation too
+            future.add_done_callback(lambda done, task=task: task.cancel() if done.cancelled() else None)
+    
+    async def _flush(self, payloads: List[_Generation]) -> List[Optional[str]]:
+        """Run the generation of a single-request batch"""
+        (prompt, model, kwargs), = payloads
+        return [await self.client.generate_response(prompt=prompt, model=model, **kwargs)]
+
+
+# Global batcher instance
+generation_batcher = GenerationBatcher(
+    ollama_client,
+    max_wait_ms=settings.ollama_batch_max_wait_ms,
+    max_batch=settings.ollama_batch_max_size
+)
@@ -2,15 +2,49 @@
 Ollama Client for AURAX LLM Operations
 """
 
+import asyncio
 import httpx
-import json
+import orjson
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Hashable
 from config.settings import settings
 
+try:
+    from asyncio import timeout as async_timeout  # Python 3.11+
+except ImportError:
+    from async_timeout import timeout as async_timeout
+
 logger = logging.getLogger(__name__)
 
 
+async def _iter_ndjson(response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Parse a newline-delimited JSON stream straight from the raw bytes
+    
+    Args:
+        response: Streaming httpx response
+        
+    Yields:
+        Decoded JSON objects, skipping malformed lines
+    """
+    buffer = b""
+    async for data in response.aiter_bytes():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+    
+    if buffer.strip():
+        try:
+            yield orjson.loads(buffer)
+        except orjson.JSONDecodeError:
+            pass
+
+
 class OllamaClient:
     """
     Client for interacting with Ollama API
@@ -23,6 +57,55 @@ class OllamaClient:
         self.timeout = settings.ollama_timeout
         self.max_tokens = settings.max_tokens
         self.temperature = settings.temperature
+        self.keep_alive = settings.ollama_keep_alive
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """
+        Get the shared HTTP client, creating it on first use
+        
+        Returns:
+            httpx.AsyncClient with a persistent connection pool to Ollama
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=settings.ollama_http2,
+                # Overall deadlines come from async_timeout scopes around each call
+                timeout=httpx.Timeout(None, connect=settings.ollama_connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=settings.ollama_max_connections,
+                    max_keepalive_connections=settings.ollama_max_keepalive_connections
+                )
+            )
+        return self._client
+    
+    async def close(self):
+        """Close the shared HTTP client and its pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _single_flight(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run one upstream call per key, sharing its result with concurrent duplicates
+        
+        Args:
+            key: Identity of the call; callers with equal keys share one request
+            factory: Creates the coroutine performing the call
+            
+        Returns:
+            Result of the shared call
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # Shield so a cancelled caller does not cancel the call for the others
+        return await asyncio.shield(task)
     
     async def is_available(self) -> bool:
         """
@@ -32,9 +115,10 @@ class OllamaClient:
             bool: True if Ollama is responding
         """
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                return response.status_code == 200
+            client = await self._get_client()
+            async with async_timeout(10.0):
+                response = await client.get("/api/tags")
+            return response.status_code == 200
         except Exception as e:
             logger.error(f"Error checking Ollama availability: {e}")
             return False
@@ -47,13 +131,14 @@ class OllamaClient:
             Dictionary with available models or None if error
         """
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    logger.error(f"Error listing models: {response.status_code}")
-                    return None
+            client = await self._get_client()
+            async with async_timeout(30.0):
+                response = await client.get("/api/tags")
+            if response.status_code == 200:
+                return orjson.loads(response.content)
+            else:
+                logger.error(f"Error listing models: {response.status_code}")
+                return None
         except Exception as e:
             logger.error(f"Error listing models: {e}")
             return None
@@ -90,6 +175,7 @@ class OllamaClient:
             "model": model_name,
             "prompt": prompt,
             "stream": False,
+            "keep_alive": self.keep_alive,
             "options": {
                 "num_predict": max_tokens_val,
                 "temperature": temperature_val,
@@ -97,31 +183,50 @@ class OllamaClient:
             }
         }
         
+        if settings.ollama_coalesce_generate:
+            key = ("generate", model_name, prompt, temperature_val, max_tokens_val)
+            return await self._single_flight(key, lambda: self._generate(request_data))
+        
+        return await self._generate(request_data)
+    
+    async def _generate(self, request_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Send a non-streaming generation request to Ollama
+        
+        Args:
+            request_data: Payload for the /api/generate endpoint
+            
+        Returns:
+            Generated text response or None if error
+        """
+        model_name = request_data["model"]
+        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                logger.info(f"Generating response with model: {model_name}")
-                
+            client = await self._get_client()
+            logger.info(f"Generating response with model: {model_name}")
+            
+            async with async_timeout(self.timeout):
                 response = await client.post(
-                    f"{self.base_url}/api/generate",
+                    "/api/generate",
                     json=request_data,
                     headers={"Content-Type": "application/json"}
                 )
+            
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                generated_text = result.get("response", "").strip()
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    generated_text = result.get("response", "").strip()
-                    
-                    if generated_text:
-                        logger.info(f"Successfully generated response ({len(generated_text)} chars)")
-                        return generated_text
-                    else:
-                        logger.warning("Empty response generated")
-                        return None
+                if generated_text:
+                    logger.info(f"Successfully generated response ({len(generated_text)} chars)")
+                    return generated_text
                 else:
-                    logger.error(f"Ollama API error: {response.status_code} - {response.text}")
+                    logger.warning("Empty response generated")
                     return None
-                    
-        except httpx.TimeoutException:
+            else:
+                logger.error(f"Ollama API error: {response.status_code} - {response.text}")
+                return None
+                
+        except (asyncio.TimeoutError, httpx.TimeoutException):
             logger.error(f"Timeout generating response (>{self.timeout}s)")
             return None
         except Exception as e:
@@ -153,6 +258,7 @@ class OllamaClient:
             "model": model_name,
             "prompt": prompt,
             "stream": True,
+            "keep_alive": self.keep_alive,
             "options": {
                 "num_predict": self.max_tokens,
                 "temperature": self.temperature
@@ -160,38 +266,86 @@ class OllamaClient:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                logger.info(f"Starting streaming generation with model: {model_name}")
+            client = await self._get_client()
+            logger.info(f"Starting streaming generation with model: {model_name}")
+            
+            async with client.stream(
+                "POST",
+                "/api/generate",
+                json=request_data,
+                headers={"Content-Type": "application/json"},
+                timeout=httpx.Timeout(self.timeout, connect=settings.ollama_connect_timeout)
+            ) as response:
                 
-                async with client.stream(
-                    "POST",
-                    f"{self.base_url}/api/generate",
-                    json=request_data,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    
-                    if response.status_code != 200:
-                        logger.error(f"Streaming API error: {response.status_code}")
-                        return
-                    
-                    async for line in response.aiter_lines():
-                        if line.strip():
-                            try:
-                                chunk = json.loads(line)
-                                if "response" in chunk:
-                                    yield chunk["response"]
-                                if chunk.get("done", False):
-                                    break
-                            except json.JSONDecodeError:
-                                continue
-                                
+                if response.status_code != 200:
+                    logger.error(f"Streaming API error: {response.status_code}")
+                    return
+                
+                async for chunk in _iter_ndjson(response):
+                    if "response" in chunk:
+                        yield chunk["response"]
+                    if chunk.get("done", False):
+                        break
+                            
         except Exception as e:
             logger.error(f"Error in streaming generation: {e}")
     
+    async def load_model(self, model: Optional[str] = None) -> bool:
+        """
+        Ask Ollama to load a model into memory without generating anything
+        
+        Concurrent loads of the same model share a single request.
+        
+        Args:
+            model: Model name (uses default if None)
+            
+        Returns:
+            bool: True if the model is loaded
+        """
+        model_name = model or self.default_model
+        return await self._single_flight(("load", model_name), lambda: self._load_model(model_name))
+    
+    async def _load_model(self, model_name: str) -> bool:
+        """
+        Send an empty generate request, which makes Ollama load the model
+        
+        Args:
+            model_name: Name of the model to load
+            
+        Returns:
+            bool: True if the model is loaded
+        """
+        try:
+            client = await self._get_client()
+            async with async_timeout(self.timeout):
+                response = await client.post(
+                    "/api/generate",
+                    json={"model": model_name, "keep_alive": self.keep_alive},
+                    headers={"Content-Type": "application/json"}
+                )
+            return response.status_code == 200
+        except Exception as e:
+            logger.error(f"Error loading model {model_name}: {e}")
+            return False
+    
     async def pull_model(self, model_name: str) -> bool:
         """
         Pull/download a model to Ollama
         
+        Concurrent pulls of the same model share a single download request.
+        
+        Args:
+            model_name: Name of the model to pull
+            
+        Returns:
+            bool: True if model was pulled successfully
+        """
+        return await self._single_flight(("pull", model_name), lambda: self._pull_model(model_name))
+    
+    async def _pull_model(self, model_name: str) -> bool:
+        """
+        Send a pull request for a model to Ollama
+        
         Args:
             model_name: Name of the model to pull
             
@@ -199,22 +353,23 @@ class OllamaClient:
             bool: True if model was pulled successfully
         """
         try:
-            async with httpx.AsyncClient(timeout=300.0) as client:  # 5 minutes timeout for download
-                logger.info(f"Pulling model: {model_name}")
-                
+            client = await self._get_client()
+            logger.info(f"Pulling model: {model_name}")
+            
+            async with async_timeout(300.0):  # 5 minutes timeout for download
                 response = await client.post(
-                    f"{self.base_url}/api/pull",
+                    "/api/pull",
                     json={"name": model_name},
                     headers={"Content-Type": "application/json"}
                 )
+            
+            if response.status_code == 200:
+                logger.info(f"Successfully pulled model: {model_name}")
+                return True
+            else:
+                logger.error(f"Error pulling model: {response.status_code} - {response.text}")
+                return False
                 
-                if response.status_code == 200:
-                    logger.info(f"Successfully pulled model: {model_name}")
-                    return True
-                else:
-                    logger.error(f"Error pulling model: {response.status_code} - {response.text}")
-                    return False
-                    
         except Exception as e:
             logger.error(f"Error pulling model {model_name}: {e}")
             return False
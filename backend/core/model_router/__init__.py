@@ -2,10 +2,12 @@
 AURAX Model Router Module
 """
 
-from .router import ModelRouter, route_request, RouteResult
+from .router import ModelRouter, model_router, route_request, route_request_async, RouteResult
 
 __all__ = [
     "ModelRouter",
+    "model_router",
     "route_request", 
+    "route_request_async",
     "RouteResult"
 ]
\ No newline at end of file
@@ -3,10 +3,19 @@ Intelligent Model Router for AURAX Multi-Model System
 """
 
 import re
+import hashlib
 import logging
-from typing import Optional, Dict, Any, List
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Pattern, Tuple, FrozenSet, NamedTuple
 from enum import Enum
-from pydantic import BaseModel
+from dataclasses import dataclass
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import re2  # google-re2: linear-time DFA matching
+except ImportError:  # pragma: no cover - optional accelerator
+    re2 = None
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +28,192 @@ class ModelType(str, Enum):
     WEB_SEARCH = "web-enhanced"  # Enhanced with fresh web content
 
 
-class RouteResult(BaseModel):
+_MODEL_TYPE_VALUES = frozenset(e.value for e in ModelType)
+
+
+@dataclass(slots=True, frozen=True)
+class RouteResult:
     """Result of model routing decision"""
     model_type: ModelType
     confidence: float  # 0.0 to 1.0
     reasoning: str
     suggested_parameters: Dict[str, Any]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the routing decision as a plain dictionary"""
+        return {
+            "model_type": self.model_type,
+            "confidence": self.confidence,
+            "reasoning": self.reasoning,
+            "suggested_parameters": self.suggested_parameters
+        }
+
+
+class _PatternSet:
+    """
+    Case-insensitive set of classification patterns
+    
+    Counts how many distinct patterns match a prompt. When google-re2 is
+    installed, ASCII prompts are matched against all patterns in a single DFA
+    pass (linear in the prompt length regardless of pattern count); otherwise
+    each pattern is searched with the standard ``re`` engine.
+    """
+    
+    def __init__(self, patterns: List[str]):
+        self._patterns: Tuple[Pattern[str], ...] = tuple(
+            re.compile(pattern, re.IGNORECASE) for pattern in patterns
+        )
+        self._set = None
+        
+        if re2 is not None:
+            try:
+                pattern_set = re2.Set.SearchSet()
+                for pattern in patterns:
+                    pattern_set.Add(f"(?i){pattern}")
+                pattern_set.Compile()
+                self._set = pattern_set
+            except Exception as e:
+                logger.warning(f"Falling back to re for routing patterns: {e}")
+    
+    def __len__(self) -> int:
+        return len(self._patterns)
+    
+    def count_matches(self, prompt: str, limit: Optional[int] = None) -> int:
+        """
+        Return the number of patterns that match the prompt
+        
+        Args:
+            prompt: Text to match
+            limit: Stop searching once this many patterns have matched
+        """
+        # RE2 word boundaries are ASCII-only, so accented text keeps re semantics
+        if self._set is not None and prompt.isascii():
+            return len(self._set.Match(prompt) or ())
+        
+        matches = 0
+        for pattern in self._patterns:
+            if pattern.search(prompt):
+                matches += 1
+                if matches == limit:
+                    break
+        return matches
+
+
+# Classification patterns, compiled once at import time
+_CODE_PATTERNS = _PatternSet([
+    # Programming languages
+    r'\b(python|javascript|java|c\+\+|rust|go|typescript|php|ruby|swift|kotlin)\b',
+    # Code-related keywords
+    r'\b(function|class|method|variable|algorithm|code|script|program|debug|bug|error|exception)\b',
+    # Development terms
+    r'\b(api|database|framework|library|package|module|import|export|compile|deploy)\b',
+    # Code artifacts
+    r'\b(if|else|for|while|return|def|var|let|const|public|private|static)\b',
+    # File extensions
+    r'\.(py|js|java|cpp|rs|go|ts|php|rb|swift|kt|html|css|sql)\b',
+    # Development activities
+    r'\b(implement|code|program|develop|build|create.*(function|class|method|api))\b',
+    r'\b(fix.*(bug|error)|debug|refactor|optimize.*(code|algorithm))\b'
+])
+
+_IMAGE_PATTERNS = _PatternSet([
+    # Image generation requests
+    r'\b(generate|create|make|draw|design|produce).*(image|picture|photo|illustration|artwork|graphic)\b',
+    r'\b(image|picture|photo|illustration|artwork|graphic|drawing|painting|sketch).*(of|showing|depicting)\b',
+    # Visual content
+    r'\b(visualize|visual|graphic|art|artistic|creative|aesthetic)\b',
+    # Specific image requests
+    r'\b(logo|icon|banner|poster|diagram|chart|infographic)\b',
+    # Art styles
+    r'\b(realistic|cartoon|anime|abstract|minimalist|vintage|modern)\b',
+    # Image actions
+    r'\b(draw|paint|sketch|render|design|illustrate)\b'
+])
+
+_WEB_SEARCH_PATTERNS = _PatternSet([
+    # Current information requests
+    r'\b(latest|recent|current|new|today|this (week|month|year)|2024|2025)\b',
+    r'\b(news|updates|trends|developments|happenings)\b',
+    # Real-time information
+    r'\b(what.*(happening|going on)|current (status|situation|state))\b',
+    r'\b(price|stock|market|weather|score|result)\b',
+    # Information that changes frequently
+    r'\b(events|schedule|calendar|availability|status)\b'
+])
+
+# Confidence scale factors: matched fraction of patterns * scale, capped at 1.0
+_CODE_SCALE = 2.0
+_IMAGE_SCALE = 3.0
+_WEB_SEARCH_SCALE = 2.5
+
+
+def _saturation_count(total_patterns: int, scale: float) -> int:
+    """Smallest number of pattern matches that already yields confidence 1.0"""
+    matches = 0
+    while matches < total_patterns and matches / total_patterns * scale < 1.0:
+        matches += 1
+    return matches
+
+
+# Explicit request patterns that boost confidence
+_CODE_BOOST_PATTERN = re.compile(r'\b(write|create|implement|build).*(code|function|class|script)\b', re.IGNORECASE)
+_IMAGE_BOOST_PATTERN = re.compile(r'\b(generate|create|make|draw).*(image|picture|photo)\b', re.IGNORECASE)
+
+# Literal triggers: a category's patterns (including its boost pattern) can only
+# match if the prompt has one of these words, or a word starting with a prefix
+_CODE_WORDS = frozenset({
+    "python", "javascript", "java", "c", "rust", "go", "typescript", "php", "ruby", "swift", "kotlin",
+    "function", "class", "method", "variable", "algorithm", "code", "script", "program", "debug",
+    "bug", "error", "exception", "api", "database", "framework", "library", "package", "module",
+    "import", "export", "compile", "deploy", "if", "else", "for", "while", "return", "def", "var",
+    "let", "const", "public", "private", "static", "py", "js", "cpp", "rs", "ts", "rb", "kt",
+    "html", "css", "sql", "implement", "develop", "build", "refactor"
+})
+_CODE_PREFIXES = ("create", "fix", "optimize", "write", "implement", "build")
+
+_IMAGE_WORDS = frozenset({
+    "visualize", "visual", "graphic", "art", "artistic", "creative", "aesthetic", "logo", "icon",
+    "banner", "poster", "diagram", "chart", "infographic", "realistic", "cartoon", "anime",
+    "abstract", "minimalist", "vintage", "modern", "draw", "paint", "sketch", "render", "design",
+    "illustrate"
+})
+_IMAGE_PREFIXES = (
+    "generate", "create", "make", "draw", "design", "produce", "image", "picture", "photo",
+    "illustration", "artwork", "graphic", "drawing", "painting", "sketch"
+)
+
+_WEB_SEARCH_WORDS = frozenset({
+    "latest", "recent", "current", "new", "today", "this", "2024", "2025", "news", "updates",
+    "trends", "developments", "happenings", "price", "stock", "market", "weather", "score",
+    "result", "events", "schedule", "calendar", "availability", "status"
+})
+_WEB_SEARCH_PREFIXES = ("what",)
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+# Number of recent routing decisions memoized per router
+ROUTE_CACHE_SIZE = 4096
+
+
+class RouteCacheInfo(NamedTuple):
+    """Counters of the routing decision cache"""
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+# Prompts at least this long are classified in a worker thread
+ROUTE_OFFLOAD_THRESHOLD = 2000
+
+
+def _tokenize(prompt: str) -> FrozenSet[str]:
+    """Split a prompt into its set of lowercase word tokens"""
+    return frozenset(_TOKEN_PATTERN.findall(prompt.lower()))
+
+
+def _has_trigger(tokens: FrozenSet[str], words: FrozenSet[str], prefixes: Tuple[str, ...]) -> bool:
+    """Check whether any token is a trigger word or starts with a trigger prefix"""
+    return not words.isdisjoint(tokens) or any(token.startswith(prefixes) for token in tokens)
 
 
 class ModelRouter:
@@ -34,118 +223,128 @@ class ModelRouter:
     
     def __init__(self):
         """Initialize the model router with classification patterns"""
-        self._code_patterns = [
-            # Programming languages
-            r'\b(python|javascript|java|c\+\+|rust|go|typescript|php|ruby|swift|kotlin)\b',
-            # Code-related keywords
-            r'\b(function|class|method|variable|algorithm|code|script|program|debug|bug|error|exception)\b',
-            # Development terms
-            r'\b(api|database|framework|library|package|module|import|export|compile|deploy)\b',
-            # Code artifacts
-            r'\b(if|else|for|while|return|def|var|let|const|public|private|static)\b',
-            # File extensions
-            r'\.(py|js|java|cpp|rs|go|ts|php|rb|swift|kt|html|css|sql)\b',
-            # Development activities
-            r'\b(implement|code|program|develop|build|create.*(function|class|method|api))\b',
-            r'\b(fix.*(bug|error)|debug|refactor|optimize.*(code|algorithm))\b'
-        ]
+        self._code_patterns = _CODE_PATTERNS
+        self._image_patterns = _IMAGE_PATTERNS
+        self._web_search_patterns = _WEB_SEARCH_PATTERNS
         
-        self._image_patterns = [
-            # Image generation requests
-            r'\b(generate|create|make|draw|design|produce).*(image|picture|photo|illustration|artwork|graphic)\b',
-            r'\b(image|picture|photo|illustration|artwork|graphic|drawing|painting|sketch).*(of|showing|depicting)\b',
-            # Visual content
-            r'\b(visualize|visual|graphic|art|artistic|creative|aesthetic)\b',
-            # Specific image requests
-            r'\b(logo|icon|banner|poster|diagram|chart|infographic)\b',
-            # Art styles
-            r'\b(realistic|cartoon|anime|abstract|minimalist|vintage|modern)\b',
-            # Image actions
-            r'\b(draw|paint|sketch|render|design|illustrate)\b'
-        ]
+        # Match counts at which confidence saturates and scanning can stop
+        self._code_saturation = _saturation_count(len(self._code_patterns), _CODE_SCALE)
+        self._image_saturation = _saturation_count(len(self._image_patterns), _IMAGE_SCALE)
+        self._web_search_saturation = _saturation_count(len(self._web_search_patterns), _WEB_SEARCH_SCALE)
         
-        self._web_search_patterns = [
-            # Current information requests
-            r'\b(latest|recent|current|new|today|this (week|month|year)|2024|2025)\b',
-            r'\b(news|updates|trends|developments|happenings)\b',
-            # Real-time information
-            r'\b(what.*(happening|going on)|current (status|situation|state))\b',
-            r'\b(price|stock|market|weather|score|result)\b',
-            # Information that changes frequently
-            r'\b(events|schedule|calendar|availability|status)\b'
-        ]
+        # Routing is a pure function of the prompt, so decisions are memoized under
+        # a fixed-size digest of it rather than the prompt text, however long it is
+        self._route_cache: "OrderedDict[bytes, Tuple[ModelType, float, str]]" = OrderedDict()
+        self._route_cache_lock = threading.Lock()  # Long prompts are routed from the threadpool
+        self._route_cache_hits = 0
+        self._route_cache_misses = 0
     
-    def _analyze_code_intent(self, prompt: str) -> float:
+    def cache_info(self) -> RouteCacheInfo:
+        """Hit/miss counters of the routing decision cache"""
+        with self._route_cache_lock:
+            return RouteCacheInfo(
+                self._route_cache_hits, self._route_cache_misses, ROUTE_CACHE_SIZE, len(self._route_cache)
+            )
+    
+    def _classify(self, prompt: str) -> Tuple[ModelType, float, str]:
+        """_classify_prompt, memoized by a blake2b digest of the prompt"""
+        key = hashlib.blake2b(prompt.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._route_cache_lock:
+            decision = self._route_cache.get(key)
+            if decision is not None:
+                self._route_cache.move_to_end(key)
+                self._route_cache_hits += 1
+                return decision
+            self._route_cache_misses += 1
+        
+        decision = self._classify_prompt(prompt)
+        with self._route_cache_lock:
+            self._route_cache[key] = decision
+            self._route_cache.move_to_end(key)
+            while len(self._route_cache) > ROUTE_CACHE_SIZE:
+                self._route_cache.popitem(last=False)
+        return decision
+    
+    def _analyze_code_intent(self, prompt: str, tokens: Optional[FrozenSet[str]] = None) -> float:
         """
         Analyze if the prompt is related to programming/coding
         
         Args:
             prompt: User prompt to analyze
+            tokens: Pre-computed word tokens of the prompt
             
         Returns:
             Confidence score (0.0 to 1.0)
         """
-        prompt_lower = prompt.lower()
-        matches = 0
-        total_patterns = len(self._code_patterns)
+        if tokens is None:
+            tokens = _tokenize(prompt)
+        if not _has_trigger(tokens, _CODE_WORDS, _CODE_PREFIXES):
+            return 0.0
         
-        for pattern in self._code_patterns:
-            if re.search(pattern, prompt_lower, re.IGNORECASE):
-                matches += 1
+        matches = self._code_patterns.count_matches(prompt, self._code_saturation)
+        if matches >= self._code_saturation:
+            return 1.0
+        total_patterns = len(self._code_patterns)
         
-        confidence = min(matches / total_patterns * 2.0, 1.0)  # Scale to max 1.0
+        confidence = min(matches / total_patterns * _CODE_SCALE, 1.0)  # Scale to max 1.0
         
         # Boost confidence for explicit code requests
-        if re.search(r'\b(write|create|implement|build).*(code|function|class|script)\b', prompt_lower):
+        if _CODE_BOOST_PATTERN.search(prompt):
             confidence = min(confidence + 0.3, 1.0)
         
         return confidence
     
-    def _analyze_image_intent(self, prompt: str) -> float:
+    def _analyze_image_intent(self, prompt: str, tokens: Optional[FrozenSet[str]] = None) -> float:
         """
         Analyze if the prompt is requesting image generation
         
         Args:
             prompt: User prompt to analyze
+            tokens: Pre-computed word tokens of the prompt
             
         Returns:
             Confidence score (0.0 to 1.0)
         """
-        prompt_lower = prompt.lower()
-        matches = 0
-        total_patterns = len(self._image_patterns)
+        if tokens is None:
+            tokens = _tokenize(prompt)
+        if not _has_trigger(tokens, _IMAGE_WORDS, _IMAGE_PREFIXES):
+            return 0.0
         
-        for pattern in self._image_patterns:
-            if re.search(pattern, prompt_lower, re.IGNORECASE):
-                matches += 1
+        matches = self._image_patterns.count_matches(prompt, self._image_saturation)
+        if matches >= self._image_saturation:
+            return 1.0
+        total_patterns = len(self._image_patterns)
         
-        confidence = min(matches / total_patterns * 3.0, 1.0)  # Scale to max 1.0
+        confidence = min(matches / total_patterns * _IMAGE_SCALE, 1.0)  # Scale to max 1.0
         
         # Boost confidence for explicit image requests
-        if re.search(r'\b(generate|create|make|draw).*(image|picture|photo)\b', prompt_lower):
+        if _IMAGE_BOOST_PATTERN.search(prompt):
             confidence = min(confidence + 0.4, 1.0)
         
         return confidence
     
-    def _analyze_web_search_intent(self, prompt: str) -> float:
+    def _analyze_web_search_intent(self, prompt: str, tokens: Optional[FrozenSet[str]] = None) -> float:
         """
         Analyze if the prompt requires current/fresh information
         
         Args:
             prompt: User prompt to analyze
+            tokens: Pre-computed word tokens of the prompt
             
         Returns:
             Confidence score (0.0 to 1.0)
         """
-        prompt_lower = prompt.lower()
-        matches = 0
-        total_patterns = len(self._web_search_patterns)
+        if tokens is None:
+            tokens = _tokenize(prompt)
+        if not _has_trigger(tokens, _WEB_SEARCH_WORDS, _WEB_SEARCH_PREFIXES):
+            return 0.0
         
-        for pattern in self._web_search_patterns:
-            if re.search(pattern, prompt_lower, re.IGNORECASE):
-                matches += 1
+        matches = self._web_search_patterns.count_matches(prompt, self._web_search_saturation)
+        if matches >= self._web_search_saturation:
+            return 1.0
+        total_patterns = len(self._web_search_patterns)
         
-        confidence = min(matches / total_patterns * 2.5, 1.0)  # Scale to max 1.0
+        confidence = min(matches / total_patterns * _WEB_SEARCH_SCALE, 1.0)  # Scale to max 1.0
         
         return confidence
     
@@ -175,7 +374,7 @@ class ModelRouter:
         elif model_type == ModelType.IMAGE:
             # Image generation parameters
             base_params.update({
-                "steps": 30,
+                "steps": 20,
                 "guidance_scale": 7.5,
                 "width": 512,
                 "height": 512
@@ -190,6 +389,42 @@ class ModelRouter:
         
         return base_params
     
+    def _classify_prompt(self, prompt: str) -> Tuple[ModelType, float, str]:
+        """
+        Select a model from the prompt's intent scores
+        
+        Args:
+            prompt: Non-empty user prompt
+            
+        Returns:
+            Tuple of (model type, confidence, reasoning)
+        """
+        # Analyze intent with different model types
+        tokens = _tokenize(prompt)
+        code_confidence = self._analyze_code_intent(prompt, tokens)
+        image_confidence = self._analyze_image_intent(prompt, tokens)
+        web_confidence = self._analyze_web_search_intent(prompt, tokens)
+        
+        # Determine the best model based on confidence scores
+        confidences = [
+            (ModelType.CODE, code_confidence, "Code-related keywords and patterns detected"),
+            (ModelType.IMAGE, image_confidence, "Image generation request detected"),
+            (ModelType.WEB_SEARCH, web_confidence, "Current information request detected"),
+            (ModelType.DEFAULT, 0.5, "General query, using default model")  # Fallback
+        ]
+        
+        # Sort by confidence and select the highest
+        confidences.sort(key=lambda x: x[1], reverse=True)
+        selected_model, confidence, reasoning = confidences[0]
+        
+        # Apply minimum confidence threshold
+        if confidence < 0.4 and selected_model != ModelType.DEFAULT:
+            selected_model = ModelType.DEFAULT
+            confidence = 0.5
+            reasoning = "Low confidence in specialized model, defaulting to general model"
+        
+        return selected_model, confidence, reasoning
+    
     def route_request(
         self, 
         prompt: str, 
@@ -217,7 +452,7 @@ class ModelRouter:
             # Check if model is explicitly specified in metadata
             if metadata and "preferred_model" in metadata:
                 preferred = metadata["preferred_model"]
-                if preferred in [e.value for e in ModelType]:
+                if isinstance(preferred, str) and preferred in _MODEL_TYPE_VALUES:
                     return RouteResult(
                         model_type=ModelType(preferred),
                         confidence=1.0,
@@ -225,28 +460,8 @@ class ModelRouter:
                         suggested_parameters=self._get_model_parameters(ModelType(preferred), prompt)
                     )
             
-            # Analyze intent with different model types
-            code_confidence = self._analyze_code_intent(prompt)
-            image_confidence = self._analyze_image_intent(prompt)
-            web_confidence = self._analyze_web_search_intent(prompt)
-            
-            # Determine the best model based on confidence scores
-            confidences = [
-                (ModelType.CODE, code_confidence, "Code-related keywords and patterns detected"),
-                (ModelType.IMAGE, image_confidence, "Image generation request detected"),
-                (ModelType.WEB_SEARCH, web_confidence, "Current information request detected"),
-                (ModelType.DEFAULT, 0.5, "General query, using default model")  # Fallback
-            ]
-            
-            # Sort by confidence and select the highest
-            confidences.sort(key=lambda x: x[1], reverse=True)
-            selected_model, confidence, reasoning = confidences[0]
-            
-            # Apply minimum confidence threshold
-            if confidence < 0.4 and selected_model != ModelType.DEFAULT:
-                selected_model = ModelType.DEFAULT
-                confidence = 0.5
-                reasoning = "Low confidence in specialized model, defaulting to general model"
+            # Analyze intent with different model types (memoized per prompt)
+            selected_model, confidence, reasoning = self._classify(prompt)
             
             logger.info(f"Routed prompt to {selected_model.value} with confidence {confidence:.2f}")
             
@@ -286,4 +501,26 @@ def route_request(
     Returns:
         RouteResult with model selection and reasoning
     """
-    return model_router.route_request(prompt, metadata)
\ No newline at end of file
+    return model_router.route_request(prompt, metadata)
+
+
+async def route_request_async(
+    prompt: str, 
+    metadata: Optional[Dict[str, Any]] = None
+) -> RouteResult:
+    """
+    Route a request from async code without blocking the event loop
+    
+    Short prompts are classified inline; long prompts are classified in the
+    threadpool since regex cost grows with prompt length.
+    
+    Args:
+        prompt: User prompt/request
+        metadata: Optional metadata for routing
+        
+    Returns:
+        RouteResult with model selection and reasoning
+    """
+    if not prompt or len(prompt) < ROUTE_OFFLOAD_THRESHOLD:
+        return model_router.route_request(prompt, metadata)
+    return await run_in_threadpool(model_router.route_request, prompt, metadata)
@@ -3,13 +3,47 @@ Qwen3 Coder Adapter for AURAX
 Specialized adapter for code generation and programming tasks
 """
 
+import asyncio
 import logging
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Tuple
 from ..llm.ollama_client import OllamaClient
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Prompt templates, built once and filled per request
+_CODE_CONTEXT_TEMPLATE = "Context and documentation:\n{context}\n\n"
+
+_CODE_PROMPT_TEMPLATE = """You are an expert programmer and code assistant. Your task is to provide accurate, efficient, and well-documented code solutions.
+
+User request: {prompt}
+
+Please provide:
+1. Clean, readable code that follows best practices
+2. Clear explanations of your approach
+3. Comments in the code where appropriate
+4. If applicable, mention any dependencies or setup requirements
+
+Response:"""
+
+_ANALYSIS_PROMPT_TEMPLATE = """You are an expert code reviewer and analyst. Analyze the following code and answer the question.
+
+Code to analyze:
+```
+{code}
+```
+
+Question: {question}
+
+Please provide a detailed analysis including:
+1. Code functionality and purpose
+2. Potential issues or improvements
+3. Best practices recommendations
+4. Answer to the specific question
+
+Response:"""
+
 
 class Qwen3CoderAdapter:
     """
@@ -22,26 +56,61 @@ class Qwen3CoderAdapter:
         self.model_name = "qwen2.5-coder:7b"  # Updated to available model
         self.default_temperature = 0.3  # Lower temperature for more precise code
         self.default_max_tokens = 3000  # More tokens for code explanations
+        
+        # Availability cache: (timestamp, available), refreshed after the TTL
+        self._avail_cache: Optional[Tuple[float, bool]] = None
+        self._avail_ttl = 60.0
+        self._avail_lock = asyncio.Lock()
+        self._pull_lock = asyncio.Lock()
     
     async def is_model_available(self) -> bool:
         """
         Check if Qwen3 Coder model is available in Ollama
         
+        The result is cached for a short TTL; concurrent cache misses share a
+        single upstream lookup.
+        
         Returns:
             bool: True if model is available
         """
-        try:
-            available_models = await self.ollama_client.list_models()
-            if not available_models:
-                return False
-            
-            # Check if our target model is in the list
-            model_names = [model.get("name", "") for model in available_models.get("models", [])]
-            return any(self.model_name in name for name in model_names)
+        cached = self._cached_availability()
+        if cached is not None:
+            return cached
+        
+        async with self._avail_lock:
+            cached = self._cached_availability()
+            if cached is not None:
+                return cached
             
-        except Exception as e:
-            logger.error(f"Error checking Qwen3 Coder availability: {e}")
-            return False
+            try:
+                available_models = await self.ollama_client.list_models()
+                if not available_models:
+                    return False
+                
+                # Exact hash lookup first; tagged variants share the model name as prefix
+                model_names = frozenset(model.get("name", "") for model in available_models.get("models", []))
+                available = self.model_name in model_names or any(
+                    name.startswith(self.model_name) for name in model_names
+                )
+                self._avail_cache = (time.monotonic(), available)
+                return available
+                
+            except Exception as e:
+                logger.error(f"Error checking Qwen3 Coder availability: {e}")
+                return False
+    
+    def _cached_availability(self) -> Optional[bool]:
+        """Return the cached availability if still fresh, otherwise None"""
+        if self._avail_cache is None:
+            return None
+        timestamp, available = self._avail_cache
+        if time.monotonic() - timestamp < self._avail_ttl:
+            return available
+        return None
+    
+    def _invalidate_availability(self):
+        """Forget the cached availability so the next call re-checks Ollama"""
+        self._avail_cache = None
     
     async def pull_model_if_needed(self) -> bool:
         """
@@ -54,20 +123,44 @@ class Qwen3CoderAdapter:
             if await self.is_model_available():
                 return True
             
-            logger.info(f"Pulling {self.model_name} model...")
-            success = await self.ollama_client.pull_model(self.model_name)
-            
-            if success:
-                logger.info(f"Successfully pulled {self.model_name}")
-                return True
-            else:
-                logger.error(f"Failed to pull {self.model_name}")
-                return False
+            # Concurrent callers wait for one pull instead of each starting their own
+            async with self._pull_lock:
+                if await self.is_model_available():
+                    return True
+                
+                logger.info(f"Pulling {self.model_name} model...")
+                success = await self.ollama_client.pull_model(self.model_name)
+                
+                if success:
+                    logger.info(f"Successfully pulled {self.model_name}")
+                    self._avail_cache = (time.monotonic(), True)
+                    return True
+                else:
+                    logger.error(f"Failed to pull {self.model_name}")
+                    return False
                 
         except Exception as e:
             logger.error(f"Error pulling Qwen3 Coder model: {e}")
             return False
     
+    async def warmup(self) -> bool:
+        """
+        Make sure the model is pulled and loaded by Ollama before the first request
+        
+        Returns:
+            bool: True if the model answered a one-token generation
+        """
+        if not await self.pull_model_if_needed():
+            return False
+        
+        response = await self.ollama_client.generate_response("ok", model=self.model_name, max_tokens=1)
+        if response is None:
+            logger.warning(f"{self.model_name} warmup generation failed")
+            return False
+        
+        logger.info(f"{self.model_name} warmed up")
+        return True
+    
     def _format_code_prompt(self, prompt: str, context: Optional[str] = None) -> str:
         """
         Format prompt specifically for code generation tasks
@@ -79,24 +172,9 @@ class Qwen3CoderAdapter:
         Returns:
             Formatted prompt optimized for code generation
         """
-        formatted_prompt = ""
-        
         if context:
-            formatted_prompt += f"Context and documentation:\n{context}\n\n"
-        
-        formatted_prompt += f"""You are an expert programmer and code assistant. Your task is to provide accurate, efficient, and well-documented code solutions.
-
-User request: {prompt}
-
-Please provide:
-1. Clean, readable code that follows best practices
-2. Clear explanations of your approach
-3. Comments in the code where appropriate
-4. If applicable, mention any dependencies or setup requirements
-
-Response:"""
-        
-        return formatted_prompt
+            return _CODE_CONTEXT_TEMPLATE.format(context=context) + _CODE_PROMPT_TEMPLATE.format(prompt=prompt)
+        return _CODE_PROMPT_TEMPLATE.format(prompt=prompt)
     
     async def generate_code_response(
         self,
@@ -141,10 +219,12 @@ Response:"""
                 return response
             else:
                 logger.error("No response generated from Qwen3 Coder")
+                self._invalidate_availability()
                 return None
                 
         except Exception as e:
             logger.error(f"Error generating code response: {e}")
+            self._invalidate_availability()
             return None
     
     async def generate_streaming_code_response(
@@ -181,6 +261,7 @@ Response:"""
                 
         except Exception as e:
             logger.error(f"Error in streaming code generation: {e}")
+            self._invalidate_availability()
     
     async def analyze_code(self, code: str, question: str) -> Optional[str]:
         """
@@ -194,22 +275,7 @@ Response:"""
             Analysis response or None if error
         """
         try:
-            analysis_prompt = f"""You are an expert code reviewer and analyst. Analyze the following code and answer the question.
-
-Code to analyze:
-```
-{code}
-```
-
-Question: {question}
-
-Please provide a detailed analysis including:
-1. Code functionality and purpose
-2. Potential issues or improvements
-3. Best practices recommendations
-4. Answer to the specific question
-
-Response:"""
+            analysis_prompt = _ANALYSIS_PROMPT_TEMPLATE.format(code=code, question=question)
             
             return await self.ollama_client.generate_response(
                 prompt=analysis_prompt,
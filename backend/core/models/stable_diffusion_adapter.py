@@ -3,17 +3,26 @@ Stable Diffusion Adapter for AURAX
 Specialized adapter for image generation tasks
 """
 
+import asyncio
 import logging
 import io
 import base64
-from typing import Optional, Dict, Any, Union
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Union
+import orjson
 from PIL import Image
 import torch
-from diffusers import StableDiffusionPipeline
+from starlette.concurrency import run_in_threadpool
+from diffusers import StableDiffusionPipeline, DPMSolverMultistepScheduler, AutoencoderKL
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+GIB = 1024 ** 3
+OFFLOAD_MODES = ("none", "model", "sequential")
+
 
 class StableDiffusionAdapter:
     """
@@ -24,12 +33,50 @@ class StableDiffusionAdapter:
         """Initialize the Stable Diffusion adapter"""
         self.pipeline = None
         self.model_id = "runwayml/stable-diffusion-v1-5"  # Default model
+        self.vae_id = "stabilityai/sd-vae-ft-mse"  # Fine-tuned VAE that decodes cleanly in fp16
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.default_steps = 30
+        self.default_steps = 20  # DPM-Solver++ converges in far fewer steps than PNDM
         self.default_guidance_scale = 7.5
         self.default_width = 512
         self.default_height = 512
+        self.image_format = settings.sd_image_format.upper()
+        self.image_quality = settings.sd_image_quality
         self.is_loaded = False
+        self._load_lock = asyncio.Lock()  # Concurrent cold-start requests share one load
+        self._pipeline_lock = asyncio.Lock()  # One denoising pass on the pipeline at a time
+        self.max_batch = 1  # Sized from VRAM when the pipeline is built
+        self.max_inflight = max(1, settings.sd_max_inflight_batches)
+        
+        # Seeded generation is deterministic, so identical requests can reuse the result
+        self._result_cache: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._result_cache_size = settings.sd_result_cache_size
+        self._result_cache_ttl = settings.sd_result_cache_ttl
+        
+        # Static part of get_model_info; only is_loaded changes at runtime
+        self._info_template = {
+            "model_id": self.model_id,
+            "device": self.device,
+            "is_loaded": False,
+            "default_width": self.default_width,
+            "default_height": self.default_height,
+            "default_steps": self.default_steps,
+            "default_guidance_scale": self.default_guidance_scale,
+            "cuda_available": self.device == "cuda"
+        }
+    
+    def _detect_max_batch(self) -> int:
+        """
+        Pick how many images one pipeline call may generate
+        
+        Returns:
+            Batch size, roughly one image per 2 GiB of VRAM on CUDA
+        """
+        if settings.sd_max_batch:
+            return max(1, settings.sd_max_batch)
+        if self.device != "cuda":
+            return 4
+        total = torch.cuda.get_device_properties(0).total_memory
+        return max(1, min(8, total // (2 * GIB)))
     
     async def load_model(self) -> bool:
         """
@@ -38,37 +85,160 @@ class StableDiffusionAdapter:
         Returns:
             bool: True if model loaded successfully
         """
-        try:
-            if self.is_loaded and self.pipeline is not None:
-                return True
-            
-            logger.info(f"Loading Stable Diffusion model: {self.model_id}")
-            
-            self.pipeline = StableDiffusionPipeline.from_pretrained(
-                self.model_id,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                safety_checker=None,  # Disable for faster inference
-                requires_safety_checker=False
-            )
-            
-            self.pipeline = self.pipeline.to(self.device)
-            
-            # Enable memory efficient attention if available
-            if hasattr(self.pipeline, 'enable_attention_slicing'):
-                self.pipeline.enable_attention_slicing()
-            
-            # Enable CPU offload if using CUDA
-            if self.device == "cuda" and hasattr(self.pipeline, 'enable_sequential_cpu_offload'):
-                self.pipeline.enable_sequential_cpu_offload()
-            
-            self.is_loaded = True
-            logger.info(f"Stable Diffusion model loaded successfully on {self.device}")
+        if self.is_loaded and self.pipeline is not None:
             return True
+        
+        async with self._load_lock:
+            try:
+                # Another caller may have finished loading while we waited
+                if self.is_loaded and self.pipeline is not None:
+                    return True
+                
+                # Loading reads gigabytes from disk and moves weights to the GPU, so keep it off the event loop
+                await run_in_threadpool(self._build_pipeline)
+                
+                self.is_loaded = True
+                logger.info(f"Stable Diffusion model loaded successfully on {self.device}")
+                return True
+                
+            except Exception as e:
+                logger.error(f"Error loading Stable Diffusion model: {e}")
+                self.is_loaded = False
+                return False
+    
+    def _build_pipeline(self):
+        """Build and configure the pipeline; blocking, run from a worker thread"""
+        logger.info(f"Loading Stable Diffusion model: {self.model_id}")
+        
+        dtype = torch.float16 if self.device == "cuda" else torch.float32
+        
+        pipeline_kwargs = {}
+        if self.device == "cuda":
+            pipeline_kwargs["vae"] = AutoencoderKL.from_pretrained(self.vae_id, torch_dtype=dtype)
+        
+        self.pipeline = StableDiffusionPipeline.from_pretrained(
+            self.model_id,
+            torch_dtype=dtype,
+            safety_checker=None,  # Disable for faster inference
+            requires_safety_checker=False,
+            **pipeline_kwargs
+        )
+        
+        # DPM-Solver++ reaches comparable quality in fewer denoising steps
+        self.pipeline.scheduler = DPMSolverMultistepScheduler.from_config(
+            self.pipeline.scheduler.config,
+            algorithm_type="dpmsolver++",
+            use_karras_sigmas=True
+        )
+        
+        self.pipeline = self.pipeline.to(self.device)
+        
+        self.max_batch = self._detect_max_batch()
+        
+        # NHWC layout lets cuDNN pick faster convolution kernels
+        if self.device == "cuda":
+            torch.backends.cudnn.benchmark = True
+            self.pipeline.unet.to(memory_format=torch.channels_last)
+            self.pipeline.vae.to(memory_format=torch.channels_last)
+        
+        # Use fused memory efficient attention instead of attention slicing
+        self._enable_efficient_attention()
+        
+        # Enable CPU offload only when VRAM is actually tight
+        if self.device == "cuda":
+            offload_mode = self._configure_offload()
             
-        except Exception as e:
-            logger.error(f"Error loading Stable Diffusion model: {e}")
-            self.is_loaded = False
+            # Offload hooks move modules between devices, which compiled graphs do not survive
+            if offload_mode == "none" and hasattr(torch, 'compile'):
+                self.pipeline.unet = torch.compile(
+                    self.pipeline.unet,
+                    mode="reduce-overhead",
+                    fullgraph=False
+                )
+    
+    async def warmup(self) -> bool:
+        """
+        Load the pipeline and run a throwaway inference so real requests start hot
+        
+        Returns:
+            bool: True if the pipeline is loaded and warmed up
+        """
+        if not await self.load_model():
             return False
+        
+        # Kernel selection and UNet compilation only happen on CUDA; warm at the
+        # default size so compiled graphs match the shapes of real requests
+        if self.device == "cuda":
+            try:
+                async with self._pipeline_lock:
+                    await run_in_threadpool(
+                        self.pipeline,
+                        "warmup",
+                        num_inference_steps=2,
+                        width=self.default_width,
+                        height=self.default_height
+                    )
+            except Exception as e:
+                logger.warning(f"Stable Diffusion warmup inference failed: {e}")
+                return False
+        
+        logger.info("Stable Diffusion pipeline warmed up")
+        return True
+    
+    def _select_offload_mode(self) -> str:
+        """
+        Choose a CPU offload mode for the loaded pipeline
+        
+        Returns:
+            "none", "model" or "sequential"
+        """
+        if settings.sd_offload:
+            mode = settings.sd_offload.lower()
+            if mode in OFFLOAD_MODES:
+                return mode
+            logger.warning(f"Unknown sd_offload value '{settings.sd_offload}', using free VRAM instead")
+        
+        free, _total = torch.cuda.mem_get_info()
+        if free > 6 * GIB:
+            return "none"
+        if free > 2 * GIB:
+            return "model"
+        return "sequential"
+    
+    def _configure_offload(self) -> str:
+        """
+        Apply the selected CPU offload mode to the pipeline
+        
+        Returns:
+            The offload mode that was applied
+        """
+        mode = self._select_offload_mode()
+        
+        # Sequential offload streams every submodule over PCIe on each step,
+        # so it is reserved for cards that cannot hold the model otherwise
+        if mode == "model" and hasattr(self.pipeline, 'enable_model_cpu_offload'):
+            self.pipeline.enable_model_cpu_offload()
+        elif mode == "sequential" and hasattr(self.pipeline, 'enable_sequential_cpu_offload'):
+            self.pipeline.enable_sequential_cpu_offload()
+        
+        logger.info(f"Stable Diffusion CPU offload mode: {mode}")
+        return mode
+    
+    def _enable_efficient_attention(self):
+        """Enable xFormers attention, falling back to PyTorch 2 SDPA"""
+        try:
+            self.pipeline.enable_xformers_memory_efficient_attention()
+            logger.info("Using xFormers memory efficient attention")
+            return
+        except Exception as e:
+            logger.debug(f"xFormers attention unavailable: {e}")
+        
+        try:
+            from diffusers.models.attention_processor import AttnProcessor2_0
+            self.pipeline.unet.set_attn_processor(AttnProcessor2_0())
+            logger.info("Using PyTorch scaled dot product attention")
+        except Exception as e:
+            logger.warning(f"Efficient attention unavailable, using default attention: {e}")
     
     def _preprocess_prompt(self, prompt: str) -> str:
         """
@@ -99,7 +269,7 @@ class StableDiffusionAdapter:
     
     def _image_to_base64(self, image: Image.Image) -> str:
         """
-        Convert PIL Image to base64 string
+        Convert PIL Image to base64 string in the configured image format
         
         Args:
             image: PIL Image object
@@ -108,9 +278,12 @@ class StableDiffusionAdapter:
             Base64 encoded image string
         """
         buffer = io.BytesIO()
-        image.save(buffer, format='PNG')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+        if self.image_format == "PNG":
+            image.save(buffer, format='PNG')
+        else:
+            image.save(buffer, format=self.image_format, quality=self.image_quality, method=4)
+        # Encode straight from the buffer's memory instead of copying it out first
+        image_base64 = base64.b64encode(buffer.getbuffer()).decode('ascii')
         return image_base64
     
     async def generate_image(
@@ -131,13 +304,121 @@ class StableDiffusionAdapter:
             negative_prompt: Things to avoid in the image
             width: Image width (default: 512)
             height: Image height (default: 512)
-            steps: Number of inference steps (default: 30)
+            steps: Number of inference steps (default: 20)
             guidance_scale: How closely to follow the prompt (default: 7.5)
             seed: Random seed for reproducibility
             
         Returns:
             Dictionary with image data and metadata, or None if error
         """
+        # Without a seed the output is random, so there is nothing to reuse
+        cache_key = None
+        if seed is not None and self._result_cache_size > 0:
+            cache_key = self._result_cache_key(
+                prompt, negative_prompt, width, height, steps, guidance_scale, seed
+            )
+            cached = self._get_cached_result(cache_key)
+            if cached is not None:
+                logger.info("Returning cached image for identical request")
+                return cached
+        
+        images = await self._generate_images(
+            prompt,
+            num_images=1,
+            negative_prompt=negative_prompt,
+            width=width,
+            height=height,
+            steps=steps,
+            guidance_scale=guidance_scale,
+            seed=seed
+        )
+        if not images:
+            return None
+        
+        result = images[0]
+        result["cache_hit"] = False
+        if cache_key is not None:
+            self._store_cached_result(cache_key, result)
+        return result
+    
+    def _result_cache_key(
+        self,
+        prompt: str,
+        negative_prompt: Optional[str],
+        width: Optional[int],
+        height: Optional[int],
+        steps: Optional[int],
+        guidance_scale: Optional[float],
+        seed: int
+    ) -> bytes:
+        """
+        Build a content-addressed key for a generation request
+        
+        Returns:
+            SHA-256 digest of the resolved generation parameters
+        """
+        params = {
+            "prompt": prompt,
+            "negative_prompt": negative_prompt,
+            "width": width or self.default_width,
+            "height": height or self.default_height,
+            "steps": steps or self.default_steps,
+            "guidance_scale": guidance_scale or self.default_guidance_scale,
+            "seed": seed,
+            "model": self.model_id,
+            "format": self.image_format,
+            "quality": self.image_quality
+        }
+        return hashlib.sha256(orjson.dumps(params, option=orjson.OPT_SORT_KEYS)).digest()
+    
+    def _get_cached_result(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Return a copy of a fresh cached result, or None"""
+        entry = self._result_cache.get(key)
+        if entry is None:
+            return None
+        
+        timestamp, result = entry
+        if time.monotonic() - timestamp > self._result_cache_ttl:
+            del self._result_cache[key]
+            return None
+        
+        self._result_cache.move_to_end(key)
+        return {**result, "cache_hit": True}
+    
+    def _store_cached_result(self, key: bytes, result: Dict[str, Any]):
+        """Insert a result, evicting the least recently used entries"""
+        self._result_cache[key] = (time.monotonic(), dict(result))
+        self._result_cache.move_to_end(key)
+        while len(self._result_cache) > self._result_cache_size:
+            self._result_cache.popitem(last=False)
+    
+    async def _generate_images(
+        self,
+        prompt: str,
+        num_images: int = 1,
+        negative_prompt: Optional[str] = None,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        steps: Optional[int] = None,
+        guidance_scale: Optional[float] = None,
+        seed: Optional[int] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Generate one or more images from a prompt in GPU-sized batched pipeline calls
+        
+        Args:
+            prompt: Text description of desired image
+            num_images: Number of images to generate in the batch
+            negative_prompt: Things to avoid in the image
+            width: Image width (default: 512)
+            height: Image height (default: 512)
+            steps: Number of inference steps (default: 20)
+            guidance_scale: How closely to follow the prompt (default: 7.5)
+            seed: Random seed for reproducibility; image i uses seed + i
+            
+        Returns:
+            List of image dictionaries, or None if error
+        """
         try:
             # Load model if not already loaded
             if not self.is_loaded:
@@ -161,48 +442,112 @@ class StableDiffusionAdapter:
             if negative_prompt is None:
                 negative_prompt = "blurry, low quality, distorted, deformed, ugly, bad anatomy"
             
-            logger.info(f"Generating image with prompt: {enhanced_prompt[:100]}...")
+            logger.info(f"Generating {num_images} image(s) with prompt: {enhanced_prompt[:100]}...")
             
-            # Set seed for reproducibility if provided
+            # Split into GPU-sized chunks; a bounded number stay in flight so one
+            # chunk is encoded while the next one denoises
+            semaphore = asyncio.Semaphore(self.max_inflight)
+            chunks = await asyncio.gather(*[
+                self._generate_chunk(
+                    semaphore,
+                    start,
+                    min(self.max_batch, num_images - start),
+                    enhanced_prompt,
+                    negative_prompt,
+                    width,
+                    height,
+                    steps,
+                    guidance_scale,
+                    seed
+                )
+                for start in range(0, num_images, self.max_batch)
+            ])
+            images = [image for chunk in chunks for image in chunk]
+            
+            logger.info(f"Successfully generated {len(images)} image(s) ({width}x{height})")
+            
+            return images
+            
+        except Exception as e:
+            logger.error(f"Error generating image: {e}")
+            return None
+    
+    async def _generate_chunk(
+        self,
+        semaphore: asyncio.Semaphore,
+        start: int,
+        count: int,
+        prompt: str,
+        negative_prompt: str,
+        width: int,
+        height: int,
+        steps: int,
+        guidance_scale: float,
+        seed: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate and encode one chunk of a batch
+        
+        Args:
+            semaphore: Bounds how many chunks are in flight at once
+            start: Index of the chunk's first image within the whole batch
+            count: Number of images in this chunk
+            prompt: Preprocessed prompt
+            negative_prompt: Things to avoid in the image
+            width: Image width
+            height: Image height
+            steps: Number of inference steps
+            guidance_scale: How closely to follow the prompt
+            seed: Base random seed; image i of the batch uses seed + i
+            
+        Returns:
+            List of image dictionaries for this chunk
+        """
+        async with semaphore:
+            # One seeded generator per image for reproducibility
+            generators = None
             if seed is not None:
-                torch.manual_seed(seed)
+                generators = [
+                    torch.Generator(device=self.device).manual_seed(seed + start + i)
+                    for i in range(count)
+                ]
             
-            # Generate image
-            with torch.autocast(self.device):
-                result = self.pipeline(
-                    prompt=enhanced_prompt,
+            # The pipeline's scheduler keeps per-call state, so denoising runs one chunk at a time;
+            # weights are already in the target dtype
+            async with self._pipeline_lock:
+                result = await run_in_threadpool(
+                    self.pipeline,
+                    prompt=prompt,
                     negative_prompt=negative_prompt,
                     width=width,
                     height=height,
                     num_inference_steps=steps,
                     guidance_scale=guidance_scale,
-                    num_images_per_prompt=1
+                    num_images_per_prompt=count,
+                    generator=generators
                 )
             
-            # Get the generated image
-            image = result.images[0]
-            
-            # Convert to base64 for API response
-            image_base64 = self._image_to_base64(image)
-            
-            logger.info(f"Successfully generated image ({width}x{height})")
-            
-            return {
-                "image_base64": image_base64,
-                "format": "PNG",
-                "width": width,
-                "height": height,
-                "prompt": enhanced_prompt,
-                "negative_prompt": negative_prompt,
-                "steps": steps,
-                "guidance_scale": guidance_scale,
-                "seed": seed,
-                "model": self.model_id
-            }
+            images = []
+            for i, image in enumerate(result.images):
+                # Convert to base64 for API response; encoding is CPU-bound, so keep it off the event loop
+                image_base64 = await run_in_threadpool(self._image_to_base64, image)
+                # Release the decoded RGB buffer before the next generation allocates
+                image.close()
+                
+                images.append({
+                    "image_base64": image_base64,
+                    "format": self.image_format,
+                    "width": width,
+                    "height": height,
+                    "prompt": prompt,
+                    "negative_prompt": negative_prompt,
+                    "steps": steps,
+                    "guidance_scale": guidance_scale,
+                    "seed": seed + start + i if seed is not None else None,
+                    "model": self.model_id
+                })
             
-        except Exception as e:
-            logger.error(f"Error generating image: {e}")
-            return None
+            return images
     
     async def generate_multiple_images(
         self,
@@ -222,25 +567,19 @@ class StableDiffusionAdapter:
             List of image dictionaries, or None if error
         """
         try:
-            if num_images <= 0 or num_images > 4:  # Limit to prevent resource exhaustion
+            if num_images <= 0 or num_images > settings.sd_max_images:  # Limit to prevent resource exhaustion
                 logger.warning(f"Invalid number of images requested: {num_images}")
                 return None
             
-            images = []
-            for i in range(num_images):
-                # Use different seeds for variety
-                seed = kwargs.get('seed')
-                if seed is not None:
-                    kwargs['seed'] = seed + i
-                
-                image_result = await self.generate_image(prompt, **kwargs)
-                if image_result:
-                    image_result['image_index'] = i
-                    images.append(image_result)
-                else:
-                    logger.warning(f"Failed to generate image {i+1}/{num_images}")
+            # Different seeds per image (seed + i) give variety within the batch
+            images = await self._generate_images(prompt, num_images=num_images, **kwargs)
+            if not images:
+                return None
+            
+            for i, image_result in enumerate(images):
+                image_result['image_index'] = i
             
-            return images if images else None
+            return images
             
         except Exception as e:
             logger.error(f"Error generating multiple images: {e}")
@@ -269,16 +608,7 @@ class StableDiffusionAdapter:
         Returns:
             Dictionary with model information
         """
-        return {
-            "model_id": self.model_id,
-            "device": self.device,
-            "is_loaded": self.is_loaded,
-            "default_width": self.default_width,
-            "default_height": self.default_height,
-            "default_steps": self.default_steps,
-            "default_guidance_scale": self.default_guidance_scale,
-            "cuda_available": torch.cuda.is_available()
-        }
+        return {**self._info_template, "is_loaded": self.is_loaded}
 
 
 # Global Stable Diffusion adapter instance
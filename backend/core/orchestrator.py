@@ -2,15 +2,158 @@
 AURAX Orchestrator - Coordinates RAG and LLM operations
 """
 
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Optional, List, Union
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, Optional, List, Tuple, Union
+import numpy as np
+import orjson
+from starlette.concurrency import run_in_threadpool
+from config.settings import settings
 from .rag import retriever
-from .llm import ollama_client
-from .model_router import route_request, ModelType
+from .llm import ollama_client, generation_batcher
+from .model_router import route_request_async, ModelType
 from .models import qwen3_coder_adapter, stable_diffusion_adapter
 
 logger = logging.getLogger(__name__)
 
+# Queries whose answer depends on when they are asked are never served from cache
+_TIME_SENSITIVE_PATTERN = re.compile(
+    r"\b(now|today|tonight|tomorrow|yesterday|latest|current|agora|hoje|amanh[ãa]|ontem|atual)\b"
+    r"|\d{1,4}[/-]\d{1,2}[/-]\d{1,4}",
+    re.IGNORECASE
+)
+
+# Requested model name -> ModelType; explicit image requests skip routing, caching and RAG
+_MODEL_LOOKUP = {mt.value: mt for mt in ModelType}
+_IMAGE_MODELS = frozenset({ModelType.IMAGE.value, "image"})
+
+# Requests whose routing metadata identifies a user or session are never cached
+_USER_METADATA_KEYS = frozenset({"user", "user_id", "username", "email", "session_id"})
+
+# Prompt templates, built once and filled per request
+_CODE_NO_CONTEXT_TEMPLATE = """You are an expert programmer. Please help with the following:
+
+{query}
+
+Provide clean, well-documented code with explanations."""
+
+_DEFAULT_NO_CONTEXT_TEMPLATE = """Pergunta: {query}
+
+Responda da melhor forma possível com base no seu conhecimento."""
+
+_CODE_RAG_TEMPLATE = """Relevant code documentation and context:
+{context}
+
+Coding request: {query}
+
+Based on the provided context, write clean, efficient code that addresses the request. Include explanations and follow best practices. If the context doesn't contain enough information, use your programming knowledge and mention any assumptions."""
+
+_DEFAULT_RAG_TEMPLATE = """Contexto relevante encontrado:
+{context}
+
+Pergunta: {query}
+
+Com base no contexto fornecido acima, responda à pergunta de forma clara e precisa. Se o contexto não for suficiente para responder completamente, use seu conhecimento geral, mas indique quando está fazendo isso."""
+
+
+# Contexts larger than this (in characters) are formatted in the threadpool
+PROMPT_OFFLOAD_THRESHOLD = 20000
+
+# Leading characters compared when detecting duplicate context documents
+_DEDUP_PREFIX_CHARS = 256
+
+
+@dataclass(slots=True)
+class OrchestratorResponse:
+    """Result of a generation request"""
+    success: bool
+    query: str
+    context: List[Dict[str, Any]]
+    response: Optional[Any] = None
+    response_type: str = "text"  # "text", "code", "image"
+    metadata: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cached: bool = False
+    
+    @classmethod
+    def failure(
+        cls,
+        query: str,
+        error: str,
+        context: Optional[List[Dict[str, Any]]] = None
+    ) -> "OrchestratorResponse":
+        """Build an error response for a query"""
+        return cls(success=False, query=query, context=context if context is not None else [], error=error)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the response as a plain dictionary"""
+        return {
+            "success": self.success,
+            "query": self.query,
+            "context": self.context,
+            "response": self.response,
+            "response_type": self.response_type,
+            "metadata": self.metadata,
+            "error": self.error,
+            "cached": self.cached
+        }
+
+
+async def _timed(awaitable: Awaitable[Any], timings: Optional[Dict[str, float]], key: str) -> Any:
+    """Await and record the elapsed milliseconds under timings[key], even on failure"""
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        if timings is not None:
+            timings[key] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def _log_timings(timings: Dict[str, float], top_k: int, model: str):
+    """Log per-phase latencies as one line, also attached as structured fields"""
+    logger.info(
+        "rag_timings " + " ".join(f"{key}={value}" for key, value in timings.items())
+        + f" top_k={top_k} model={model}",
+        extra={**timings, "top_k": top_k, "model": model}
+    )
+
+
+def _context_size(context_docs: List[Dict[str, Any]]) -> int:
+    """Total characters of text across context documents"""
+    return sum(len(doc.get("text", "")) for doc in context_docs)
+
+
+def _dedup_context_docs(context_docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drop context documents whose text repeats another document's
+    
+    Documents are compared on a hash of their first characters, lowercased and
+    stripped. Of each group of duplicates the highest-scoring one is kept, in
+    the position of the first occurrence.
+    
+    Args:
+        context_docs: Retrieved context documents
+        
+    Returns:
+        Context documents without duplicates
+    """
+    kept: List[Dict[str, Any]] = []
+    positions: Dict[int, int] = {}
+    for doc in context_docs:
+        key = hash(doc.get("text", "").strip()[:_DEDUP_PREFIX_CHARS].lower())
+        position = positions.get(key)
+        if position is None:
+            positions[key] = len(kept)
+            kept.append(doc)
+        elif doc.get("score", 0) > kept[position].get("score", 0):
+            kept[position] = doc
+    return kept
+
 
 class AuraxOrchestrator:
     """
@@ -21,8 +164,221 @@ class AuraxOrchestrator:
         """Initialize the orchestrator"""
         self.retriever = retriever
         self.llm_client = ollama_client
+        self.batcher = generation_batcher
         self.qwen3_adapter = qwen3_coder_adapter
         self.sd_adapter = stable_diffusion_adapter
+        
+        # Exact response cache: sha256(scope|query) -> (timestamp, result)
+        self._exact_cache: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        
+        # Semantic response cache: ring buffer of normalized query embeddings
+        self._semantic_vectors: Optional[np.ndarray] = None
+        self._semantic_entries: List[Optional[Tuple[float, str, Dict[str, Any]]]] = []
+        self._semantic_next = 0
+        
+        # Short-lived results of status probes: name -> (timestamp, value)
+        self._probe_cache: Dict[str, Tuple[float, Any]] = {}
+        self._probe_locks: Dict[str, asyncio.Lock] = {}
+    
+    async def _cached_probe(self, name: str, probe: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return a recent result of a status probe, running it at most once per TTL
+        
+        Args:
+            name: Cache key for the probe
+            probe: Coroutine function performing the probe
+            
+        Returns:
+            The cached or freshly probed value
+        """
+        entry = self._probe_cache.get(name)
+        if entry is not None and time.monotonic() - entry[0] < settings.status_cache_ttl:
+            return entry[1]
+        
+        lock = self._probe_locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            # Another caller may have refreshed the value while we waited
+            entry = self._probe_cache.get(name)
+            if entry is not None and time.monotonic() - entry[0] < settings.status_cache_ttl:
+                return entry[1]
+            
+            value = await probe()
+            self._probe_cache[name] = (time.monotonic(), value)
+            return value
+    
+    async def _llm_ready(self, model: Optional[str] = None, preload: bool = True) -> bool:
+        """
+        Check that the default LLM is available and, optionally, loaded by Ollama
+        
+        Runs alongside retrieval, so a cold model load overlaps the vector search
+        instead of delaying the first token afterwards.
+        
+        Args:
+            model: Model that will serve the request (uses default if None)
+            preload: Whether to ask Ollama to load the model
+            
+        Returns:
+            bool: True if the LLM service is available
+        """
+        available = await self._cached_probe("llm_available", self.llm_client.is_available)
+        if available and preload and settings.ollama_preload_on_query:
+            model_name = model or self.llm_client.default_model
+            await self._cached_probe(
+                f"llm_loaded:{model_name}",
+                lambda: self.llm_client.load_model(model_name)
+            )
+        return available
+    
+    async def warmup(self):
+        """
+        Load models and warm the retrieval path before the first request
+        
+        Runs the default LLM load, the Qwen3 Coder and Stable Diffusion
+        warmups and, if enabled, one embedding + Qdrant search concurrently.
+        Failures are logged and do not stop the other warmups.
+        """
+        warmups = {}
+        if settings.model_warmup:
+            warmups["default LLM"] = self.llm_client.load_model()
+            warmups["Qwen3 Coder"] = self.qwen3_adapter.warmup()
+            if settings.sd_warmup:
+                warmups["Stable Diffusion"] = self.sd_adapter.warmup()
+        if settings.rag_warmup:
+            warmups["retrieval"] = self.retriever.warmup()
+        
+        started = time.perf_counter()
+        results = await asyncio.gather(*warmups.values(), return_exceptions=True)
+        for name, result in zip(warmups, results):
+            if isinstance(result, Exception):
+                logger.error(f"{name} warmup failed: {result}")
+            elif result is False:
+                logger.warning(f"{name} warmup did not complete")
+        logger.info(f"Warmup finished in {time.perf_counter() - started:.1f}s")
+    
+    def _cache_scope(
+        self,
+        model: Optional[str],
+        max_context_docs: int,
+        context_score_threshold: float,
+        metadata: Optional[Dict[str, Any]]
+    ) -> Optional[str]:
+        """
+        Build the part of the cache key that is not the query itself
+        
+        Returns:
+            Scope string, or None if the request must not be cached
+        """
+        if settings.response_cache_size <= 0:
+            return None
+        if metadata and not _USER_METADATA_KEYS.isdisjoint(metadata):
+            return None
+        try:
+            metadata_key = orjson.dumps(metadata, option=orjson.OPT_SORT_KEYS).decode() if metadata else ""
+        except (TypeError, ValueError):
+            return None
+        return f"{model or ''}|{max_context_docs}|{context_score_threshold}|{metadata_key}"
+    
+    @staticmethod
+    def _exact_cache_key(query: str, scope: str) -> bytes:
+        """Key for the exact-match cache; case and surrounding whitespace differences share an entry"""
+        # Inner whitespace is kept: indentation changes the meaning of code prompts
+        normalized = query.strip().casefold()
+        return hashlib.sha256(f"{scope}|{normalized}".encode("utf-8")).digest()
+    
+    async def _get_cached_response(
+        self,
+        query: str,
+        scope: str
+    ) -> Tuple[Optional[OrchestratorResponse], Optional[np.ndarray]]:
+        """
+        Look up a cached response, first by exact query then by embedding similarity
+        
+        Args:
+            query: User query text
+            scope: Cache scope from _cache_scope
+            
+        Returns:
+            Tuple of (cached result or None, query embedding if one was computed)
+        """
+        now = time.monotonic()
+        key = self._exact_cache_key(query, scope)
+        entry = self._exact_cache.get(key)
+        if entry is not None:
+            timestamp, result = entry
+            if now - timestamp <= settings.response_cache_ttl:
+                self._exact_cache.move_to_end(key)
+                return replace(result, query=query, cached=True), None
+            del self._exact_cache[key]
+        
+        if not settings.semantic_cache_enabled or self._semantic_vectors is None:
+            return None, None
+        
+        embedding = await self._normalized_embedding(query)
+        if embedding is None:
+            return None, None
+        
+        # One vectorized dot product against every stored query; only the few
+        # entries above the threshold are ranked, instead of sorting every slot
+        similarities = self._semantic_vectors @ embedding
+        candidates = np.flatnonzero(similarities >= settings.semantic_cache_threshold)
+        for index in candidates[np.argsort(similarities[candidates])[::-1]]:
+            entry = self._semantic_entries[index]
+            if entry is None:
+                continue
+            timestamp, entry_scope, result = entry
+            if entry_scope == scope and now - timestamp <= settings.response_cache_ttl:
+                return replace(result, query=query, cached=True), embedding
+        
+        return None, embedding
+    
+    async def _store_cached_response(
+        self,
+        query: str,
+        scope: str,
+        result: OrchestratorResponse,
+        embedding: Optional[np.ndarray] = None
+    ):
+        """
+        Store a successful response in the exact and semantic caches
+        
+        Args:
+            query: User query text
+            scope: Cache scope from _cache_scope
+            result: Response to cache
+            embedding: Query embedding computed during lookup, if any
+        """
+        now = time.monotonic()
+        key = self._exact_cache_key(query, scope)
+        self._exact_cache[key] = (now, result)
+        self._exact_cache.move_to_end(key)
+        while len(self._exact_cache) > settings.response_cache_size:
+            self._exact_cache.popitem(last=False)
+        
+        if not settings.semantic_cache_enabled or settings.semantic_cache_size <= 0:
+            return
+        
+        if embedding is None:
+            embedding = await self._normalized_embedding(query)
+            if embedding is None:
+                return
+        
+        if self._semantic_vectors is None:
+            self._semantic_vectors = np.zeros(
+                (settings.semantic_cache_size, embedding.shape[0]), dtype=np.float32
+            )
+            self._semantic_entries = [None] * settings.semantic_cache_size
+        
+        slot = self._semantic_next
+        self._semantic_vectors[slot] = embedding
+        self._semantic_entries[slot] = (now, scope, result)
+        self._semantic_next = (slot + 1) % settings.semantic_cache_size
+    
+    async def _normalized_embedding(self, query: str) -> Optional[np.ndarray]:
+        """Embed a query with the retriever's model (already unit length)"""
+        embedding = await self.retriever.get_query_embedding(query)
+        if embedding.size == 0:
+            return None
+        return embedding
     
     def _format_rag_prompt(
         self, 
@@ -44,41 +400,36 @@ class AuraxOrchestrator:
         if not context_docs:
             # No context available - direct query
             if model_type == ModelType.CODE:
-                return f"""You are an expert programmer. Please help with the following:
-
-{query}
-
-Provide clean, well-documented code with explanations."""
-            else:
-                return f"""Pergunta: {query}
-
-Responda da melhor forma possível com base no seu conhecimento."""
+                return _CODE_NO_CONTEXT_TEMPLATE.format(query=query)
+            return _DEFAULT_NO_CONTEXT_TEMPLATE.format(query=query)
         
         # Format context from retrieved documents
-        context_text = ""
-        for i, doc in enumerate(context_docs, 1):
-            text = doc.get("text", "").strip()
-            score = doc.get("score", 0)
-            if text:
-                context_text += f"\n{i}. (Relevância: {score:.2f}) {text}\n"
+        context_text = "".join([
+            f"\n{i}. (Relevância: {doc.get('score', 0):.2f}) {text}\n"
+            for i, doc in enumerate(context_docs, 1)
+            if (text := doc.get("text", "").strip())
+        ])
         
         # Create the formatted prompt based on model type
         if model_type == ModelType.CODE:
-            prompt = f"""Relevant code documentation and context:
-{context_text}
-
-Coding request: {query}
-
-Based on the provided context, write clean, efficient code that addresses the request. Include explanations and follow best practices. If the context doesn't contain enough information, use your programming knowledge and mention any assumptions."""
-        else:
-            prompt = f"""Contexto relevante encontrado:
-{context_text}
-
-Pergunta: {query}
-
-Com base no contexto fornecido acima, responda à pergunta de forma clara e precisa. Se o contexto não for suficiente para responder completamente, use seu conhecimento geral, mas indique quando está fazendo isso."""
+            return _CODE_RAG_TEMPLATE.format(context=context_text, query=query)
+        return _DEFAULT_RAG_TEMPLATE.format(context=context_text, query=query)
+    
+    async def _format_rag_prompt_async(
+        self,
+        query: str,
+        context_docs: List[Dict[str, Any]],
+        model_type: ModelType = ModelType.DEFAULT
+    ) -> str:
+        """
+        Format the RAG prompt without blocking the event loop on large contexts
         
-        return prompt
+        Small contexts are formatted inline, where a thread hop would cost more
+        than the string work itself.
+        """
+        if _context_size(context_docs) < PROMPT_OFFLOAD_THRESHOLD:
+            return self._format_rag_prompt(query, context_docs, model_type)
+        return await run_in_threadpool(self._format_rag_prompt, query, context_docs, model_type)
     
     async def generate_contextual_response(
         self,
@@ -87,7 +438,7 @@ Com base no contexto fornecido acima, responda à pergunta de forma clara e prec
         context_score_threshold: float = 0.5,
         model: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
+    ) -> OrchestratorResponse:
         """
         Generate a response using multi-model RAG + LLM pipeline
         
@@ -99,32 +450,46 @@ Com base no contexto fornecido acima, responda à pergunta de forma clara e prec
             metadata: Additional metadata for routing decisions
             
         Returns:
-            Dictionary with response, context, routing info, and metadata
+            OrchestratorResponse with response, context, routing info, and metadata
         """
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
         try:
             # Step 1: Validate input
             if not query.strip():
-                return {
-                    "success": False,
-                    "error": "Empty query provided",
-                    "query": query,
-                    "context": [],
-                    "response": None
-                }
+                return OrchestratorResponse.failure(query, "Empty query provided")
+            
+            # Explicit image requests need neither the router nor retrieval
+            if model in _IMAGE_MODELS or (metadata and metadata.get("intent") == "image"):
+                return await self._handle_image_generation(query, None)
+            
+            # Serve repeated queries from cache, skipping retrieval and generation
+            cache_scope = None
+            if not _TIME_SENSITIVE_PATTERN.search(query):
+                cache_scope = self._cache_scope(model, max_context_docs, context_score_threshold, metadata)
+            query_embedding = None
+            if cache_scope is not None:
+                cached, query_embedding = await _timed(
+                    self._get_cached_response(query, cache_scope), timings, "t_cache_ms"
+                )
+                if cached is not None:
+                    logger.info("Returning cached response for query")
+                    # Report this request's own latency, not the one stored with the entry
+                    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                    if cached.metadata is not None:
+                        cached.metadata = {**cached.metadata, "timings": timings}
+                    _log_timings(timings, max_context_docs, (cached.metadata or {}).get("model_used", model or "cache"))
+                    return cached
             
             # Step 2: Route to appropriate model (unless specific model requested)
             if model:
                 # Use specific model requested
                 route_result = None
-                model_type = ModelType.DEFAULT
-                for mt in ModelType:
-                    if mt.value == model:
-                        model_type = mt
-                        break
+                model_type = _MODEL_LOOKUP.get(model, ModelType.DEFAULT)
                 logger.info(f"Using requested model: {model}")
             else:
                 # Use intelligent routing
-                route_result = route_request(query, metadata)
+                route_result = await _timed(route_request_async(query, metadata), timings, "t_route_ms")
                 model_type = route_result.model_type
                 logger.info(f"Routed to {model_type.value} with confidence {route_result.confidence:.2f}")
             
@@ -136,6 +501,8 @@ Com base no contexto fornecido acima, responda à pergunta de forma clara e prec
             use_rag = model_type in [ModelType.DEFAULT, ModelType.CODE, ModelType.WEB_SEARCH]
             context_docs = []
             
+            llm_available = None
+            
             if use_rag:
                 logger.info(f"Retrieving context for query: {query[:100]}...")
                 # Adjust threshold for code queries
@@ -143,34 +510,153 @@ Com base no contexto fornecido acima, responda à pergunta de forma clara e prec
                 if model_type == ModelType.CODE:
                     threshold = min(threshold, 0.3)  # Lower threshold for code context
                 
-                context_docs = await self.retriever.search_relevant_context(
-                    query_text=query,
-                    top_k=max_context_docs,
-                    score_threshold=threshold
+                retrieval = _timed(
+                    self.retriever.search_relevant_context(
+                        query_text=query,
+                        top_k=max_context_docs,
+                        score_threshold=threshold
+                    ),
+                    timings,
+                    "t_search_ms"
                 )
+                
+                if model_type == ModelType.CODE:
+                    context_docs = await retrieval
+                else:
+                    # Probing and loading the default LLM are independent of retrieval, so overlap them
+                    context_docs, llm_available = await asyncio.gather(
+                        retrieval,
+                        self._llm_ready(model),
+                        return_exceptions=True
+                    )
+                    if isinstance(context_docs, Exception):
+                        logger.error(f"Error retrieving context: {context_docs}")
+                        context_docs = []
+                    if isinstance(llm_available, Exception):
+                        logger.error(f"Error checking LLM availability: {llm_available}")
+                        llm_available = False
+                
+                context_docs = _dedup_context_docs(context_docs)
                 logger.info(f"Retrieved {len(context_docs)} context documents")
             
             # Step 5: Generate response based on model type
             if model_type == ModelType.CODE:
-                return await self._handle_code_generation(query, context_docs, route_result)
+                result = await self._handle_code_generation(query, context_docs, route_result, timings=timings)
             else:
-                return await self._handle_default_generation(query, context_docs, route_result, model)
+                result = await self._handle_default_generation(
+                    query, context_docs, route_result, model,
+                    llm_available=llm_available, timings=timings
+                )
+            
+            timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            _log_timings(timings, max_context_docs, model or model_type.value)
+            if result.metadata is None:
+                result.metadata = {}
+            # Set even when the router was skipped for an explicitly requested model
+            result.metadata["model_type"] = model_type.value
+            result.metadata["timings"] = timings
+            
+            if cache_scope is not None and result.success:
+                await self._store_cached_response(query, cache_scope, result, query_embedding)
+            return result
                 
         except Exception as e:
             logger.error(f"Error in generate_contextual_response: {e}")
-            return {
-                "success": False,
-                "error": f"Internal error: {str(e)}",
-                "query": query,
-                "context": [],
-                "response": None
-            }
+            return OrchestratorResponse.failure(query, f"Internal error: {str(e)}")
+    
+    async def stream_contextual_response(
+        self,
+        query: str,
+        max_context_docs: int = 3,
+        context_score_threshold: float = 0.5,
+        model: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        routing: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a RAG + LLM response as text chunks while it is generated
+        
+        Routing and retrieval happen exactly as in generate_contextual_response;
+        only the final generation step is streamed.
+        
+        Args:
+            query: User query text
+            max_context_docs: Maximum number of context documents to retrieve
+            context_score_threshold: Minimum similarity score for context docs
+            model: Specific model to use (overrides routing)
+            metadata: Additional metadata for routing decisions
+            routing: Filled with the resolved model type, and the routing
+                decision if the router was used, once the model is chosen
+            
+        Yields:
+            Generated text chunks
+            
+        Raises:
+            ValueError: If the query is empty or routes to image generation
+            RuntimeError: If the LLM service is not available
+        """
+        if not query.strip():
+            raise ValueError("Empty query provided")
+        if model in _IMAGE_MODELS or (metadata and metadata.get("intent") == "image"):
+            raise ValueError("Image generation cannot be streamed")
+        
+        if model:
+            route_result = None
+            model_type = _MODEL_LOOKUP.get(model, ModelType.DEFAULT)
+        else:
+            route_result = await route_request_async(query, metadata)
+            model_type = route_result.model_type
+        
+        if routing is not None:
+            if route_result is not None:
+                routing.update(route_result.to_dict())
+            routing["model_type"] = model_type
+        
+        if model_type == ModelType.IMAGE:
+            raise ValueError("Image generation cannot be streamed")
+        
+        threshold = context_score_threshold
+        if model_type == ModelType.CODE:
+            threshold = min(threshold, 0.3)  # Lower threshold for code context
+        
+        context_docs, llm_available = await asyncio.gather(
+            self.retriever.search_relevant_context(
+                query_text=query,
+                top_k=max_context_docs,
+                score_threshold=threshold
+            ),
+            self._llm_ready(model, preload=model_type != ModelType.CODE),
+            return_exceptions=True
+        )
+        if isinstance(context_docs, Exception):
+            logger.error(f"Error retrieving context: {context_docs}")
+            context_docs = []
+        context_docs = _dedup_context_docs(context_docs)
+        
+        if model_type == ModelType.CODE:
+            # The code adapter has no streaming API, so its answer arrives as one chunk
+            result = await self._handle_code_generation(query, context_docs, route_result)
+            if result.success:
+                yield result.response
+                return
+            raise RuntimeError(result.error or "Failed to generate response")
+        
+        if llm_available is not True:
+            raise RuntimeError("LLM service (Ollama) not available")
+        
+        formatted_prompt = await self._format_rag_prompt_async(query, context_docs, model_type)
+        logger.info("Streaming response with default LLM...")
+        async for chunk in self.llm_client.generate_streaming_response(
+            prompt=formatted_prompt,
+            model=model
+        ):
+            yield chunk
     
     async def _handle_image_generation(
         self, 
         query: str, 
         route_result: Optional[Any] = None
-    ) -> Dict[str, Any]:
+    ) -> OrchestratorResponse:
         """
         Handle image generation requests
         
@@ -179,7 +665,7 @@ Com base no contexto fornecido acima, responda à pergunta de forma clara e prec
             route_result: Routing decision result
             
         Returns:
-            Dictionary with image generation result
+            OrchestratorResponse with image generation result
         """
         try:
             logger.info(f"Generating image for query: {query[:100]}...")
@@ -192,48 +678,38 @@ Com base no contexto fornecido acima, responda à pergunta de forma clara e prec
                 prompt=query,
                 width=params.get("width", 512),
                 height=params.get("height", 512),
-                steps=params.get("steps", 30),
+                steps=params.get("steps"),
                 guidance_scale=params.get("guidance_scale", 7.5)
             )
             
             if image_result:
-                return {
-                    "success": True,
-                    "query": query,
-                    "context": [],
-                    "response": image_result,
-                    "response_type": "image",
-                    "metadata": {
+                return OrchestratorResponse(
+                    success=True,
+                    query=query,
+                    context=[],
+                    response=image_result,
+                    response_type="image",
+                    metadata={
                         "model_used": "stable-diffusion",
-                        "routing": route_result.__dict__ if route_result else None,
+                        "model_type": ModelType.IMAGE.value,
+                        "routing": route_result.to_dict() if route_result else None,
                         "generation_params": image_result
                     }
-                }
+                )
             else:
-                return {
-                    "success": False,
-                    "error": "Failed to generate image",
-                    "query": query,
-                    "context": [],
-                    "response": None
-                }
+                return OrchestratorResponse.failure(query, "Failed to generate image")
                 
         except Exception as e:
             logger.error(f"Error in image generation: {e}")
-            return {
-                "success": False,
-                "error": f"Image generation error: {str(e)}",
-                "query": query,
-                "context": [],
-                "response": None
-            }
+            return OrchestratorResponse.failure(query, f"Image generation error: {str(e)}")
 
     async def _handle_code_generation(
         self, 
         query: str, 
         context_docs: List[Dict[str, Any]], 
-        route_result: Optional[Any] = None
-    ) -> Dict[str, Any]:
+        route_result: Optional[Any] = None,
+        timings: Optional[Dict[str, float]] = None
+    ) -> OrchestratorResponse:
         """
         Handle code generation requests
         
@@ -241,9 +717,10 @@ Com base no contexto fornecido acima, responda à pergunta de forma clara e prec
             query: User query for code generation
             context_docs: Retrieved context documents
             route_result: Routing decision result
+            timings: Per-phase latencies in ms, filled in as phases complete
             
         Returns:
-            Dictionary with code generation result
+            OrchestratorResponse with code generation result
         """
         try:
             logger.info("Generating code response...")
@@ -252,46 +729,55 @@ Com base no contexto fornecido acima, responda à pergunta de forma clara e prec
             context_text = ""
             if context_docs:
                 context_texts = [doc.get("text", "") for doc in context_docs]
-                context_text = "\n\n".join(context_texts)
+                if _context_size(context_docs) < PROMPT_OFFLOAD_THRESHOLD:
+                    context_text = "\n\n".join(context_texts)
+                else:
+                    context_text = await run_in_threadpool("\n\n".join, context_texts)
             
             # Generate code response
-            code_response = await self.qwen3_adapter.generate_code_response(
-                prompt=query,
-                context=context_text if context_text else None,
-                temperature=route_result.suggested_parameters.get("temperature", 0.3) if route_result else 0.3
+            code_response = await _timed(
+                self.qwen3_adapter.generate_code_response(
+                    prompt=query,
+                    context=context_text if context_text else None,
+                    temperature=route_result.suggested_parameters.get("temperature", 0.3) if route_result else 0.3
+                ),
+                timings,
+                "t_llm_ms"
             )
             
             if code_response:
-                return {
-                    "success": True,
-                    "query": query,
-                    "context": context_docs,
-                    "response": code_response,
-                    "response_type": "code",
-                    "metadata": {
+                return OrchestratorResponse(
+                    success=True,
+                    query=query,
+                    context=context_docs,
+                    response=code_response,
+                    response_type="code",
+                    metadata={
                         "model_used": "qwen3:coder",
                         "context_docs_count": len(context_docs),
-                        "routing": route_result.__dict__ if route_result else None
+                        "routing": route_result.to_dict() if route_result else None
                     }
-                }
+                )
             else:
                 # Fallback to default model if Qwen3 fails
                 logger.warning("Qwen3 Coder failed, falling back to default model")
-                return await self._handle_default_generation(query, context_docs, route_result, None)
+                return await self._handle_default_generation(query, context_docs, route_result, None, timings=timings)
                 
         except Exception as e:
             logger.error(f"Error in code generation: {e}")
             # Fallback to default model
             logger.info("Falling back to default model due to code generation error")
-            return await self._handle_default_generation(query, context_docs, route_result, None)
+            return await self._handle_default_generation(query, context_docs, route_result, None, timings=timings)
 
     async def _handle_default_generation(
         self, 
         query: str, 
         context_docs: List[Dict[str, Any]], 
         route_result: Optional[Any] = None,
-        specific_model: Optional[str] = None
-    ) -> Dict[str, Any]:
+        specific_model: Optional[str] = None,
+        llm_available: Optional[bool] = None,
+        timings: Optional[Dict[str, float]] = None
+    ) -> OrchestratorResponse:
         """
         Handle default text generation requests
         
@@ -300,68 +786,61 @@ Com base no contexto fornecido acima, responda à pergunta de forma clara e prec
             context_docs: Retrieved context documents
             route_result: Routing decision result
             specific_model: Specific model to use
+            llm_available: Result of an availability probe already made by the caller
+            timings: Per-phase latencies in ms, filled in as phases complete
             
         Returns:
-            Dictionary with generation result
+            OrchestratorResponse with generation result
         """
         try:
             # Determine model type for prompt formatting
             model_type = route_result.model_type if route_result else ModelType.DEFAULT
             
             # Format prompt with context
-            formatted_prompt = self._format_rag_prompt(query, context_docs, model_type)
+            formatted_prompt = await _timed(
+                self._format_rag_prompt_async(query, context_docs, model_type),
+                timings,
+                "t_format_ms"
+            )
             
-            # Check LLM availability
-            llm_available = await self.llm_client.is_available()
+            # Check LLM availability unless the caller already probed it
+            if llm_available is None:
+                llm_available = await self._cached_probe("llm_available", self.llm_client.is_available)
             if not llm_available:
-                return {
-                    "success": False,
-                    "error": "LLM service (Ollama) not available",
-                    "query": query,
-                    "context": context_docs,
-                    "response": None
-                }
+                return OrchestratorResponse.failure(query, "LLM service (Ollama) not available", context_docs)
             
             # Generate response using default LLM
             logger.info("Generating response with default LLM...")
-            llm_response = await self.llm_client.generate_response(
-                prompt=formatted_prompt,
-                model=specific_model
-            )
+            if settings.ollama_batching:
+                generation = self.batcher.submit(formatted_prompt, specific_model)
+            else:
+                generation = self.llm_client.generate_response(
+                    prompt=formatted_prompt,
+                    model=specific_model
+                )
+            llm_response = await _timed(generation, timings, "t_llm_ms")
             
             if llm_response is None:
-                return {
-                    "success": False,
-                    "error": "Failed to generate response from LLM",
-                    "query": query,
-                    "context": context_docs,
-                    "response": None
-                }
+                return OrchestratorResponse.failure(query, "Failed to generate response from LLM", context_docs)
             
             # Return successful response
-            return {
-                "success": True,
-                "query": query,
-                "context": context_docs,
-                "response": llm_response,
-                "response_type": "text",
-                "metadata": {
+            return OrchestratorResponse(
+                success=True,
+                query=query,
+                context=context_docs,
+                response=llm_response,
+                response_type="text",
+                metadata={
                     "context_docs_count": len(context_docs),
                     "model_used": specific_model or self.llm_client.default_model,
                     "prompt_length": len(formatted_prompt),
-                    "routing": route_result.__dict__ if route_result else None
+                    "routing": route_result.to_dict() if route_result else None
                 }
-            }
+            )
             
         except Exception as e:
             logger.error(f"Error in default generation: {e}")
-            return {
-                "success": False,
-                "error": f"Generation error: {str(e)}",
-                "query": query,
-                "context": context_docs,
-                "response": None
-            }
+            return OrchestratorResponse.failure(query, f"Generation error: {str(e)}", context_docs)
     
     async def add_knowledge(
         self, 
@@ -405,14 +884,22 @@ Com base no contexto fornecido acima, responda à pergunta de forma clara e prec
             Dictionary with system status information
         """
         try:
-            # Check LLM availability
-            llm_available = await self.llm_client.is_available()
-            
-            # Get knowledge base info
-            kb_info = await self.retriever.get_knowledge_base_info()
-            
-            # Get available models
-            available_models = await self.llm_client.list_models()
+            # Probe LLM availability, knowledge base info and available models concurrently
+            llm_available, kb_info, available_models = await asyncio.gather(
+                self._cached_probe("llm_available", self.llm_client.is_available),
+                self._cached_probe("kb_info", self.retriever.get_knowledge_base_info),
+                self._cached_probe("available_models", self.llm_client.list_models),
+                return_exceptions=True
+            )
+            if isinstance(llm_available, Exception):
+                logger.error(f"Error checking LLM availability: {llm_available}")
+                llm_available = False
+            if isinstance(kb_info, Exception):
+                logger.error(f"Error getting knowledge base info: {kb_info}")
+                kb_info = None
+            if isinstance(available_models, Exception):
+                logger.error(f"Error listing models: {available_models}")
+                available_models = None
             
             return {
                 "success": True,
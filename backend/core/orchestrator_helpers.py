@@ -35,7 +35,7 @@ async def handle_image_generation(
             prompt=query,
             width=params.get("width", 512),
             height=params.get("height", 512),
-            steps=params.get("steps", 30),
+            steps=params.get("steps"),
             guidance_scale=params.get("guidance_scale", 7.5)
         )
         
@@ -48,7 +48,7 @@ async def handle_image_generation(
                 "response_type": "image",
                 "metadata": {
                     "model_used": "stable-diffusion",
-                    "routing": route_result.__dict__ if route_result else None,
+                    "routing": route_result.to_dict() if route_result else None,
                     "generation_params": image_result
                 }
             }
@@ -115,7 +115,7 @@ async def handle_code_generation(
                 "metadata": {
                     "model_used": "qwen3:coder",
                     "context_docs_count": len(context_docs),
-                    "routing": route_result.__dict__ if route_result else None
+                    "routing": route_result.to_dict() if route_result else None
                 }
             }
         else:
@@ -194,7 +194,7 @@ async def handle_default_generation(
                 "context_docs_count": len(context_docs),
                 "model_used": specific_model or self.llm_client.default_model,
                 "prompt_length": len(formatted_prompt),
-                "routing": route_result.__dict__ if route_result else None
+                "routing": route_result.to_dict() if route_result else None
             }
         }
         
@@ -2,16 +2,144 @@
 Qdrant Client for AURAX RAG System
 """
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CompressionRatio,
+    Datatype,
+    Distance,
+    VectorParams,
+    PointStruct,
+    QueryRequest,
+    SearchParams,
+    ProductQuantization,
+    ProductQuantizationConfig,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    QuantizationSearchParams,
+    HnswConfigDiff,
+    Filter
+)
 from qdrant_client.http.exceptions import UnexpectedResponse
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Union
+import asyncio
 import logging
+import math
+import uuid
+import httpx
+import numpy as np
 from config.settings import settings
+from ..batching import WindowedBatcher
 
 logger = logging.getLogger(__name__)
 
 
+# Collection quantization per qdrant_quantization_type, with the oversampling
+# its codes need by default: int8 ranks close to float32, while 1-bit and
+# product-quantized (IVF-PQ style sub-vector codebooks) codes are coarser
+_QUANTIZATION_TYPES = {
+    "int8": (
+        ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        ),
+        2.0
+    ),
+    "binary": (BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True)), 4.0),
+    "product": (
+        ProductQuantization(
+            product=ProductQuantizationConfig(compression=CompressionRatio.X32, always_ram=True)
+        ),
+        4.0
+    ),
+}
+
+
+def _quantized_vector_bytes(quantization: Any, vector_size: int) -> Optional[Tuple[str, int]]:
+    """Name and per-vector size in bytes of a collection's quantized codes, or None if not quantized"""
+    if isinstance(quantization, ScalarQuantization):
+        return "int8", vector_size
+    if isinstance(quantization, BinaryQuantization):
+        return "binary", math.ceil(vector_size / 8)
+    if isinstance(quantization, ProductQuantization):
+        ratio = int(str(quantization.product.compression.value).lstrip("x"))
+        return "product", max(1, vector_size * 4 // ratio)
+    return None
+
+
+# (query vector, limit, score threshold, payload filter)
+_Search = Tuple[Union[np.ndarray, List[float]], int, float, Optional[Filter]]
+
+
+class BatchingSearcher(WindowedBatcher):
+    """
+    Coalesces searches that arrive within a short window into one query_batch_points call
+    """
+    
+    def __init__(
+        self,
+        client: AsyncQdrantClient,
+        collection_name: str,
+        max_wait_ms: float = 5.0,
+        max_batch: int = 16,
+        search_params: Optional[SearchParams] = None
+    ):
+        """
+        Initialize the batching searcher
+        
+        Args:
+            client: Async Qdrant client used for the batched searches
+            collection_name: Collection to search
+            max_wait_ms: How long to wait for more searches after the first one arrives
+            max_batch: Maximum number of searches sent in one request
+            search_params: Search parameters applied to every query in a batch
+        """
+        super().__init__(max_wait_ms, max_batch)
+        self.client = client
+        self.collection_name = collection_name
+        self.search_params = search_params
+    
+    async def search(
+        self,
+        query_vector: Union[np.ndarray, List[float]],
+        limit: int,
+        score_threshold: float,
+        query_filter: Optional[Filter] = None
+    ) -> List[Any]:
+        """
+        Queue a search and wait for its scored points
+        
+        Args:
+            query_vector: The query vector to search for
+            limit: Maximum number of results to return
+            score_threshold: Minimum similarity score threshold
+            query_filter: Payload filter applied before the vector search
+            
+        Returns:
+            List of scored points for this query
+        """
+        return await self._submit((query_vector, limit, score_threshold, query_filter))
+    
+    async def _flush(self, searches: List[_Search]) -> List[List[Any]]:
+        """Run one query_batch_points request and hand each caller its own results"""
+        responses = await self.client.query_batch_points(
+            collection_name=self.collection_name,
+            requests=[
+                QueryRequest(
+                    query=vector.tolist() if isinstance(vector, np.ndarray) else vector,
+                    limit=limit,
+                    score_threshold=threshold,
+                    filter=query_filter,
+                    with_payload=True,
+                    params=self.search_params
+                )
+                for vector, limit, threshold, query_filter in searches
+            ]
+        )
+        return [response.points for response in responses]
+
+
 class AuraxQdrantClient:
     """
     Qdrant client wrapper for AURAX RAG operations
@@ -19,13 +147,68 @@ class AuraxQdrantClient:
     
     def __init__(self):
         """Initialize Qdrant client with settings configuration"""
-        self.client = QdrantClient(
+        # One long-lived client; its REST pool keeps connections alive between
+        # calls (qdrant-client disables keep-alive for localhost by default)
+        # and gRPC pings keep the channel from being dropped while idle
+        self.client = AsyncQdrantClient(
             url=settings.qdrant_url,
-            api_key=settings.qdrant_api_key
+            api_key=settings.qdrant_api_key,
+            prefer_grpc=settings.qdrant_prefer_grpc,
+            grpc_options={
+                "grpc.keepalive_time_ms": settings.qdrant_grpc_keepalive_ms,
+                "grpc.keepalive_timeout_ms": 10000
+            },
+            limits=httpx.Limits(
+                max_connections=settings.qdrant_max_connections,
+                max_keepalive_connections=settings.qdrant_max_keepalive_connections
+            )
         )
         self.collection_name = settings.qdrant_collection_name
         self.vector_size = settings.qdrant_vector_size
         self.distance_metric = self._get_distance_metric()
+        
+        # int8 vectors cut the bytes read per candidate by 4x, binary (one bit
+        # per dimension, compared by popcount) and product-quantized ones by
+        # 32x; limit x oversampling candidates are rescored with the original
+        # vectors to keep recall
+        self.quantization_config = None
+        quantization_params = None
+        if settings.qdrant_quantization:
+            quantization_type = settings.qdrant_quantization_type
+            if quantization_type not in _QUANTIZATION_TYPES:
+                logger.warning(f"Unknown qdrant_quantization_type {quantization_type!r}, using int8")
+                quantization_type = "int8"
+            self.quantization_config, default_oversampling = _QUANTIZATION_TYPES[quantization_type]
+            quantization_params = QuantizationSearchParams(
+                ignore=False,
+                rescore=settings.qdrant_quantization_rescore,
+                oversampling=settings.qdrant_oversampling or default_oversampling
+            )
+        
+        # With int8 copies held in RAM, the full-precision vectors are only read
+        # when rescoring, so they can live on disk; float16 halves their size
+        self.vectors_on_disk = settings.qdrant_quantization and settings.qdrant_vectors_on_disk
+        self.vector_datatype = Datatype.FLOAT16 if settings.qdrant_float16_vectors else None
+        
+        # Explicit graph and beam width instead of server defaults
+        self.hnsw_config = HnswConfigDiff(m=16, ef_construct=128, on_disk=False)
+        self.search_params = SearchParams(
+            hnsw_ef=settings.qdrant_hnsw_ef,
+            quantization=quantization_params
+        )
+        
+        self.batcher = BatchingSearcher(
+            self.client,
+            self.collection_name,
+            max_wait_ms=settings.qdrant_batch_max_wait_ms,
+            max_batch=settings.qdrant_batch_max_size,
+            search_params=self.search_params
+        )
+    
+    async def close(self):
+        """Stop the search batcher and close the underlying Qdrant connections"""
+        await self.batcher.close()
+        await self.client.close()
     
     def _get_distance_metric(self) -> Distance:
         """Convert string distance metric to Qdrant Distance enum"""
@@ -45,7 +228,7 @@ class AuraxQdrantClient:
         """
         try:
             # Check if collection exists
-            collections = self.client.get_collections()
+            collections = await self.client.get_collections()
             collection_exists = any(
                 col.name == self.collection_name 
                 for col in collections.collections
@@ -53,12 +236,16 @@ class AuraxQdrantClient:
             
             if not collection_exists:
                 logger.info(f"Creating collection: {self.collection_name}")
-                self.client.create_collection(
+                await self.client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(
                         size=self.vector_size,
-                        distance=self.distance_metric
-                    )
+                        distance=self.distance_metric,
+                        on_disk=self.vectors_on_disk,
+                        datatype=self.vector_datatype
+                    ),
+                    hnsw_config=self.hnsw_config,
+                    quantization_config=self.quantization_config
                 )
                 logger.info(f"Collection {self.collection_name} created successfully")
             else:
@@ -72,29 +259,37 @@ class AuraxQdrantClient:
     
     async def search_vectors(
         self, 
-        query_vector: List[float], 
+        query_vector: Union[np.ndarray, List[float]], 
         limit: int = 3,
-        score_threshold: float = 0.7
+        score_threshold: float = 0.7,
+        query_filter: Optional[Filter] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for similar vectors in the collection
         
         Args:
-            query_vector: The query vector to search for
+            query_vector: The query vector to search for (float32 arrays are passed through as-is)
             limit: Maximum number of results to return
             score_threshold: Minimum similarity score threshold
+            query_filter: Payload filter applied before the vector search
             
         Returns:
             List of search results with payload and scores
         """
         try:
-            search_results = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_vector,
-                limit=limit,
-                score_threshold=score_threshold,
-                with_payload=True
-            )
+            if settings.qdrant_search_batching:
+                search_results = await self.batcher.search(query_vector, limit, score_threshold, query_filter)
+            else:
+                response = await self.client.query_points(
+                    collection_name=self.collection_name,
+                    query=query_vector,
+                    limit=limit,
+                    score_threshold=score_threshold,
+                    query_filter=query_filter,
+                    with_payload=True,
+                    search_params=self.search_params
+                )
+                search_results = response.points
             
             results = []
             for result in search_results:
@@ -115,34 +310,48 @@ class AuraxQdrantClient:
     async def add_documents(
         self, 
         documents: List[Dict[str, Any]], 
-        vectors: List[List[float]]
+        vectors: Union[np.ndarray, List[List[float]]]
     ) -> bool:
         """
         Add documents with their vectors to the collection
         
+        Points get random UUID ids, so repeated calls add to the collection
+        instead of overwriting earlier documents. They are sent in batches of
+        qdrant_upload_batch_size with up to qdrant_upload_parallel requests in
+        flight, without waiting for each batch to be indexed.
+        
         Args:
             documents: List of document payloads
-            vectors: List of corresponding vectors
+            vectors: (N, D) float32 array or list of corresponding vectors
             
         Returns:
             bool: True if documents were added successfully
         """
         try:
+            if isinstance(vectors, np.ndarray):
+                vectors = vectors.tolist()
+            
             points = [
-                PointStruct(
-                    id=i,
-                    vector=vector,
-                    payload=doc
-                )
-                for i, (doc, vector) in enumerate(zip(documents, vectors))
+                PointStruct(id=str(uuid.uuid4()), vector=vector, payload=doc)
+                for doc, vector in zip(documents, vectors)
             ]
+            batch_size = max(1, settings.qdrant_upload_batch_size)
+            semaphore = asyncio.Semaphore(max(1, settings.qdrant_upload_parallel))
             
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=points
-            )
+            async def upsert_batch(batch: List[PointStruct]):
+                async with semaphore:
+                    await self.client.upsert(
+                        collection_name=self.collection_name,
+                        points=batch,
+                        wait=False
+                    )
             
-            logger.info(f"Added {len(documents)} documents to collection")
+            await asyncio.gather(*(
+                upsert_batch(points[start:start + batch_size])
+                for start in range(0, len(points), batch_size)
+            ))
+            
+            logger.info(f"Added {len(points)} documents to collection")
             return True
             
         except Exception as e:
@@ -157,13 +366,22 @@ class AuraxQdrantClient:
             Dictionary with collection information or None if error
         """
         try:
-            info = self.client.get_collection(self.collection_name)
-            return {
+            info = await self.client.get_collection(self.collection_name)
+            result = {
                 "name": info.config.name,
                 "vector_size": info.config.params.vectors.size,
                 "distance": info.config.params.vectors.distance.value,
                 "points_count": info.points_count
             }
+            
+            # Report what the collection was created with, which may predate the current settings
+            quantized = _quantized_vector_bytes(
+                info.config.quantization_config, info.config.params.vectors.size
+            )
+            if quantized:
+                result["quantization"], bytes_per_vector = quantized
+                result["quantized_vectors_bytes"] = (info.points_count or 0) * bytes_per_vector
+            return result
         except Exception as e:
             logger.error(f"Error getting collection info: {e}")
             return None
@@ -3,55 +3,347 @@ RAG Retriever for AURAX System
 """
 
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Tuple
 import logging
+import os
+import threading
+import numpy as np
+import torch
+from starlette.concurrency import run_in_threadpool
+from qdrant_client.models import Filter
+from config.settings import settings
+from ..batching import WindowedBatcher
 from .qdrant_client import qdrant_client
 
 logger = logging.getLogger(__name__)
 
+# Repeated and templated queries reuse their embedding instead of re-running the model
+EMBEDDING_CACHE_SIZE = 1024
+
+# Documents encoded per forward pass when adding to the knowledge base
+DOCUMENT_BATCH_SIZE = 64
+
+
+def _configure_torch_threads():
+    """
+    Size PyTorch's CPU thread pools for embedding inference
+    
+    Uses settings.torch_threads, or min(8, cores) when neither that nor
+    OMP_NUM_THREADS is set; beyond ~8 threads a small encoder gains little
+    and competes with the rest of the process.
+    """
+    threads = settings.torch_threads
+    if threads is None:
+        if os.environ.get("OMP_NUM_THREADS"):
+            return
+        threads = min(8, os.cpu_count() or 1)
+    
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(2)
+    except RuntimeError:
+        # Only allowed before any inter-op parallel work has started
+        pass
+    logger.info(f"Using {threads} torch threads for embeddings")
+
+
+class BatchingEncoder(WindowedBatcher):
+    """
+    Coalesces query embeddings that arrive within a short window into one encode call
+    """
+    
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        max_wait_ms: float = 8.0,
+        max_batch: int = 32
+    ):
+        """
+        Initialize the batching encoder
+        
+        Args:
+            encode: Embeds a list of texts as an (N, D) array; run in the threadpool
+            max_wait_ms: How long to wait for more queries after the first one arrives
+            max_batch: Maximum number of queries encoded in one forward pass
+        """
+        super().__init__(max_wait_ms, max_batch)
+        self.encode_batch = encode
+    
+    async def encode(self, text: str) -> np.ndarray:
+        """
+        Queue a query and wait for its embedding
+        
+        Args:
+            text: Query text, already normalized by the caller
+            
+        Returns:
+            The query's embedding vector
+        """
+        return await self._submit(text)
+    
+    async def _flush(self, texts: List[str]) -> List[np.ndarray]:
+        """Run one forward pass and hand each caller its own row"""
+        # Identical queries in a burst share one row
+        unique = list(dict.fromkeys(texts))
+        rows = dict(zip(unique, await run_in_threadpool(self.encode_batch, unique)))
+        return [rows[text] for text in texts]
+
+
+class DocumentBatcher(WindowedBatcher):
+    """
+    Coalesces knowledge base writes that arrive within a short window into one embed + upsert
+    """
+    
+    def __init__(
+        self,
+        write: Callable[[List[Dict[str, Any]]], Awaitable[bool]],
+        max_wait_ms: float = 200.0,
+        max_docs: int = 256
+    ):
+        """
+        Initialize the document batcher
+        
+        Args:
+            write: Embeds and stores a list of documents, returning success
+            max_wait_ms: How long to wait for more writes after the first one arrives
+            max_docs: Document count at which a batch is written without waiting further
+        """
+        super().__init__(max_wait_ms, max_docs)
+        self.write = write
+    
+    async def add(self, documents: List[Dict[str, Any]]) -> bool:
+        """
+        Queue documents and wait until their batch has been written
+        
+        Args:
+            documents: Documents with text and optional metadata
+            
+        Returns:
+            bool: True if the batch holding these documents was stored
+        """
+        return await self._submit(documents)
+    
+    def _item_size(self, documents: List[Dict[str, Any]]) -> int:
+        """Batches are bounded by document count, not by number of writes"""
+        return len(documents)
+    
+    async def _flush(self, writes: List[List[Dict[str, Any]]]) -> List[bool]:
+        """Embed and store a batch's documents together; every caller gets the same outcome"""
+        success = await self.write([doc for documents in writes for doc in documents])
+        return [success] * len(writes)
+
+
+def _load_embedding_model(model_name: str) -> SentenceTransformer:
+    """
+    Load the sentence transformer on the configured backend
+    
+    With embedding_backend "onnx" the model runs through ONNX Runtime, using
+    the int8-quantized export named by embedding_onnx_file. If the installed
+    sentence-transformers has no backend support, optimum is missing or the
+    file is not available, the PyTorch model is loaded instead, at
+    embedding_precision: int8 swaps its Linear layers for dynamically
+    quantized ones (int8 GEMMs on CPU), fp16 halves the weights on GPU.
+    
+    Args:
+        model_name: Name of the sentence transformer model to load
+        
+    Returns:
+        Loaded SentenceTransformer
+    """
+    device = settings.embedding_device or ("cuda" if torch.cuda.is_available() else "cpu")
+    
+    if settings.embedding_backend == "onnx":
+        model_kwargs = {"file_name": settings.embedding_onnx_file} if settings.embedding_onnx_file else None
+        try:
+            model = SentenceTransformer(model_name, device=device, backend="onnx", model_kwargs=model_kwargs)
+            logger.info(f"Loaded ONNX Runtime embedding model ({settings.embedding_onnx_file or 'model.onnx'}) on {device}")
+            return model
+        except Exception as e:
+            logger.warning(f"ONNX embedding backend unavailable, using PyTorch: {e}")
+    
+    logger.info(f"Loading embedding model on {device}")
+    model = SentenceTransformer(model_name, device=device)
+    
+    precision = settings.embedding_precision
+    on_cpu = device.startswith("cpu")
+    if precision == "int8" and on_cpu:
+        torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        logger.info("Quantized embedding model Linear layers to int8")
+    elif precision == "fp16" and not on_cpu:
+        model.half()
+        logger.info("Converted embedding model to fp16")
+    elif precision != "fp32":
+        logger.warning(f"Embedding precision {precision} is not supported on {device}, using fp32")
+    return model
+
 
 class AuraxRetriever:
     """
     Retrieval component for AURAX RAG system
     """
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = DOCUMENT_BATCH_SIZE):
         """
-        Initialize the retriever with embedding model
+        Initialize the retriever
+        
+        The embedding model is loaded on first use (normally by warmup at
+        startup), so importing this module stays cheap.
         
         Args:
             model_name: Name of the sentence transformer model to use
+            batch_size: Documents encoded per forward pass when adding to the knowledge base
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._embedding_model: Optional[SentenceTransformer] = None
+        self._lowercase_queries = False
+        self._model_lock = threading.Lock()
+        # LRU of query embeddings keyed by normalized text (most recent last)
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        
+        # Concurrent searches share encoder forward passes when enabled
+        self.query_encoder: Optional[BatchingEncoder] = None
+        if settings.embedding_batching:
+            self.query_encoder = BatchingEncoder(
+                self._encode_queries,
+                max_wait_ms=settings.embedding_batch_max_wait_ms,
+                max_batch=settings.embedding_batch_max_size
+            )
+        
+        # Small concurrent writes (e.g. several /scrape calls) share one embed + upsert when enabled
+        self.document_writer: Optional[DocumentBatcher] = None
+        if settings.kb_write_batching:
+            self.document_writer = DocumentBatcher(
+                self._write_documents,
+                max_wait_ms=settings.kb_write_batch_max_wait_ms,
+                max_docs=settings.kb_write_batch_max_docs
+            )
+    
+    @property
+    def embedding_model(self) -> SentenceTransformer:
+        """The sentence transformer, loaded on first access"""
+        if self._embedding_model is None:
+            with self._model_lock:
+                if self._embedding_model is None:
+                    try:
+                        _configure_torch_threads()
+                        model = _load_embedding_model(self.model_name)
+                    except Exception as e:
+                        logger.error(f"Error initializing embedding model: {e}")
+                        raise
+                    # Uncased models (like all-MiniLM-L6-v2) embed case variants identically, so they can share cache entries
+                    tokenizer = getattr(model, "tokenizer", None)
+                    self._lowercase_queries = bool(getattr(tokenizer, "do_lower_case", False))
+                    self._embedding_model = model
+                    logger.info(f"Initialized embedding model: {self.model_name}")
+        return self._embedding_model
+    
+    async def warmup(self) -> bool:
+        """
+        Load the embedding model and run one search before the first request
+        
+        The load and the first encode (weight transfer, kernel setup) run in
+        the threadpool; the search opens the Qdrant connection.
+        
+        Returns:
+            bool: True if the model loaded
         """
         try:
-            self.embedding_model = SentenceTransformer(model_name)
-            self.model_name = model_name
-            logger.info(f"Initialized embedding model: {model_name}")
+            await run_in_threadpool(self._encode_query, "warmup")
         except Exception as e:
-            logger.error(f"Error initializing embedding model: {e}")
-            raise
+            logger.error(f"Embedding warmup failed: {e}")
+            return False
+        await self.search_relevant_context(query_text="warmup", top_k=1, score_threshold=0.0)
+        return True
+    
+    async def close(self):
+        """Stop the query embedding and document write batchers, if any"""
+        if self.query_encoder is not None:
+            await self.query_encoder.close()
+        if self.document_writer is not None:
+            await self.document_writer.close()
     
-    def _get_query_embedding(self, query_text: str) -> List[float]:
+    def _query_key(self, query_text: str) -> str:
+        """Normalize a query to its embedding cache key (the model must be loaded, as it decides the casing)"""
+        # Whitespace runs and, for uncased models, letter case do not change the embedding
+        key = " ".join(query_text.split())
+        if self._lowercase_queries:
+            key = key.lower()
+        return key
+    
+    def _cached_query_embedding(self, key: str) -> Optional[np.ndarray]:
+        """Look up a query embedding, marking it recently used"""
+        embedding = self._query_cache.get(key)
+        if embedding is not None:
+            self._query_cache.move_to_end(key)
+        return embedding
+    
+    def _cache_query_embedding(self, key: str, embedding: np.ndarray):
+        """Store a query embedding, evicting the least recently used"""
+        self._query_cache[key] = embedding
+        self._query_cache.move_to_end(key)
+        while len(self._query_cache) > EMBEDDING_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+    
+    async def get_query_embedding(self, query_text: str) -> np.ndarray:
         """
         Convert query text to embedding vector
         
+        Cache hits return directly. Misses (and the model load on first use)
+        run off the event loop, so other requests keep being served while a
+        query is encoded: through the batching encoder when
+        embedding_batching is on, so a burst of searches costs one forward
+        pass, otherwise in the threadpool.
+        
         Args:
             query_text: The input query text
             
         Returns:
-            List of floats representing the embedding vector
+            Unit-length float32 array with the embedding vector (empty on error)
         """
         try:
-            embedding = self.embedding_model.encode(query_text)
-            return embedding.tolist()
+            if self._embedding_model is None:
+                await run_in_threadpool(getattr, self, "embedding_model")
+            
+            key = self._query_key(query_text)
+            embedding = self._cached_query_embedding(key)
+            if embedding is None:
+                if self.query_encoder is not None:
+                    embedding = await self.query_encoder.encode(key)
+                else:
+                    embedding = await run_in_threadpool(self._encode_query, key)
+                self._cache_query_embedding(key, embedding)
+            return embedding
         except Exception as e:
             logger.error(f"Error generating embedding for query: {e}")
-            return []
+            return np.empty(0, dtype=np.float32)
+    
+    def _encode_query(self, query_text: str) -> np.ndarray:
+        """Embed a query as a read-only, unit-length float32 array, safe to share from the cache"""
+        return self._encode_queries([query_text])[0]
+    
+    def _encode_queries(self, texts: List[str]) -> np.ndarray:
+        """Embed queries in one forward pass as a read-only (N, D) float32 array whose rows are safe to share"""
+        embeddings = np.asarray(
+            self.embedding_model.encode(
+                texts,
+                batch_size=max(len(texts), 1),
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            ),
+            dtype=np.float32
+        )
+        embeddings.flags.writeable = False
+        return embeddings
     
     async def search_relevant_context(
         self, 
         query_text: str, 
         top_k: int = 3,
-        score_threshold: float = 0.7
+        score_threshold: float = 0.7,
+        query_filter: Optional[Filter] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for relevant context documents based on query
@@ -60,6 +352,7 @@ class AuraxRetriever:
             query_text: The input query text
             top_k: Number of top similar documents to retrieve
             score_threshold: Minimum similarity score threshold
+            query_filter: Payload filter (e.g. source or language) applied before the vector search
             
         Returns:
             List of relevant context documents with metadata
@@ -76,8 +369,8 @@ class AuraxRetriever:
                 return []
             
             # Get query embedding
-            query_embedding = self._get_query_embedding(query_text)
-            if not query_embedding:
+            query_embedding = await self.get_query_embedding(query_text)
+            if query_embedding.size == 0:
                 logger.error("Failed to generate query embedding")
                 return []
             
@@ -85,7 +378,8 @@ class AuraxRetriever:
             search_results = await qdrant_client.search_vectors(
                 query_vector=query_embedding,
                 limit=top_k,
-                score_threshold=score_threshold
+                score_threshold=score_threshold,
+                query_filter=query_filter
             )
             
             # Format results for RAG usage
@@ -111,6 +405,10 @@ class AuraxRetriever:
         """
         Add documents to the knowledge base
         
+        With kb_write_batching on, documents from concurrent callers are
+        embedded and upserted together by the document batcher; each caller
+        still waits until its documents are stored.
+        
         Args:
             documents: List of documents with 'text' and optional metadata
             
@@ -122,41 +420,104 @@ class AuraxRetriever:
                 logger.warning("No documents provided to add")
                 return False
             
-            # Generate embeddings for all documents
-            texts = [doc.get("text", "") for doc in documents]
-            embeddings = []
+            if not any(doc.get("text", "").strip() for doc in documents):
+                logger.error("No documents with text to embed")
+                return False
             
-            for text in texts:
-                if text.strip():
-                    embedding = self._get_query_embedding(text)
-                    embeddings.append(embedding)
-                else:
-                    logger.warning("Empty text found in document, skipping")
-                    continue
+            if self.document_writer is not None:
+                return await self.document_writer.add(documents)
+            return await self._write_documents(documents)
             
-            if not embeddings:
-                logger.error("No valid embeddings generated")
-                return False
+        except Exception as e:
+            logger.error(f"Error adding documents to knowledge base: {e}")
+            return False
+    
+    async def _write_documents(self, documents: List[Dict[str, Any]]) -> bool:
+        """Embed documents in one encode call and store them"""
+        documents, embeddings = await self.embed_documents(documents)
+        if not documents:
+            logger.error("No documents with text to embed")
+            return False
+        
+        success = await self.store_documents(documents, embeddings)
+        
+        if success:
+            logger.info(f"Successfully added {len(documents)} documents to knowledge base")
+        else:
+            logger.error("Failed to add documents to knowledge base")
+        
+        return success
+    
+    async def embed_documents(
+        self,
+        documents: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Optional[np.ndarray]]:
+        """
+        Embed documents without storing them
+        
+        Args:
+            documents: List of documents with 'text' and optional metadata
             
-            # Ensure collection exists
+        Returns:
+            Tuple of (documents that have text, their (N, D) embeddings or None if none do)
+        """
+        # Skip documents without text, keeping payloads aligned with their embeddings
+        documents = [doc for doc in documents if doc.get("text", "").strip()]
+        if not documents:
+            return [], None
+        
+        # Encode all documents in one call off the event loop
+        texts = [doc["text"] for doc in documents]
+        embeddings = await run_in_threadpool(self._encode_documents, texts)
+        return documents, embeddings
+    
+    async def store_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        embeddings: np.ndarray,
+        ensure_collection: bool = True
+    ) -> bool:
+        """
+        Write already embedded documents to the knowledge base
+        
+        Args:
+            documents: Document payloads
+            embeddings: (N, D) embeddings matching documents
+            ensure_collection: Check (and create) the collection first; callers
+                writing many batches do this once up front instead
+            
+        Returns:
+            bool: True if documents were added successfully
+        """
+        if ensure_collection:
             collection_ready = await qdrant_client.ensure_collection_exists()
             if not collection_ready:
                 logger.error("Failed to ensure Qdrant collection exists")
                 return False
+        
+        return await qdrant_client.add_documents(documents, embeddings)
+    
+    def _encode_documents(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed documents in batches
+        
+        Args:
+            texts: Non-empty document texts
             
-            # Add to Qdrant
-            success = await qdrant_client.add_documents(documents, embeddings)
-            
-            if success:
-                logger.info(f"Successfully added {len(documents)} documents to knowledge base")
-            else:
-                logger.error("Failed to add documents to knowledge base")
-            
-            return success
-            
-        except Exception as e:
-            logger.error(f"Error adding documents to knowledge base: {e}")
-            return False
+        Returns:
+            (N, D) float32 array of normalized embeddings
+        """
+        # encode() sorts its input by length before splitting it into batches
+        # and restores the original order afterwards, so each batch is padded
+        # only to its own longest text. That only helps when the whole list
+        # is passed in one call, as here, rather than document by document.
+        return self.embedding_model.encode(
+            texts,
+            batch_size=self.batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32, copy=False)
     
     async def get_knowledge_base_info(self) -> Optional[Dict[str, Any]]:
         """
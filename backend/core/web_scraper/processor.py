@@ -2,17 +2,145 @@
 Content Processor for AURAX Web Scraper
 """
 
+import os
 import re
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import QueueHandler
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterator, Optional, Set
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from pydantic import BaseModel
+from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Cleaning and splitting is pure Python, so pages are chunked in separate
+# processes to get past the GIL; the scraper runs text extraction here too
+PROCESS_POOL_WORKERS = settings.scrape_process_workers or os.cpu_count() or 1
+_process_pool: Optional[ProcessPoolExecutor] = None
 
-class ProcessedChunk(BaseModel):
-    """Model for processed content chunk"""
+# Patterns used per chunk, compiled once at import
+_WHITESPACE_RE = re.compile(r'\s+')
+# Web and navigation boilerplate, removed in a single pass
+_WEB_ARTIFACTS_RE = re.compile(
+    '|'.join((
+        r'Cookie\s+Policy', r'Privacy\s+Policy', r'Terms\s+of\s+Service',
+        r'Subscribe\s+to\s+newsletter', r'Sign\s+up\s+for\s+updates',
+        r'Share\s+on\s+social\s+media', r'Follow\s+us',
+        r'Home\s+>\s+', r'Breadcrumb', r'Navigation',
+    )),
+    re.IGNORECASE
+)
+_ELLIPSIS_RE = re.compile(r'[.]{3,}')
+_DASHES_RE = re.compile(r'[-]{3,}')
+_QUOTES_TABLE = str.maketrans({'\u201c': '"', '\u201d': '"', '\u2018': "'", '\u2019': "'"})
+
+# Characters that are neither alphanumeric nor whitespace (\w also admits '_')
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s]|_')
+
+# Navigation menus, timestamps and footers, matched at the start of a chunk in one pass
+_NAVIGATION_RE = re.compile(
+    '|'.join((
+        r'(?:Home|About|Contact|Services|Products|Blog|News)(?:\s*\|\s*\w+)*$',
+        r'\d+\s*:\s*\d+\s*(?:AM|PM)?\s*$',
+        r'Copyright\s+©',
+        r'All\s+rights\s+reserved',
+    )),
+    re.IGNORECASE
+)
+
+_SENTENCE_END_RE = re.compile(r'[.!?]+')
+_CODE_RE = re.compile(r'\b(def\s+\w+|class\s+\w+|import\s+\w+|function\s*\()')
+_TUTORIAL_RE = re.compile(r'\b(Step\s+\d+|First|Second|Next|Finally)\b', re.IGNORECASE)
+_QA_RE = re.compile(r'\b(Q:|A:|Question|Answer)\b', re.IGNORECASE)
+
+# Topic keywords are looked up per word in a set instead of through a regex
+# alternation that is retried at every character; two-word topics are
+# matched by their first word followed, after a single space, by the second
+_WORD_RE = re.compile(r'\w+')
+_TECH_KEYWORDS = frozenset((
+    'api', 'database', 'server', 'client', 'authentication', 'security', 'performance',
+    'optimization', 'algorithm', 'data', 'model', 'framework', 'library', 'service',
+    'architecture', 'design', 'pattern', 'testing', 'deployment', 'development',
+    'programming', 'software', 'technology', 'system', 'network', 'web', 'mobile', 'cloud',
+    'docker', 'kubernetes', 'python', 'javascript', 'react', 'node', 'sql', 'nosql', 'rest',
+    'graphql', 'microservice', 'ai', 'ml',
+))
+_TECH_PHRASES = {'machine': 'learning', 'artificial': 'intelligence'}
+MAX_TOPIC_MENTIONS = 10
+
+
+def _extract_topics(chunk: str) -> List[str]:
+    """Return the distinct technical keywords among the first MAX_TOPIC_MENTIONS mentions"""
+    text = chunk.lower()
+    words = list(_WORD_RE.finditer(text))
+    topics = set()
+    mentions = 0
+    for index, match in enumerate(words):
+        word = match.group()
+        if word in _TECH_KEYWORDS:
+            topics.add(word)
+        elif (
+            index + 1 < len(words)
+            and _TECH_PHRASES.get(word) == words[index + 1].group()
+            and words[index + 1].start() == match.end() + 1
+            and text[match.end()] == ' '
+        ):
+            topics.add(f"{word} {words[index + 1].group()}")
+        else:
+            continue
+        mentions += 1
+        if mentions == MAX_TOPIC_MENTIONS:
+            break
+    return list(topics)
+
+
+def _init_worker_logging():
+    """
+    Log from a pool worker straight to stderr
+    
+    Forked workers inherit the app's QueueHandler, but no listener reads the
+    worker's copy of its queue, so those records would be silently dropped.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        root.addHandler(handler)
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared chunking/extraction pool, starting it on first use"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=PROCESS_POOL_WORKERS,
+            initializer=_init_worker_logging
+        )
+    return _process_pool
+
+
+def shutdown_process_pool():
+    """Stop the chunking/extraction pool's worker processes"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def content_hash(text: str) -> int:
+    """64-bit fingerprint of a chunk's text, used to skip repeated boilerplate"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+# Internal data only, so a plain dataclass instead of a validated model
+@dataclass(slots=True)
+class ProcessedChunk:
+    """Processed content chunk"""
     text: str
     source_url: str
     title: str
@@ -64,24 +192,18 @@ class ContentProcessor:
         if not text:
             return ""
         
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove common web artifacts
-        text = re.sub(r'Cookie\s+Policy|Privacy\s+Policy|Terms\s+of\s+Service', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'Subscribe\s+to\s+newsletter|Sign\s+up\s+for\s+updates', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'Share\s+on\s+social\s+media|Follow\s+us', '', text, flags=re.IGNORECASE)
-        
-        # Remove navigation artifacts
-        text = re.sub(r'Home\s+>\s+|Breadcrumb|Navigation', '', text, flags=re.IGNORECASE)
+        # Remove common web and navigation artifacts
+        text = _WEB_ARTIFACTS_RE.sub('', text)
         
         # Remove excessive punctuation
-        text = re.sub(r'[.]{3,}', '...', text)
-        text = re.sub(r'[-]{3,}', '---', text)
+        text = _ELLIPSIS_RE.sub('...', text)
+        text = _DASHES_RE.sub('---', text)
+        
+        # Clean up curly quotes and apostrophes
+        text = text.translate(_QUOTES_TABLE)
         
-        # Clean up quotes and apostrophes
-        text = re.sub(r'[""]', '"', text)
-        text = re.sub(r'['']', "'", text)
+        # Remove excessive whitespace, including gaps left by the removals above
+        text = _WHITESPACE_RE.sub(' ', text)
         
         return text.strip()
     
@@ -100,142 +222,170 @@ class ContentProcessor:
             return False
         
         # Remove chunks with too few words
-        word_count = len(chunk.split())
-        if word_count < 10:
+        words = chunk.split()
+        if len(words) < 10:
             return False
         
-        # Remove chunks that are mostly numbers or special characters
-        alphanumeric_ratio = sum(c.isalnum() or c.isspace() for c in chunk) / len(chunk)
-        if alphanumeric_ratio < 0.7:
+        # Remove chunks that look like navigation menus (anchored, so cheap)
+        if _NAVIGATION_RE.match(chunk.strip()):
             return False
         
-        # Remove chunks that look like navigation menus
-        navigation_patterns = [
-            r'^(Home|About|Contact|Services|Products|Blog|News)(\s*\|\s*\w+)*$',
-            r'^\d+\s*:\s*\d+\s*(AM|PM)?\s*$',
-            r'^Copyright\s+©',
-            r'^All\s+rights\s+reserved',
-        ]
-        
-        for pattern in navigation_patterns:
-            if re.match(pattern, chunk.strip(), flags=re.IGNORECASE):
-                return False
-        
-        # Remove chunks with excessive repetition
-        words = chunk.lower().split()
-        if len(set(words)) / len(words) < 0.3:  # Less than 30% unique words
+        # Remove chunks that are mostly numbers or special characters
+        special_count = len(_SPECIAL_CHARS_RE.findall(chunk))
+        if special_count > 0.3 * len(chunk):
             return False
         
-        return True
+        # Remove chunks with excessive repetition (less than 30% unique words),
+        # stopping as soon as enough distinct words have been seen
+        min_unique = 0.3 * len(words)
+        unique_words = set()
+        for word in words:
+            unique_words.add(word.lower())
+            if len(unique_words) >= min_unique:
+                return True
+        return False
     
-    def _enhance_chunk_metadata(
-        self, 
-        chunk: str, 
-        base_metadata: Dict[str, Any]
-    ) -> Dict[str, Any]:
+    def _analyze_chunk(self, chunk: str) -> Dict[str, Any]:
         """
-        Enhance chunk metadata with content analysis
+        Compute the chunk-specific metadata fields from content analysis
         
         Args:
             chunk: Text chunk
-            base_metadata: Base metadata from scraping
             
         Returns:
-            Enhanced metadata dictionary
+            Metadata fields to merge over the base metadata
         """
-        metadata = base_metadata.copy()
-        
-        # Add chunk statistics
-        metadata['chunk_length'] = len(chunk)
-        metadata['word_count'] = len(chunk.split())
-        metadata['sentence_count'] = len(re.findall(r'[.!?]+', chunk))
-        
         # Detect potential content type
-        if re.search(r'\b(def\s+\w+|class\s+\w+|import\s+\w+|function\s*\()', chunk):
-            metadata['content_type'] = 'code'
-        elif re.search(r'\b(Step\s+\d+|First|Second|Next|Finally)\b', chunk, flags=re.IGNORECASE):
-            metadata['content_type'] = 'tutorial'
-        elif re.search(r'\b(Q:|A:|Question|Answer)\b', chunk, flags=re.IGNORECASE):
-            metadata['content_type'] = 'qa'
+        if _CODE_RE.search(chunk):
+            content_type = 'code'
+        elif _TUTORIAL_RE.search(chunk):
+            content_type = 'tutorial'
+        elif _QA_RE.search(chunk):
+            content_type = 'qa'
         else:
-            metadata['content_type'] = 'general'
+            content_type = 'general'
+        
+        analysis = {
+            'chunk_length': len(chunk),
+            'word_count': len(chunk.split()),
+            'sentence_count': len(_SENTENCE_END_RE.findall(chunk)),
+            'content_type': content_type
+        }
         
         # Extract potential topics (simple keyword extraction)
-        technical_keywords = re.findall(
-            r'\b(API|database|server|client|authentication|security|performance|optimization|algorithm|data|model|framework|library|service|architecture|design|pattern|testing|deployment|development|programming|software|technology|system|network|web|mobile|cloud|docker|kubernetes|python|javascript|react|node|sql|nosql|rest|graphql|microservice|ai|ml|machine learning|artificial intelligence)\b',
-            chunk.lower()
-        )
+        technical_keywords = _extract_topics(chunk)
         
         if technical_keywords:
-            metadata['topics'] = list(set(technical_keywords[:10]))  # Top 10 unique topics
+            analysis['topics'] = technical_keywords
         
-        return metadata
+        return analysis
+    
+    def iter_content_chunks(
+        self,
+        content: str,
+        source_url: str,
+        title: str,
+        metadata: Dict[str, Any],
+        seen: Optional[Set[int]] = None
+    ) -> Iterator[ProcessedChunk]:
+        """
+        Yield processed chunks of scraped content one at a time
+        
+        Each chunk is filtered and analyzed only when the consumer asks for
+        it, so no second list of processed chunks is built alongside the
+        splitter output. Errors propagate to the consumer.
+        
+        Args:
+            content: Raw text content
+            source_url: Source URL
+            title: Page title
+            metadata: Additional metadata
+            seen: Hashes of chunks already produced; pass the same set across
+                pages to drop boilerplate repeated between them (updated in place)
+            
+        Yields:
+            Processed chunks in document order
+        """
+        if not content or not content.strip():
+            logger.warning(f"Empty content for URL: {source_url}")
+            return
+        
+        # Clean the content
+        cleaned_content = self._clean_text(content)
+        
+        if not cleaned_content:
+            logger.warning(f"No content remaining after cleaning for URL: {source_url}")
+            return
+        
+        # Split into chunks
+        chunks = self.text_splitter.split_text(cleaned_content)
+        del cleaned_content
+        
+        # Process and filter chunks
+        if seen is None:
+            seen = set()
+        processing_timestamp = metadata.get('scrape_timestamp')
+        for i, chunk in enumerate(chunks):
+            # Chunks are slices of the cleaned document, so only their edges need trimming
+            cleaned_chunk = chunk.strip()
+            
+            # Filter out low-quality chunks
+            if not self._filter_chunk(cleaned_chunk):
+                continue
+            
+            # Skip chunks already produced, so they are not embedded twice
+            chunk_hash = content_hash(cleaned_chunk)
+            if chunk_hash in seen:
+                continue
+            seen.add(chunk_hash)
+            
+            # Create processed chunk, merging base and chunk metadata once
+            yield ProcessedChunk(
+                text=cleaned_chunk,
+                source_url=source_url,
+                title=title,
+                chunk_index=i,
+                metadata={
+                    **metadata,
+                    **self._analyze_chunk(cleaned_chunk),
+                    'processing_timestamp': processing_timestamp
+                }
+            )
     
     def process_content(
         self,
         content: str,
         source_url: str,
         title: str,
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        seen: Optional[Set[int]] = None
     ) -> List[ProcessedChunk]:
         """
         Process scraped content into chunks suitable for RAG
         
+        Collects iter_content_chunks into a list, for callers that need all
+        chunks at once (results sent back from the process pool).
+        
         Args:
             content: Raw text content
             source_url: Source URL
             title: Page title
             metadata: Additional metadata
+            seen: Hashes of chunks already produced; pass the same set across
+                pages to drop boilerplate repeated between them (updated in place)
             
         Returns:
             List of processed chunks
         """
         try:
-            if not content or not content.strip():
-                logger.warning(f"Empty content for URL: {source_url}")
-                return []
-            
-            # Clean the content
-            cleaned_content = self._clean_text(content)
-            
-            if not cleaned_content:
-                logger.warning(f"No content remaining after cleaning for URL: {source_url}")
-                return []
-            
-            # Split into chunks
-            chunks = self.text_splitter.split_text(cleaned_content)
-            
-            # Process and filter chunks
-            processed_chunks = []
-            for i, chunk in enumerate(chunks):
-                # Clean individual chunk
-                cleaned_chunk = self._clean_text(chunk)
-                
-                # Filter out low-quality chunks
-                if not self._filter_chunk(cleaned_chunk):
-                    continue
-                
-                # Enhance metadata
-                enhanced_metadata = self._enhance_chunk_metadata(cleaned_chunk, metadata)
-                enhanced_metadata['processing_timestamp'] = metadata.get('scrape_timestamp')
-                
-                # Create processed chunk
-                processed_chunk = ProcessedChunk(
-                    text=cleaned_chunk,
-                    source_url=source_url,
-                    title=title,
-                    chunk_index=i,
-                    metadata=enhanced_metadata
-                )
-                
-                processed_chunks.append(processed_chunk)
-            
-            logger.info(f"Processed {len(processed_chunks)} chunks from {source_url}")
-            return processed_chunks
-            
+            processed_chunks = list(self.iter_content_chunks(content, source_url, title, metadata, seen))
         except Exception as e:
             logger.error(f"Error processing content from {source_url}: {e}")
             return []
+        
+        if processed_chunks:
+            logger.info(f"Processed {len(processed_chunks)} chunks from {source_url}")
+        return processed_chunks
     
     def process_multiple_contents(
         self,
@@ -244,6 +394,9 @@ class ContentProcessor:
         """
         Process multiple scraped contents
         
+        Contents are chunked in parallel in the shared process pool. Chunks
+        repeated across contents (navigation, footers) are kept once.
+        
         Args:
             contents: List of content dictionaries with keys: content, source_url, title, metadata
             
@@ -251,23 +404,41 @@ class ContentProcessor:
             List of all processed chunks
         """
         all_chunks = []
+        seen: Set[int] = set()
         
-        for content_data in contents:
+        if len(contents) > 1:
             try:
-                chunks = self.process_content(
-                    content=content_data.get('content', ''),
-                    source_url=content_data.get('source_url', ''),
-                    title=content_data.get('title', ''),
-                    metadata=content_data.get('metadata', {})
-                )
-                all_chunks.extend(chunks)
+                results = list(get_process_pool().map(self._process_one, contents, chunksize=4))
             except Exception as e:
-                logger.error(f"Error processing content: {e}")
-                continue
+                logger.error(f"Error in process pool, chunking serially: {e}")
+                results = [self._process_one(content_data) for content_data in contents]
+        else:
+            results = [self._process_one(content_data) for content_data in contents]
+        
+        for chunks in results:
+            for chunk in chunks:
+                chunk_hash = content_hash(chunk.text)
+                if chunk_hash not in seen:
+                    seen.add(chunk_hash)
+                    all_chunks.append(chunk)
         
         logger.info(f"Processed total of {len(all_chunks)} chunks from {len(contents)} sources")
         return all_chunks
 
+    
+    def _process_one(self, content_data: Dict[str, Any]) -> List[ProcessedChunk]:
+        """Process one content dictionary; runs in a pool worker"""
+        try:
+            return self.process_content(
+                content=content_data.get('content', ''),
+                source_url=content_data.get('source_url', ''),
+                title=content_data.get('title', ''),
+                metadata=content_data.get('metadata', {})
+            )
+        except Exception as e:
+            logger.error(f"Error processing content: {e}")
+            return []
+
 
 # Global processor instance
 content_processor = ContentProcessor()
\ No newline at end of file
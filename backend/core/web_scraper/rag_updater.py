@@ -3,12 +3,22 @@ RAG Updater for AURAX Web Scraper
 Integrates web scraping with the RAG knowledge base
 """
 
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any, List, Optional
-from .scraper import WebScraper, get_scraper
-from .processor import ContentProcessor, content_processor
-from ..rag import retriever
+from typing import AsyncIterator, Dict, Any, List, Optional, Set, Tuple
+import numpy as np
+from config.settings import settings
+from .scraper import WebScraper, ScrapedContent, get_scraper, web_scraper
+from .processor import (
+    ContentProcessor,
+    content_processor,
+    content_hash,
+    get_process_pool,
+    PROCESS_POOL_WORKERS
+)
+from ..rag import qdrant_client, retriever
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +36,9 @@ class RAGUpdater:
     async def scrape_and_update_knowledge_base(
         self, 
         url: str,
-        custom_metadata: Optional[Dict[str, Any]] = None
+        custom_metadata: Optional[Dict[str, Any]] = None,
+        scraper: Optional[WebScraper] = None,
+        force_refresh: bool = False
     ) -> Dict[str, Any]:
         """
         Scrape a URL and update the RAG knowledge base
@@ -34,6 +46,8 @@ class RAGUpdater:
         Args:
             url: URL to scrape
             custom_metadata: Additional metadata to include
+            scraper: Started scraper to reuse; defaults to the app's shared scraper
+            force_refresh: Scrape the page again even if a cached scrape exists
             
         Returns:
             Dictionary with operation results
@@ -44,68 +58,22 @@ class RAGUpdater:
             logger.info(f"Starting scrape and update process for URL: {url}")
             
             # Step 1: Scrape the URL
-            async with await get_scraper() as scraper:
-                scraped_result = await scraper.scrape_url(url)
-            
-            if not scraped_result.success:
-                return {
-                    "success": False,
-                    "url": url,
-                    "error": f"Scraping failed: {scraped_result.error}",
-                    "timestamp": scrape_timestamp
-                }
-            
-            if not scraped_result.content:
-                return {
-                    "success": False,
-                    "url": url,
-                    "error": "No content extracted from URL",
-                    "timestamp": scrape_timestamp
-                }
+            if scraper is not None:
+                scraped_result = await scraper.scrape_url(url, force_refresh=force_refresh)
+            else:
+                async with self._scraper_session() as scraper:
+                    scraped_result = await scraper.scrape_url(url, force_refresh=force_refresh)
             
-            # Step 2: Process the scraped content
-            logger.info(f"Processing scraped content from {url}")
+            error = self._scrape_error(scraped_result)
+            if error:
+                return self._failure_result(url, error, scrape_timestamp)
             
-            # Prepare metadata
-            base_metadata = scraped_result.metadata.copy()
-            base_metadata.update({
-                "scrape_timestamp": scrape_timestamp,
-                "content_length": len(scraped_result.content),
-                "scraper_version": "1.0"
-            })
-            
-            if custom_metadata:
-                base_metadata.update(custom_metadata)
-            
-            # Process content into chunks
-            processed_chunks = self.processor.process_content(
-                content=scraped_result.content,
-                source_url=scraped_result.url,
-                title=scraped_result.title,
-                metadata=base_metadata
+            # Steps 2-3: Process the scraped content into RAG documents
+            base_metadata, documents = await self._prepare_documents(
+                scraped_result, scrape_timestamp, custom_metadata
             )
-            
-            if not processed_chunks:
-                return {
-                    "success": False,
-                    "url": url,
-                    "error": "No valid chunks produced from content",
-                    "timestamp": scrape_timestamp
-                }
-            
-            # Step 3: Prepare documents for RAG
-            logger.info(f"Preparing {len(processed_chunks)} chunks for RAG insertion")
-            
-            documents = []
-            for chunk in processed_chunks:
-                doc = {
-                    "text": chunk.text,
-                    "source_url": chunk.source_url,
-                    "title": chunk.title,
-                    "chunk_index": chunk.chunk_index,
-                    **chunk.metadata
-                }
-                documents.append(doc)
+            if not documents:
+                return self._failure_result(url, "No valid chunks produced from content", scrape_timestamp)
             
             # Step 4: Add to RAG knowledge base
             logger.info(f"Adding {len(documents)} documents to RAG knowledge base")
@@ -113,42 +81,138 @@ class RAGUpdater:
             rag_success = await self.retriever.add_documents_to_knowledge_base(documents)
             
             if not rag_success:
-                return {
-                    "success": False,
-                    "url": url,
-                    "error": "Failed to add documents to RAG knowledge base",
-                    "timestamp": scrape_timestamp,
-                    "chunks_processed": len(processed_chunks)
-                }
+                return self._failure_result(
+                    url,
+                    "Failed to add documents to RAG knowledge base",
+                    scrape_timestamp,
+                    chunks_processed=len(documents)
+                )
             
             # Step 5: Return success result
-            result = {
-                "success": True,
-                "url": url,
-                "title": scraped_result.title,
-                "timestamp": scrape_timestamp,
-                "content_length": len(scraped_result.content),
-                "chunks_created": len(processed_chunks),
-                "chunks_added_to_rag": len(documents),
-                "metadata": {
-                    "content_type": base_metadata.get("content_type", "unknown"),
-                    "language": base_metadata.get("language"),
-                    "description": base_metadata.get("description"),
-                    "topics": base_metadata.get("topics", [])
-                }
-            }
-            
             logger.info(f"Successfully completed scrape and update for {url}: {len(documents)} chunks added")
-            return result
+            return self._success_result(url, scraped_result, scrape_timestamp, base_metadata, len(documents))
             
         except Exception as e:
             logger.error(f"Error in scrape_and_update_knowledge_base for {url}: {e}")
-            return {
-                "success": False,
-                "url": url,
-                "error": f"Internal error: {str(e)}",
-                "timestamp": scrape_timestamp
+            return self._failure_result(url, f"Internal error: {str(e)}", scrape_timestamp)
+    
+    @asynccontextmanager
+    async def _scraper_session(self) -> AsyncIterator[WebScraper]:
+        """Yield the shared scraper, or a temporary one if it has not been started"""
+        if web_scraper.is_running:
+            yield web_scraper
+        else:
+            async with await get_scraper() as scraper:
+                yield scraper
+    
+    def _scrape_error(self, scraped_result: ScrapedContent) -> Optional[str]:
+        """Return why a scrape result cannot be indexed, or None if it can"""
+        if not scraped_result.success:
+            return f"Scraping failed: {scraped_result.error}"
+        if not scraped_result.content:
+            return "No content extracted from URL"
+        return None
+    
+    async def _prepare_documents(
+        self,
+        scraped_result: ScrapedContent,
+        scrape_timestamp: str,
+        custom_metadata: Optional[Dict[str, Any]] = None,
+        seen: Optional[Set[int]] = None
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Chunk scraped content into documents for the knowledge base
+        
+        The CPU-bound chunking runs in the processor's process pool.
+        
+        Args:
+            scraped_result: Successful scrape result
+            scrape_timestamp: ISO timestamp of the scrape
+            custom_metadata: Additional metadata to include
+            seen: Hashes of chunks already queued in this batch, to skip duplicates
+            
+        Returns:
+            Tuple of (base metadata, documents ready for the retriever)
+        """
+        logger.info(f"Processing scraped content from {scraped_result.url}")
+        
+        # Prepare metadata
+        base_metadata = scraped_result.metadata.copy()
+        base_metadata.update({
+            "scrape_timestamp": scrape_timestamp,
+            "content_length": len(scraped_result.content),
+            "scraper_version": "1.0"
+        })
+        
+        if custom_metadata:
+            base_metadata.update(custom_metadata)
+        
+        # Process content into chunks
+        processed_chunks = await asyncio.get_running_loop().run_in_executor(
+            get_process_pool(),
+            self.processor.process_content,
+            scraped_result.content,
+            scraped_result.url,
+            scraped_result.title,
+            base_metadata
+        )
+        
+        # Cross-page duplicates are dropped here, where the batch's hashes live
+        if seen is not None:
+            unique_chunks = []
+            for chunk in processed_chunks:
+                chunk_hash = content_hash(chunk.text)
+                if chunk_hash not in seen:
+                    seen.add(chunk_hash)
+                    unique_chunks.append(chunk)
+            processed_chunks = unique_chunks
+        
+        documents = [
+            {
+                "text": chunk.text,
+                "source_url": chunk.source_url,
+                "title": chunk.title,
+                "chunk_index": chunk.chunk_index,
+                **chunk.metadata
             }
+            for chunk in processed_chunks
+        ]
+        return base_metadata, documents
+    
+    def _success_result(
+        self,
+        url: str,
+        scraped_result: ScrapedContent,
+        scrape_timestamp: str,
+        base_metadata: Dict[str, Any],
+        chunk_count: int
+    ) -> Dict[str, Any]:
+        """Build the result for a URL whose chunks were added to the knowledge base"""
+        return {
+            "success": True,
+            "url": url,
+            "title": scraped_result.title,
+            "timestamp": scrape_timestamp,
+            "content_length": len(scraped_result.content),
+            "chunks_created": chunk_count,
+            "chunks_added_to_rag": chunk_count,
+            "metadata": {
+                "content_type": base_metadata.get("content_type", "unknown"),
+                "language": base_metadata.get("language"),
+                "description": base_metadata.get("description"),
+                "topics": base_metadata.get("topics", [])
+            }
+        }
+    
+    def _failure_result(self, url: str, error: str, timestamp: str, **extra) -> Dict[str, Any]:
+        """Build the result for a URL that could not be added"""
+        return {
+            "success": False,
+            "url": url,
+            "error": error,
+            "timestamp": timestamp,
+            **extra
+        }
     
     async def scrape_multiple_urls(
         self, 
@@ -158,6 +222,16 @@ class RAGUpdater:
         """
         Scrape multiple URLs and update the RAG knowledge base
         
+        Runs as a pipeline of bounded queues so the stages overlap: up to
+        settings.scrape_max_concurrency pages of one shared browser are
+        scraped at once, each worker in its own browser context;
+        PROCESS_POOL_WORKERS chunk content in processes; and a single embed
+        worker encodes chunks from several URLs in batches of
+        settings.scrape_embed_batch_size. Embedded chunks are written to Qdrant
+        in batches of settings.scrape_upsert_batch_size, or sooner once a
+        partial batch has waited settings.scrape_upsert_max_wait seconds.
+        Chunks repeated across URLs of the batch are embedded only once.
+        
         Args:
             urls: List of URLs to scrape
             custom_metadata: Additional metadata to include for all URLs
@@ -166,38 +240,173 @@ class RAGUpdater:
             Dictionary with batch operation results
         """
         batch_timestamp = datetime.utcnow().isoformat()
-        results = []
-        total_chunks = 0
-        successful_urls = 0
+        results: List[Optional[Dict[str, Any]]] = [None] * len(urls)
+        concurrency = max(1, settings.scrape_max_concurrency)
+        pending = iter(enumerate(urls))
+        process_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        seen_chunks: Set[int] = set()
+        
+        async def scrape_worker(scraper: WebScraper):
+            # Each worker keeps one browser context for all of its pages
+            try:
+                context = await scraper.new_context()
+            except Exception as e:
+                logger.error(f"Error opening browser context, using the default one: {e}")
+                context = None
+            try:
+                await scrape_pending(scraper, context)
+            finally:
+                if context is not None:
+                    await scraper.release_context(context)
+        
+        async def scrape_pending(scraper: WebScraper, context):
+            for index, url in pending:
+                timestamp = datetime.utcnow().isoformat()
+                try:
+                    scraped_result = await scraper.scrape_url(url, context)
+                except Exception as e:
+                    logger.error(f"Error processing URL {url}: {e}")
+                    results[index] = self._failure_result(url, str(e), timestamp)
+                    continue
+                
+                error = self._scrape_error(scraped_result)
+                if error:
+                    results[index] = self._failure_result(url, error, timestamp)
+                    continue
+                await process_queue.put((index, url, timestamp, scraped_result))
+        
+        async def process_worker():
+            while (item := await process_queue.get()) is not None:
+                index, url, timestamp, scraped_result = item
+                try:
+                    base_metadata, documents = await self._prepare_documents(
+                        scraped_result, timestamp, custom_metadata, seen_chunks
+                    )
+                except Exception as e:
+                    logger.error(f"Error processing content from {url}: {e}")
+                    results[index] = self._failure_result(url, f"Internal error: {str(e)}", timestamp)
+                    continue
+                
+                if not documents:
+                    results[index] = self._failure_result(url, "No valid chunks produced from content", timestamp)
+                    continue
+                results[index] = self._success_result(url, scraped_result, timestamp, base_metadata, len(documents))
+                await embed_queue.put((index, documents))
+        
+        def fail(owners: List[Tuple[int, int]]):
+            for index, count in owners:
+                results[index] = self._failure_result(
+                    urls[index],
+                    "Failed to add documents to RAG knowledge base",
+                    results[index]["timestamp"],
+                    chunks_processed=count
+                )
+        
+        async def embed_worker():
+            loop = asyncio.get_running_loop()
+            # Chunks waiting to be embedded, and embedded chunks waiting to be written
+            to_embed: List[Dict[str, Any]] = []
+            embed_owners: List[Tuple[int, int]] = []
+            to_store: List[Dict[str, Any]] = []
+            store_vectors: List[np.ndarray] = []
+            store_owners: List[Tuple[int, int]] = []
+            store_since = 0.0
+            
+            async def embed():
+                nonlocal to_embed, embed_owners, store_since
+                try:
+                    documents, embeddings = await self.retriever.embed_documents(to_embed)
+                except Exception as e:
+                    logger.error(f"Error embedding scraped documents: {e}")
+                    documents, embeddings = [], None
+                
+                if embeddings is None:
+                    fail(embed_owners)
+                else:
+                    if not to_store:
+                        store_since = loop.time()
+                    to_store.extend(documents)
+                    store_vectors.append(embeddings)
+                    store_owners.extend(embed_owners)
+                to_embed, embed_owners = [], []
+            
+            async def store():
+                nonlocal to_store, store_vectors, store_owners
+                logger.info(f"Adding {len(to_store)} documents from {len(store_owners)} URLs to RAG knowledge base")
+                try:
+                    success = await self.retriever.store_documents(
+                        to_store, np.vstack(store_vectors), ensure_collection=False
+                    )
+                except Exception as e:
+                    logger.error(f"Error adding documents to knowledge base: {e}")
+                    success = False
+                if not success:
+                    fail(store_owners)
+                to_store, store_vectors, store_owners = [], [], []
+            
+            while True:
+                timeout = None
+                if to_store:
+                    timeout = max(0.0, store_since + settings.scrape_upsert_max_wait - loop.time())
+                try:
+                    item = await asyncio.wait_for(embed_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    await store()
+                    continue
+                
+                if item is not None:
+                    index, url_documents = item
+                    to_embed.extend(url_documents)
+                    embed_owners.append((index, len(url_documents)))
+                    if len(to_embed) < settings.scrape_embed_batch_size:
+                        continue
+                if to_embed:
+                    await embed()
+                if to_store and (
+                    item is None
+                    or len(to_store) >= settings.scrape_upsert_batch_size
+                    or loop.time() - store_since >= settings.scrape_upsert_max_wait
+                ):
+                    await store()
+                if item is None:
+                    return
         
         try:
             logger.info(f"Starting batch scrape for {len(urls)} URLs")
             
-            for url in urls:
+            # Checked once here instead of before every write
+            if not await qdrant_client.ensure_collection_exists():
+                raise RuntimeError("Failed to ensure Qdrant collection exists")
+            
+            async with self._scraper_session() as scraper:
+                process_tasks = [asyncio.create_task(process_worker()) for _ in range(PROCESS_POOL_WORKERS)]
+                embed_task = asyncio.create_task(embed_worker())
                 try:
-                    result = await self.scrape_and_update_knowledge_base(url, custom_metadata)
-                    results.append(result)
-                    
-                    if result["success"]:
-                        successful_urls += 1
-                        total_chunks += result.get("chunks_added_to_rag", 0)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing URL {url}: {e}")
-                    results.append({
-                        "success": False,
-                        "url": url,
-                        "error": str(e),
-                        "timestamp": batch_timestamp
-                    })
+                    await asyncio.gather(*(scrape_worker(scraper) for _ in range(concurrency)))
+                    for _ in process_tasks:
+                        await process_queue.put(None)
+                    await asyncio.gather(*process_tasks)
+                    await embed_queue.put(None)
+                    await embed_task
+                finally:
+                    for task in (*process_tasks, embed_task):
+                        task.cancel()
+            
+            results = [
+                result if result is not None
+                else self._failure_result(urls[index], "Not processed", batch_timestamp)
+                for index, result in enumerate(results)
+            ]
+            successful = [result for result in results if result["success"]]
             
             return {
                 "success": True,
                 "batch_timestamp": batch_timestamp,
                 "total_urls": len(urls),
-                "successful_urls": successful_urls,
-                "failed_urls": len(urls) - successful_urls,
-                "total_chunks_added": total_chunks,
+                "successful_urls": len(successful),
+                "failed_urls": len(urls) - len(successful),
+                "total_chunks_added": sum(result.get("chunks_added_to_rag", 0) for result in successful),
                 "results": results
             }
             
@@ -207,7 +416,7 @@ class RAGUpdater:
                 "success": False,
                 "batch_timestamp": batch_timestamp,
                 "error": str(e),
-                "results": results
+                "results": [result for result in results if result is not None]
             }
     
     async def get_scraping_statistics(self) -> Dict[str, Any]:
@@ -253,7 +462,8 @@ rag_updater = RAGUpdater()
 # Convenience function for direct usage
 async def scrape_and_update_knowledge_base(
     url: str,
-    custom_metadata: Optional[Dict[str, Any]] = None
+    custom_metadata: Optional[Dict[str, Any]] = None,
+    force_refresh: bool = False
 ) -> Dict[str, Any]:
     """
     Convenience function to scrape a URL and update the knowledge base
@@ -261,8 +471,11 @@ async def scrape_and_update_knowledge_base(
     Args:
         url: URL to scrape
         custom_metadata: Additional metadata to include
+        force_refresh: Scrape the page again even if a cached scrape exists
         
     Returns:
         Dictionary with operation results
     """
-    return await rag_updater.scrape_and_update_knowledge_base(url, custom_metadata)
\ No newline at end of file
+    return await rag_updater.scrape_and_update_knowledge_base(
+        url, custom_metadata, force_refresh=force_refresh
+    )
\ No newline at end of file
@@ -3,16 +3,149 @@ Web Scraper using Playwright for AURAX
 """
 
 import asyncio
+import hashlib
 import logging
 import re
-from typing import Optional, Dict, Any
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Optional, Dict, Any, List
 from urllib.parse import urlparse
-from playwright.async_api import async_playwright, Browser, Page
+import diskcache
+import httpx
+import lxml.html
+from playwright.async_api import (
+    async_playwright,
+    Browser,
+    BrowserContext,
+    Page,
+    Route,
+    TimeoutError as PlaywrightTimeoutError
+)
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 import trafilatura
+from config.settings import settings
+from .processor import get_process_pool
 
 logger = logging.getLogger(__name__)
 
+USER_AGENT = 'AURAX-Bot/1.0 (Autonomous Research Assistant)'
+
+# Static pages whose plain-GET extraction yields less text than this are
+# assumed to need JavaScript and are loaded in the browser instead
+STATIC_MIN_CHARS = 500
+
+# Loopback and private-network hosts: localhost and any subdomain of it, or
+# an address prefix anchored to the start of the hostname
+_DANGEROUS_HOST_RE = re.compile(
+    r'\A(?:'
+    + '|'.join((
+        r'(?:[^.]+\.)*localhost\Z',
+        r'127\.0\.0\.1',
+        r'0\.0\.0\.0',
+        r'192\.168\.',
+        r'10\.',
+        r'172\.(?:1[6-9]|2[0-9]|3[0-1])\.',
+    ))
+    + r')'
+)
+
+# Above this size, script and style blocks are cut out before extraction so
+# trafilatura's tree pruning has less to walk
+LARGE_HTML_CHARS = 500_000
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+
+# Upper bound on waiting for dynamic content after the DOM has loaded
+NETWORK_IDLE_TIMEOUT_MS = 5000
+
+# Shells of client-rendered apps: an empty mount point or a "JavaScript required" notice
+_SPA_MARKERS_RE = re.compile(
+    r'<div\s+id=["\'](?:root|app|__next)["\']\s*>\s*</div>'
+    r'|<noscript>[^<]*(?:enable|requires?)\s+javascript',
+    re.IGNORECASE
+)
+
+# Requests that only matter for rendering or tracking, never for the extracted text
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'media', 'stylesheet'})
+BLOCKED_HOSTS = ('google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'facebook.net')
+
+# Page metadata gathered in a single round-trip; optional fields are only
+# set when their element exists, and attributes are returned unresolved
+_PAGE_METADATA_JS = """() => {
+    const metadata = {title: document.title};
+    const attribute = (selector, name) => {
+        const element = document.querySelector(selector);
+        return element ? element.getAttribute(name) : undefined;
+    };
+    const description = attribute('meta[name="description"]', 'content');
+    if (description !== undefined) metadata.description = description;
+    const keywords = attribute('meta[name="keywords"]', 'content');
+    if (keywords !== undefined) metadata.keywords = keywords;
+    metadata.language = document.documentElement.getAttribute('lang');
+    const canonical = attribute('link[rel="canonical"]', 'href');
+    if (canonical !== undefined) metadata.canonical_url = canonical;
+    return metadata;
+}"""
+
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor'
+]
+
+
+class UnsafeRedirectError(Exception):
+    """A static fetch was redirected to an invalid, loopback or private-network URL"""
+
+
+def is_blocked_host(host: Optional[str]) -> bool:
+    """Whether a hostname is loopback or on a private network"""
+    host = (host or '').lower()
+    # A fully qualified "localhost." resolves like "localhost"
+    if host.endswith('.'):
+        host = host[:-1]
+    return bool(_DANGEROUS_HOST_RE.match(host))
+
+
+@lru_cache(maxsize=4096)
+def _url_verdict(url: str) -> str:
+    """
+    Classify a URL as "ok", "invalid" or "blocked"
+    
+    Kept free of side effects so results can be cached; batches often
+    repeat URLs and hosts, and redirects are checked again after fetching.
+    """
+    parsed = urlparse(url)
+    if not parsed.scheme or not parsed.netloc:
+        return "invalid"
+    
+    # Basic security checks
+    if parsed.scheme not in ['http', 'https']:
+        return "invalid"
+    
+    # Block potentially dangerous domains (hostname drops any credentials and port)
+    if is_blocked_host(parsed.hostname):
+        return "blocked"
+    
+    return "ok"
+
+
+def _extract_text(html: str, url: str) -> Optional[str]:
+    """Run trafilatura's fast extractor, stripping scripts and styles from large pages first"""
+    if len(html) > LARGE_HTML_CHARS:
+        html = _SCRIPT_STYLE_RE.sub('', html)
+    return trafilatura.extract(
+        html,
+        url=url,
+        include_comments=False,
+        include_tables=True,
+        include_formatting=False,
+        output_format="txt",
+        no_fallback=True
+    )
+
 
 class ScrapedContent(BaseModel):
     """Model for scraped web content"""
@@ -29,18 +162,46 @@ class WebScraper:
     Web scraper using Playwright for robust web content extraction
     """
     
-    def __init__(self, headless: bool = True, timeout: int = 30000):
+    def __init__(
+        self,
+        headless: bool = True,
+        timeout: int = 30000,
+        max_concurrency: int = 8,
+        user_data_dir: Optional[str] = None,
+        block_resources: bool = True,
+        cache_dir: Optional[str] = None,
+        cache_ttl: int = 21600
+    ):
         """
         Initialize the web scraper
         
         Args:
             headless: Run browser in headless mode
             timeout: Page load timeout in milliseconds
+            max_concurrency: Maximum number of pages open at once
+            user_data_dir: Chromium profile directory; when set, all pages share
+                one persistent context whose HTTP and code caches survive
+                restarts. A profile can only be used by one browser at a time.
+            block_resources: Abort images, fonts, media, stylesheets and
+                analytics requests; disable for sites whose scripts need CSS
+            cache_dir: Directory of the on-disk cache of successful scrapes;
+                caching is disabled if None
+            cache_ttl: Seconds a cached scrape is served before the URL is
+                fetched again
         """
         self.headless = headless
         self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.user_data_dir = user_data_dir
+        self.block_resources = block_resources
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self._cache: Optional[diskcache.Cache] = None
         self.browser: Optional[Browser] = None
+        self._persistent_context: Optional[BrowserContext] = None
         self._playwright = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
     
     async def __aenter__(self):
         """Async context manager entry"""
@@ -51,20 +212,39 @@ class WebScraper:
         """Async context manager exit"""
         await self.close()
     
+    @property
+    def is_running(self) -> bool:
+        """Whether the browser has been started and not closed"""
+        return self.browser is not None or self._persistent_context is not None
+    
     async def start(self):
         """Start the browser"""
+        if self.is_running:
+            return
         try:
-            self._playwright = await async_playwright().start()
-            self.browser = await self._playwright.chromium.launch(
-                headless=self.headless,
-                args=[
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                    '--disable-web-security',
-                    '--disable-features=VizDisplayCompositor'
-                ]
+            self._http = httpx.AsyncClient(
+                http2=True,
+                timeout=10.0,
+                follow_redirects=True,
+                headers={'User-Agent': USER_AGENT},
+                event_hooks={'request': [self._check_redirect]}
             )
+            self._playwright = await async_playwright().start()
+            if self.user_data_dir:
+                # Ephemeral contexts start with an empty disk cache; a persistent
+                # profile keeps CSS/JS/fonts cached for repeat domains
+                self._persistent_context = await self._playwright.chromium.launch_persistent_context(
+                    self.user_data_dir,
+                    headless=self.headless,
+                    args=CHROMIUM_ARGS,
+                    user_agent=USER_AGENT
+                )
+                await self._install_routes(self._persistent_context)
+            else:
+                self.browser = await self._playwright.chromium.launch(
+                    headless=self.headless,
+                    args=CHROMIUM_ARGS
+                )
             logger.info("Browser started successfully")
         except Exception as e:
             logger.error(f"Failed to start browser: {e}")
@@ -73,13 +253,71 @@ class WebScraper:
     async def close(self):
         """Close the browser and cleanup"""
         try:
+            if self._persistent_context:
+                await self._persistent_context.close()
+                logger.info("Browser closed")
             if self.browser:
                 await self.browser.close()
                 logger.info("Browser closed")
             if self._playwright:
                 await self._playwright.stop()
+            if self._http:
+                await self._http.aclose()
+            if self._cache:
+                self._cache.close()
         except Exception as e:
             logger.error(f"Error closing browser: {e}")
+        finally:
+            self.browser = None
+            self._persistent_context = None
+            self._playwright = None
+            self._http = None
+            self._cache = None
+    
+    async def new_context(self) -> BrowserContext:
+        """
+        Open an isolated context (own cookies and cache) on the shared browser
+        
+        With a persistent profile there is a single context, which is
+        returned instead. Hand contexts back with release_context.
+        """
+        if self._persistent_context is not None:
+            return self._persistent_context
+        context = await self.browser.new_context(user_agent=USER_AGENT)
+        try:
+            await self._install_routes(context)
+        except Exception:
+            await context.close()
+            raise
+        return context
+    
+    async def _install_routes(self, context: BrowserContext):
+        """Route a context's requests through the resource filter, if enabled"""
+        if self.block_resources:
+            await context.route('**/*', self._filter_request)
+    
+    async def _filter_request(self, route: Route):
+        """Abort requests the text extraction does not need and let the rest through"""
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+            return
+        
+        host = urlparse(request.url).hostname or ''
+        if any(host == blocked or host.endswith('.' + blocked) for blocked in BLOCKED_HOSTS):
+            await route.abort()
+            return
+        
+        await route.continue_()
+    
+    async def release_context(self, context: BrowserContext):
+        """Close a context from new_context, keeping the persistent one open"""
+        if context is self._persistent_context:
+            return
+        try:
+            await context.close()
+        except Exception as e:
+            logger.error(f"Error closing browser context: {e}")
     
     def _is_valid_url(self, url: str) -> bool:
         """
@@ -92,30 +330,10 @@ class WebScraper:
             bool: True if URL is valid and safe
         """
         try:
-            parsed = urlparse(url)
-            if not parsed.scheme or not parsed.netloc:
-                return False
-            
-            # Basic security checks
-            if parsed.scheme not in ['http', 'https']:
-                return False
-            
-            # Block potentially dangerous domains
-            dangerous_patterns = [
-                r'localhost',
-                r'127\.0\.0\.1',
-                r'0\.0\.0\.0',
-                r'192\.168\.',
-                r'10\.',
-                r'172\.(1[6-9]|2[0-9]|3[0-1])\.'
-            ]
-            
-            for pattern in dangerous_patterns:
-                if re.search(pattern, parsed.netloc):
-                    logger.warning(f"Blocked potentially dangerous URL: {url}")
-                    return False
-            
-            return True
+            verdict = _url_verdict(url)
+            if verdict == "blocked":
+                logger.warning(f"Blocked potentially dangerous URL: {url}")
+            return verdict == "ok"
             
         except Exception as e:
             logger.error(f"Error validating URL {url}: {e}")
@@ -125,6 +343,13 @@ class WebScraper:
         """
         Extract main content using trafilatura
         
+        Extraction is CPU-bound and much of trafilatura's tree pruning is
+        pure Python, so it runs in the shared process pool where concurrent
+        scrapes extract on separate cores. If the pool is unavailable it
+        falls back to the threadpool. Only trafilatura's own extractor runs
+        (no readability/justext fallbacks), trading a little recall for
+        much faster extraction.
+        
         Args:
             html: Raw HTML content
             url: Source URL
@@ -133,15 +358,12 @@ class WebScraper:
             Extracted text content or None
         """
         try:
-            extracted = trafilatura.extract(
-                html,
-                url=url,
-                include_comments=False,
-                include_tables=True,
-                include_formatting=False,
-                output_format="txt"
-            )
-            return extracted
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(get_process_pool(), _extract_text, html, url)
+            except (BrokenProcessPool, RuntimeError) as e:  # Pool died or was shut down
+                logger.error(f"Error in process pool, extracting in a thread: {e}")
+                return await run_in_threadpool(_extract_text, html, url)
         except Exception as e:
             logger.error(f"Error extracting content with trafilatura: {e}")
             return None
@@ -150,54 +372,219 @@ class WebScraper:
         """
         Extract metadata from the page
         
+        Reads everything in one evaluate call rather than one browser
+        round-trip per field.
+        
         Args:
             page: Playwright page object
             
+        Returns:
+            Dictionary with page metadata
+        """
+        try:
+            return await page.evaluate(_PAGE_METADATA_JS)
+        except Exception as e:
+            logger.error(f"Error extracting metadata: {e}")
+            return {}
+    
+    async def _check_redirect(self, request: httpx.Request):
+        """Refuse each hop of a static fetch before it is sent, so redirects cannot reach internal hosts"""
+        if not self._is_valid_url(str(request.url)):
+            raise UnsafeRedirectError(str(request.url))
+    
+    async def _fetch_static(self, url: str) -> Optional[str]:
+        """
+        Fetch a page's HTML with a plain GET, without running JavaScript
+        
+        Args:
+            url: URL to fetch
+            
+        Returns:
+            HTML text, or None if the page has to go through the browser
+            
+        Raises:
+            UnsafeRedirectError: If the page redirects to an invalid or unsafe URL
+        """
+        if self._http is None:
+            return None
+        
+        try:
+            response = await self._http.get(url)
+        except httpx.HTTPError as e:
+            logger.debug(f"Static fetch failed for {url}: {e}")
+            return None
+        
+        if response.status_code >= 400 or 'html' not in response.headers.get('content-type', ''):
+            return None
+        
+        return response.text
+    
+    def _extract_static_metadata(self, html: str) -> Dict[str, Any]:
+        """
+        Extract the same metadata as _extract_page_metadata from raw HTML
+        
+        Args:
+            html: Raw HTML content
+            
         Returns:
             Dictionary with page metadata
         """
         metadata = {}
         
         try:
-            # Get page title
-            title = await page.title()
-            metadata['title'] = title
-            
-            # Get meta description
-            description_element = await page.query_selector('meta[name="description"]')
-            if description_element:
-                description = await description_element.get_attribute('content')
-                metadata['description'] = description
-            
-            # Get meta keywords
-            keywords_element = await page.query_selector('meta[name="keywords"]')
-            if keywords_element:
-                keywords = await keywords_element.get_attribute('content')
-                metadata['keywords'] = keywords
-            
-            # Get language
-            html_element = await page.query_selector('html')
-            if html_element:
-                lang = await html_element.get_attribute('lang')
-                metadata['language'] = lang
-            
-            # Get canonical URL
-            canonical_element = await page.query_selector('link[rel="canonical"]')
-            if canonical_element:
-                canonical = await canonical_element.get_attribute('href')
-                metadata['canonical_url'] = canonical
+            document = lxml.html.fromstring(html)
+            metadata['title'] = (document.findtext('.//title') or '').strip()
             
+            for key, xpath in (
+                ('description', '//meta[@name="description"]/@content'),
+                ('keywords', '//meta[@name="keywords"]/@content'),
+                ('canonical_url', '//link[@rel="canonical"]/@href'),
+            ):
+                values = document.xpath(xpath)
+                if values:
+                    metadata[key] = values[0]
+            
+            metadata['language'] = document.get('lang')
         except Exception as e:
             logger.error(f"Error extracting metadata: {e}")
         
         return metadata
     
-    async def scrape_url(self, url: str) -> ScrapedContent:
+    async def _scrape_html(self, url: str, html: str) -> Optional[ScrapedContent]:
+        """
+        Scrape a page from its HTML as served, without rendering it
+        
+        Args:
+            url: Validated URL of the page
+            html: Document HTML as returned by the server
+            
+        Returns:
+            ScrapedContent if enough text was extracted, None if the page needs rendering
+        """
+        if _SPA_MARKERS_RE.search(html):
+            return None
+        
+        extracted_content = (await self._extract_content_with_trafilatura(html, url) or "").strip()
+        if len(extracted_content) < STATIC_MIN_CHARS:
+            return None
+        
+        metadata = await run_in_threadpool(self._extract_static_metadata, html)
+        logger.info(f"Successfully scraped {url} without rendering: {len(extracted_content)} characters")
+        return ScrapedContent(
+            url=url,
+            title=metadata.get('title', ''),
+            content=extracted_content,
+            metadata=metadata,
+            success=True
+        )
+    
+    async def scrape_urls(self, urls: List[str]) -> List[ScrapedContent]:
+        """
+        Scrape several URLs concurrently on the shared browser
+        
+        Up to max_concurrency pages load at once, each slot reusing its own
+        browser context, so wall time tracks the slowest pages rather than
+        the sum of all of them.
+        
+        Args:
+            urls: URLs to scrape
+            
+        Returns:
+            ScrapedContent objects in the order of urls
+        """
+        if not urls:
+            return []
+        if not self.is_running:
+            return [await self.scrape_url(url) for url in urls]
+        
+        contexts: asyncio.Queue = asyncio.Queue()
+        opened = await asyncio.gather(
+            *(self.new_context() for _ in range(min(self.max_concurrency, len(urls)))),
+            return_exceptions=True
+        )
+        for context in opened:
+            if isinstance(context, BaseException):
+                logger.error(f"Error opening browser context: {context}")
+            else:
+                contexts.put_nowait(context)
+        if contexts.empty():
+            contexts.put_nowait(None)  # Fall back to a fresh context per page
+        
+        async def scrape(url: str) -> ScrapedContent:
+            context = await contexts.get()
+            try:
+                return await self.scrape_url(url, context)
+            finally:
+                contexts.put_nowait(context)
+        
+        try:
+            results = await asyncio.gather(*(scrape(url) for url in urls), return_exceptions=True)
+        finally:
+            for context in opened:
+                if not isinstance(context, BaseException):
+                    await self.release_context(context)
+        
+        return [
+            result if not isinstance(result, BaseException)
+            else ScrapedContent(
+                url=url,
+                title="",
+                content="",
+                metadata={},
+                success=False,
+                error=str(result)
+            )
+            for url, result in zip(urls, results)
+        ]
+    
+    def _cache_key(self, url: str) -> str:
+        """Cache key for a URL"""
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+    
+    def _get_cache(self) -> Optional[diskcache.Cache]:
+        """Return the scrape cache, opening it on first use"""
+        if self._cache is None and self.cache_dir and self.cache_ttl > 0:
+            self._cache = diskcache.Cache(self.cache_dir)
+        return self._cache
+    
+    def _get_cached(self, url: str) -> Optional[ScrapedContent]:
+        """Return the cached scrape of a URL, if it has not expired"""
+        try:
+            cache = self._get_cache()
+            cached = cache.get(self._cache_key(url)) if cache is not None else None
+            return ScrapedContent.model_validate_json(cached) if cached else None
+        except Exception as e:
+            logger.error(f"Error reading scrape cache for {url}: {e}")
+            return None
+    
+    def _set_cached(self, result: ScrapedContent):
+        """Store a successful scrape for cache_ttl seconds"""
+        try:
+            cache = self._get_cache()
+            if cache is not None:
+                cache.set(self._cache_key(result.url), result.model_dump_json(), expire=self.cache_ttl)
+        except Exception as e:
+            logger.error(f"Error writing scrape cache for {result.url}: {e}")
+    
+    async def scrape_url(
+        self,
+        url: str,
+        context: Optional[BrowserContext] = None,
+        force_refresh: bool = False
+    ) -> ScrapedContent:
         """
         Scrape content from a single URL
         
+        Successful scrapes are served from the on-disk cache for cache_ttl
+        seconds. Otherwise the page is first fetched with a plain GET; only
+        pages that yield little text or look client-rendered are loaded in
+        the browser.
+        
         Args:
             url: URL to scrape
+            context: Browser context to open the page in; a fresh context
+                is opened (and closed afterwards) if None
+            force_refresh: Skip the cache and scrape the page again
             
         Returns:
             ScrapedContent object with results
@@ -212,7 +599,13 @@ class WebScraper:
                 error="Invalid or unsafe URL"
             )
         
-        if not self.browser:
+        if not force_refresh:
+            cached = await run_in_threadpool(self._get_cached, url)
+            if cached is not None:
+                logger.info(f"Serving cached scrape of {url}")
+                return cached
+        
+        if not self.is_running:
             return ScrapedContent(
                 url=url,
                 title="",
@@ -222,16 +615,90 @@ class WebScraper:
                 error="Browser not initialized"
             )
         
+        result = await self._scrape_uncached(url, context)
+        if result.success:
+            await run_in_threadpool(self._set_cached, result)
+        return result
+    
+    async def _scrape_uncached(self, url: str, context: Optional[BrowserContext] = None) -> ScrapedContent:
+        """
+        Scrape a validated URL, statically if possible and otherwise in the browser
+        
+        Args:
+            url: URL to scrape
+            context: Browser context to open the page in; a fresh context
+                is opened (and closed afterwards) if None
+            
+        Returns:
+            ScrapedContent object with results
+        """
+        async with self._semaphore:
+            try:
+                html = await self._fetch_static(url)
+            except UnsafeRedirectError as e:
+                # The browser would follow the same redirect, so the page is not loaded there either
+                logger.warning(f"Refused redirect from {url} to {e}")
+                return ScrapedContent(
+                    url=url,
+                    title="",
+                    content="",
+                    metadata={},
+                    success=False,
+                    error="Invalid or unsafe URL"
+                )
+            if html is not None:
+                static_result = await self._scrape_html(url, html)
+                if static_result is not None:
+                    return static_result
+            
+            # The browser's copy of the raw document is only worth extracting
+            # when the plain GET could not get it (e.g. non-browser clients refused)
+            raw_first = html is None
+            
+            if context is not None:
+                return await self._scrape_page(context, url, raw_first)
+            
+            try:
+                context = await self.new_context()
+            except Exception as e:
+                logger.error(f"Error opening browser context for {url}: {e}")
+                return ScrapedContent(
+                    url=url,
+                    title="",
+                    content="",
+                    metadata={},
+                    success=False,
+                    error=str(e)
+                )
+            try:
+                return await self._scrape_page(context, url, raw_first)
+            finally:
+                await self.release_context(context)
+    
+    async def _scrape_page(self, context: BrowserContext, url: str, raw_first: bool = False) -> ScrapedContent:
+        """
+        Load a validated URL in a new page and extract its content
+        
+        Args:
+            context: Browser context to open the page in
+            url: URL to scrape
+            raw_first: Try the document response body before waiting for the
+                page to render; if it has enough text, the network-idle wait
+                and the serialization of the rendered DOM are skipped
+            
+        Returns:
+            ScrapedContent object with results
+        """
         page = None
         try:
             logger.info(f"Starting to scrape URL: {url}")
             
             # Create new page
-            page = await self.browser.new_page()
+            page = await context.new_page()
             
             # Set user agent
             await page.set_extra_http_headers({
-                'User-Agent': 'AURAX-Bot/1.0 (Autonomous Research Assistant)'
+                'User-Agent': USER_AGENT
             })
             
             # Navigate to URL
@@ -249,8 +716,21 @@ class WebScraper:
                     error=error_msg
                 )
             
-            # Wait for any dynamic content
-            await page.wait_for_timeout(2000)
+            if raw_first and 'html' in response.headers.get('content-type', ''):
+                try:
+                    raw_result = await self._scrape_html(url, await response.text())
+                except Exception as e:
+                    logger.debug(f"Could not read the document body of {url}: {e}")
+                    raw_result = None
+                if raw_result is not None:
+                    return raw_result
+            
+            # Wait for dynamic content until the network goes quiet, instead of a
+            # fixed delay; pages that keep polling are read once the cap is hit
+            try:
+                await page.wait_for_load_state('networkidle', timeout=NETWORK_IDLE_TIMEOUT_MS)
+            except PlaywrightTimeoutError:
+                logger.debug(f"Network did not go idle for {url}, extracting current content")
             
             # Extract metadata
             metadata = await self._extract_page_metadata(page)
@@ -310,7 +790,25 @@ class WebScraper:
                     logger.error(f"Error closing page: {e}")
 
 
-# Global scraper instance (use as context manager)
+# Global scraper instance, started with the app so requests skip the browser launch
+web_scraper = WebScraper(
+    headless=True,
+    timeout=30000,
+    max_concurrency=settings.scrape_max_concurrency,
+    user_data_dir=settings.scrape_user_data_dir,
+    block_resources=settings.scrape_block_resources,
+    cache_dir=settings.scrape_cache_dir,
+    cache_ttl=settings.scrape_cache_ttl
+)
+
+
 async def get_scraper() -> WebScraper:
-    """Get a configured web scraper instance"""
-    return WebScraper(headless=True, timeout=30000)
\ No newline at end of file
+    """Get a new configured web scraper instance (use as context manager)"""
+    return WebScraper(
+        headless=True,
+        timeout=30000,
+        max_concurrency=settings.scrape_max_concurrency,
+        block_resources=settings.scrape_block_resources,
+        cache_dir=settings.scrape_cache_dir,
+        cache_ttl=settings.scrape_cache_ttl
+    )
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Gunicorn configuration for running AURAX with several worker processes
+
+Usage: gunicorn -c gunicorn.conf.py main:app
+
+The app is imported once in the master and the CPU embedding model is
+loaded there before the workers are forked, so every worker shares the
+model's weight pages copy-on-write instead of loading its own copy.
+
+Every worker runs the app's startup hooks. Each one gets its own Chromium
+profile, and with several workers Stable Diffusion is not warmed at
+startup: each worker that serves an image request loads its own pipeline
+into VRAM, so run GPU image generation with WEB_CONCURRENCY=1.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+
+# Import the app in the master so the workers inherit its loaded modules and model
+preload_app = True
+
+
+def when_ready(server):
+    """
+    Load the embedding model in the master, before any worker is forked
+
+    Only loads the weights: no inference runs here, so no torch thread pools
+    exist at fork time. CUDA cannot be used across a fork, so GPU deployments
+    keep loading the model in each worker.
+    """
+    from core.rag.retriever import retriever
+    from config.settings import settings
+    import torch
+
+    device = settings.embedding_device or ("cuda" if torch.cuda.is_available() else "cpu")
+    if not device.startswith("cpu"):
+        return
+
+    try:
+        retriever.embedding_model
+        logger.info("Embedding model loaded in the master; workers share its weights")
+    except Exception as e:
+        logger.error(f"Error preloading embedding model, workers will load their own: {e}")
+
+
+def post_fork(server, worker):
+    """
+    Adjust the shared settings for one worker, before its startup hooks run
+    
+    A Chromium profile can only be held by one browser, so each worker's
+    profile directory is suffixed with its pid. Warming Stable Diffusion in
+    every worker would hold one pipeline per worker in VRAM, so it is
+    skipped when there are several workers.
+    """
+    from core.web_scraper.scraper import web_scraper
+    from config.settings import settings
+    
+    if web_scraper.user_data_dir:
+        web_scraper.user_data_dir = f"{settings.scrape_user_data_dir}-{worker.pid}"
+    if server.cfg.workers > 1:
+        settings.sd_warmup = False
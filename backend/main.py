@@ -1,30 +1,80 @@
 """
 AURAX Backend - Main Application Entry Point
+
+Endpoints are async and must never block the event loop: await async clients,
+and run any unavoidable synchronous or CPU-bound work through
+``starlette.concurrency.run_in_threadpool``.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import AnyHttpUrl, BaseModel, field_validator
+from typing import Optional, List, Dict, Any, AsyncIterator
+import asyncio
+import orjson
+import queue
 import uvicorn
 import logging
+from logging.handlers import QueueHandler, QueueListener
+from functools import lru_cache
+from prometheus_client import REGISTRY, Counter
+from prometheus_client.core import CounterMetricFamily
 from prometheus_fastapi_instrumentator import Instrumentator
+from config.settings import settings
 from core.orchestrator import orchestrator
+from core.rag.qdrant_client import qdrant_client
 from core.web_scraper import scrape_and_update_knowledge_base, rag_updater
-from core.model_router import route_request
+from core.web_scraper.processor import shutdown_process_pool
+from core.web_scraper.scraper import web_scraper, is_blocked_host
+from core.model_router import model_router, route_request_async
+
+
+class ORJSONRequest(Request):
+    """Request whose JSON body is decoded with orjson instead of the stdlib json module"""
+    
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class ORJSONRoute(APIRoute):
+    """Route that parses request bodies with orjson before Pydantic validates them"""
+    
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        
+        async def orjson_handler(request: Request):
+            return await handler(ORJSONRequest(request.scope, request.receive))
+        
+        return orjson_handler
+
 
 app = FastAPI(
     title="AURAX API",
     description="Sistema autônomo de IA para geração de aplicações completas",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
+app.router.route_class = ORJSONRoute  # Must be set before the routes below are declared
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # TODO: Configurar origens específicas em produção
+    allow_origins=settings.allowed_origins,  # ALLOWED_ORIGINS no .env
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=settings.cors_max_age,
+)
+
+# RAG context and status payloads are large, repetitive JSON
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.gzip_minimum_size,
+    compresslevel=settings.gzip_compress_level,
 )
 
 # Sprint 4: Prometheus Monitoring Setup
@@ -40,11 +90,39 @@ instrumentator = Instrumentator(
 )
 
 # Add custom metrics for AURAX
-instrumentator.add(
-    lambda info: info.modified_handler == "/generate",
-    lambda info: {"model_type": info.request.path_params.get("model", "default")}
+GENERATE_REQUESTS = Counter(
+    "aurax_generate_requests",
+    "Requests to /generate by the model type they were routed to",
+    ("model_type",)
 )
 
+
+@lru_cache(maxsize=None)
+def _generate_counter(model_type: str):
+    """Labelled GENERATE_REQUESTS child, resolved once per model type"""
+    return GENERATE_REQUESTS.labels(model_type=model_type)
+
+
+def _count_generate(model_type: Any):
+    """Count a /generate request under its resolved model type"""
+    _generate_counter(getattr(model_type, "value", model_type) or "unknown").inc()
+
+
+class RouteCacheCollector:
+    """Exports the routing decision cache's counters, read at scrape time"""
+    
+    def collect(self):
+        info = model_router.cache_info()
+        yield CounterMetricFamily(
+            "aurax_route_cache_hits", "Prompts routed from the classification cache", value=info.hits
+        )
+        yield CounterMetricFamily(
+            "aurax_route_cache_misses", "Prompts classified by the router's patterns", value=info.misses
+        )
+
+
+REGISTRY.register(RouteCacheCollector())
+
 # Initialize and expose metrics
 instrumentator.instrument(app).expose(app)
 
@@ -56,18 +134,39 @@ class GenerateRequest(BaseModel):
     model: Optional[str] = None
     context_threshold: Optional[float] = 0.5
     routing_metadata: Optional[Dict[str, Any]] = None
+    stream: bool = False  # /generate only: send the answer as NDJSON lines while it is generated
+
+
+def _reject_private_host(url: AnyHttpUrl) -> AnyHttpUrl:
+    """Refuse URLs on loopback or private-network hosts"""
+    if is_blocked_host(url.host):
+        raise ValueError("URL points to a local or private network host")
+    return url
 
 
 class ScrapeRequest(BaseModel):
     """Request model for scraping endpoint"""
-    url: str
+    url: AnyHttpUrl
     metadata: Optional[Dict[str, Any]] = None
+    force_refresh: bool = False  # Ignore any cached scrape of the URL
+    
+    @field_validator("url")
+    @classmethod
+    def _safe_url(cls, url: AnyHttpUrl) -> AnyHttpUrl:
+        return _reject_private_host(url)
 
 
 class BatchScrapeRequest(BaseModel):
     """Request model for batch scraping endpoint"""
-    urls: List[str]
+    urls: List[AnyHttpUrl]
     metadata: Optional[Dict[str, Any]] = None
+    
+    @field_validator("urls")
+    @classmethod
+    def _safe_urls(cls, urls: List[AnyHttpUrl]) -> List[AnyHttpUrl]:
+        # Drop repeated URLs (keeping order) so each page is scraped once per batch
+        unique = dict(zip(map(str, urls), urls))
+        return [_reject_private_host(url) for url in unique.values()]
 
 
 class GenerateResponse(BaseModel):
@@ -79,9 +178,76 @@ class GenerateResponse(BaseModel):
     response_type: Optional[str] = "text"  # "text", "code", "image"
     metadata: Optional[Dict[str, Any]]
     routing_info: Optional[Dict[str, Any]] = None
+    cached: bool = False  # Served from the response cache
     error: Optional[str] = None
 
 
+# Background warmup tasks, kept referenced so they are not garbage collected
+_warmup_tasks = []
+
+# Writes the root logger's records from a background thread while the app runs
+_log_listener: Optional[QueueListener] = None
+
+
+def _start_log_listener():
+    """Put the root logger's handlers behind a queue so log I/O never blocks the event loop"""
+    global _log_listener
+    root = logging.getLogger()
+    if _log_listener is not None or not root.handlers:
+        return
+    
+    handlers = root.handlers[:]
+    for handler in handlers:
+        root.removeHandler(handler)
+    
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+
+
+def _stop_log_listener():
+    """Flush queued records and give the root logger its handlers back"""
+    global _log_listener
+    if _log_listener is None:
+        return
+    
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        root.addHandler(handler)
+    _log_listener = None
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Move logging off the event loop, then warm models, retrieval and the scraper's browser in the background without delaying startup"""
+    _start_log_listener()
+    if settings.model_warmup or settings.rag_warmup:
+        _warmup_tasks.append(asyncio.create_task(orchestrator.warmup()))
+    if settings.scrape_warm_browser:
+        _warmup_tasks.append(asyncio.create_task(web_scraper.start()))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop warmups, the generation, query embedding and document write batchers, the browser and the chunking processes, close pooled connections to Ollama and Qdrant, then flush the log queue"""
+    for task in _warmup_tasks:
+        task.cancel()
+    await orchestrator.batcher.close()
+    await orchestrator.retriever.close()
+    await orchestrator.llm_client.close()
+    await orchestrator.qwen3_adapter.ollama_client.close()
+    await qdrant_client.close()
+    await web_scraper.close()
+    shutdown_process_pool()
+    _stop_log_listener()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -93,10 +259,24 @@ async def generate(request: GenerateRequest):
     """
     Multi-model RAG-enhanced generation endpoint
     Intelligently routes to appropriate models and generates contextual responses
+    With stream=true, text and code answers are sent as NDJSON lines as they are generated
     """
     if not request.prompt.strip():
         raise HTTPException(status_code=400, detail="Prompt cannot be empty")
     
+    if request.stream:
+        routing_info = {}
+        try:
+            chunks = await _start_stream(request, routing_info)
+        finally:
+            _count_generate(routing_info.get("model_type"))
+        return StreamingResponse(
+            _ndjson_lines(chunks),
+            media_type="application/x-ndjson",
+            headers=_STREAM_HEADERS
+        )
+    
+    model_type = None
     try:
         # Use orchestrator for multi-model RAG + LLM pipeline
         result = await orchestrator.generate_contextual_response(
@@ -107,27 +287,30 @@ async def generate(request: GenerateRequest):
             metadata=request.routing_metadata
         )
         
-        if not result["success"]:
+        routing_info = result.metadata.get("routing") if result.metadata else None
+        model_type = result.metadata.get("model_type") if result.metadata else None
+        if not result.success:
             # Return error response but don't raise HTTP exception
             return GenerateResponse(
                 success=False,
                 query=request.prompt,
-                context=result.get("context", []),
+                context=result.context,
                 response=None,
                 response_type="error",
                 metadata=None,
-                routing_info=result.get("metadata", {}).get("routing"),
-                error=result.get("error", "Unknown error")
+                routing_info=routing_info,
+                error=result.error or "Unknown error"
             )
         
         return GenerateResponse(
             success=True,
-            query=result["query"],
-            context=result["context"],
-            response=result["response"],
-            response_type=result.get("response_type", "text"),
-            metadata=result["metadata"],
-            routing_info=result.get("metadata", {}).get("routing")
+            query=result.query,
+            context=result.context,
+            response=result.response,
+            response_type=result.response_type,
+            metadata=result.metadata,
+            routing_info=routing_info,
+            cached=result.cached
         )
         
     except Exception as e:
@@ -142,6 +325,77 @@ async def generate(request: GenerateRequest):
             routing_info=None,
             error="Internal server error"
         )
+    finally:
+        _count_generate(model_type)
+
+
+# Marked identity so GZipMiddleware passes streams through instead of
+# buffering tokens inside the compressor
+_STREAM_HEADERS = {"Content-Encoding": "identity"}
+
+
+async def _start_stream(
+    request: GenerateRequest,
+    routing_info: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
+    """
+    Start a streamed generation and return its text chunks
+    
+    Routing and retrieval run before the first chunk, so their errors are
+    raised here as HTTP errors while the status code can still be set.
+    routing_info, if given, is filled with the model type and routing decision.
+    """
+    chunks = orchestrator.stream_contextual_response(
+        query=request.prompt,
+        max_context_docs=3,
+        context_score_threshold=request.context_threshold or 0.5,
+        model=request.model,
+        metadata=request.routing_metadata,
+        routing=routing_info
+    )
+    
+    try:
+        first_chunk = await chunks.__anext__()
+    except StopAsyncIteration:
+        first_chunk = ""
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logging.error(f"Error in generate stream endpoint: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    async def body():
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+    
+    return body()
+
+
+async def _ndjson_lines(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Frame text chunks as Ollama-style NDJSON lines, ending with a done line"""
+    async for chunk in chunks:
+        yield orjson.dumps({"response": chunk, "done": False}) + b"\n"
+    yield orjson.dumps({"response": "", "done": True}) + b"\n"
+
+
+@app.post("/generate/stream")
+async def generate_stream(request: GenerateRequest):
+    """
+    Streaming variant of /generate for text and code responses
+    Sends the answer as plain text chunks while the model produces them
+    """
+    if not request.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+    
+    chunks = await _start_stream(request)
+    return StreamingResponse(
+        chunks,
+        media_type="text/plain; charset=utf-8",
+        headers=_STREAM_HEADERS
+    )
 
 
 @app.get("/")
@@ -165,7 +419,7 @@ async def route_query(request: Dict[str, Any]):
         if not query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
         
-        route_result = route_request(query, metadata)
+        route_result = await route_request_async(query, metadata)
         
         return {
             "success": True,
@@ -212,12 +466,26 @@ async def get_rag_info():
 
 
 @app.post("/knowledge/add")
-async def add_knowledge(documents: List[Dict[str, Any]]):
-    """Add documents to the knowledge base"""
+async def add_knowledge(
+    documents: List[Dict[str, Any]],
+    background_tasks: BackgroundTasks,
+    wait: bool = True
+):
+    """
+    Add documents to the knowledge base
+    With wait=false the documents are accepted (202) and stored after the response is sent
+    """
     try:
         if not documents:
             raise HTTPException(status_code=400, detail="No documents provided")
         
+        if not wait:
+            background_tasks.add_task(orchestrator.add_knowledge, documents)
+            return ORJSONResponse(
+                status_code=202,
+                content={"success": True, "message": f"Accepted {len(documents)} documents for the knowledge base"}
+            )
+        
         result = await orchestrator.add_knowledge(documents)
         
         if result["success"]:
@@ -233,25 +501,32 @@ async def add_knowledge(documents: List[Dict[str, Any]]):
 
 
 @app.post("/scrape")
-async def scrape_url(request: ScrapeRequest):
-    """Scrape a URL and add content to the knowledge base"""
+async def scrape_url(request: ScrapeRequest, background_tasks: BackgroundTasks, wait: bool = True):
+    """
+    Scrape a URL and add content to the knowledge base
+    With wait=false the URL is accepted (202) and scraped after the response is sent
+    """
     try:
-        if not request.url.strip():
-            raise HTTPException(status_code=400, detail="URL cannot be empty")
+        # The URL was checked (http/https, public host) when the request was parsed
+        url = str(request.url)
         
-        # Validate URL format
-        if not (request.url.startswith('http://') or request.url.startswith('https://')):
-            raise HTTPException(status_code=400, detail="URL must start with http:// or https://")
+        if not wait:
+            background_tasks.add_task(
+                scrape_and_update_knowledge_base, url, request.metadata, force_refresh=request.force_refresh
+            )
+            return ORJSONResponse(status_code=202, content={"success": True, "url": url, "status": "accepted"})
         
         # Perform scraping and RAG update
-        result = await scrape_and_update_knowledge_base(request.url, request.metadata)
+        result = await scrape_and_update_knowledge_base(
+            url, request.metadata, force_refresh=request.force_refresh
+        )
         
         if result["success"]:
             return result
         else:
             return {
                 "success": False,
-                "url": request.url,
+                "url": url,
                 "error": result.get("error", "Unknown error"),
                 "timestamp": result.get("timestamp")
             }
@@ -267,23 +542,15 @@ async def scrape_url(request: ScrapeRequest):
 async def scrape_batch_urls(request: BatchScrapeRequest):
     """Scrape multiple URLs and add content to the knowledge base"""
     try:
+        # URLs were validated and de-duplicated when the request was parsed
         if not request.urls:
             raise HTTPException(status_code=400, detail="No URLs provided")
-        
         if len(request.urls) > 10:  # Limit batch size for safety
             raise HTTPException(status_code=400, detail="Maximum 10 URLs per batch")
         
-        # Validate URLs
-        for url in request.urls:
-            if not url.strip():
-                raise HTTPException(status_code=400, detail="Empty URL found in batch")
-            if not (url.startswith('http://') or url.startswith('https://')):
-                raise HTTPException(status_code=400, detail=f"Invalid URL format: {url}")
-        
-        # Perform batch scraping
-        result = await rag_updater.scrape_multiple_urls(request.urls, request.metadata)
-        
-        return result
+        return await rag_updater.scrape_multiple_urls(
+            [str(url) for url in request.urls], request.metadata
+        )
         
     except HTTPException:
         raise
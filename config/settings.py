@@ -19,15 +19,89 @@ class Settings(BaseSettings):
     qdrant_api_key: Optional[str] = None
     qdrant_collection_name: str = "aurax_knowledge_base"
     qdrant_vector_size: int = 384  # all-MiniLM-L6-v2 embedding size
-    qdrant_distance_metric: str = "Cosine"
+    qdrant_distance_metric: str = "Cosine"  # Embeddings are unit length, so Dot ranks identically for new collections
+    qdrant_prefer_grpc: bool = False  # Requires the gRPC port (6334) to be reachable
+    qdrant_max_connections: int = 100
+    qdrant_max_keepalive_connections: int = 20
+    qdrant_grpc_keepalive_ms: int = 30000  # gRPC keepalive ping interval
+    qdrant_quantization: bool = True  # int8 scalar quantization with full-precision rescoring
+    qdrant_quantization_type: str = "int8"  # int8, binary (1 bit/dim) or product (PQ, 32x smaller); new collections only
+    qdrant_quantization_rescore: bool = True  # Rescore quantized candidates with the original vectors
+    qdrant_oversampling: Optional[float] = None  # Candidates fetched per result before rescoring; None is 2 for int8, 4 for binary/product
+    qdrant_vectors_on_disk: bool = True  # Keep full-precision vectors on disk when quantization is on
+    qdrant_float16_vectors: bool = False  # Store vectors as float16 (new collections only)
+    qdrant_hnsw_ef: int = 64  # Search beam width; higher trades latency for recall
+    qdrant_search_batching: bool = False  # Coalesce concurrent searches into search_batch calls
+    qdrant_batch_max_wait_ms: float = 5.0
+    qdrant_batch_max_size: int = 16
+    qdrant_upload_batch_size: int = 256  # Points per upsert request when adding documents
+    qdrant_upload_parallel: int = 4  # Upsert requests in flight at once
+    
+    # Embedding Configuration
+    embedding_device: Optional[str] = None  # e.g. cuda, cuda:1 or cpu; None uses cuda when available
+    embedding_backend: str = "torch"  # torch or onnx (needs optimum[onnxruntime]); falls back to torch
+    embedding_onnx_file: Optional[str] = "onnx/model_qint8_avx512_vnni.onnx"  # int8 export shipped with all-MiniLM-L6-v2
+    embedding_precision: str = "fp32"  # torch backend: fp32, int8 (dynamic quantization, CPU) or fp16 (GPU)
+    embedding_batching: bool = False  # Coalesce concurrent query embeddings into one forward pass
+    embedding_batch_max_wait_ms: float = 8.0
+    embedding_batch_max_size: int = 32
+    kb_write_batching: bool = False  # Embed and upsert concurrent knowledge base writes together
+    kb_write_batch_max_wait_ms: float = 200.0
+    kb_write_batch_max_docs: int = 256
+    torch_threads: Optional[int] = None  # Intra-op CPU threads; None uses min(8, cores) unless OMP_NUM_THREADS is set
     
     # LLM Configuration
     ollama_base_url: str = "http://localhost:11434"
     default_model: str = "mistral:7b-instruct-q4_K_M"
     ollama_timeout: int = 120  # seconds
+    ollama_connect_timeout: float = 5.0  # seconds
+    ollama_http2: bool = True  # Multiplexes requests when Ollama is served over TLS
+    ollama_max_connections: int = 64
+    ollama_max_keepalive_connections: int = 32
+    ollama_coalesce_generate: bool = False  # Share one result between identical concurrent prompts
+    ollama_preload_on_query: bool = True  # Load the model in Ollama while context is retrieved
+    ollama_batching: bool = False  # Release generate requests to Ollama in short-window batches
+    ollama_batch_max_wait_ms: float = 10.0
+    ollama_batch_max_size: int = 8
+    ollama_keep_alive: str = "1h"  # How long Ollama keeps a model in memory after a request
     max_tokens: int = 2000
     temperature: float = 0.7
     
+    # Response Cache Configuration
+    response_cache_size: int = 1024  # 0 disables the response cache
+    response_cache_ttl: int = 600  # seconds
+    semantic_cache_enabled: bool = False  # Also reuse answers for near-identical queries
+    semantic_cache_size: int = 256
+    semantic_cache_threshold: float = 0.95  # Minimum cosine similarity for a semantic hit
+    status_cache_ttl: float = 5.0  # seconds to reuse Ollama and knowledge base status probes
+    
+    # Warm the default LLM, Stable Diffusion pipeline and Qwen3 Coder model in the background at startup
+    model_warmup: bool = True
+    sd_warmup: bool = True  # Include Stable Diffusion in model_warmup; otherwise it loads on the first image request
+    rag_warmup: bool = True  # Also run one embedding + Qdrant search at startup
+    
+    # Image Generation Configuration
+    sd_offload: Optional[str] = None  # none, model or sequential; None picks from free VRAM
+    sd_image_format: str = "WEBP"  # WEBP or PNG for callers that need lossless output
+    sd_image_quality: int = 90
+    sd_result_cache_size: int = 64  # Seeded results kept in memory; 0 disables the cache
+    sd_result_cache_ttl: int = 3600  # seconds
+    sd_max_images: int = 4  # Upper bound for generate_multiple_images
+    sd_max_batch: Optional[int] = None  # Images per pipeline call; None sizes it from VRAM
+    sd_max_inflight_batches: int = 2  # Chunks in flight, so encoding overlaps the next denoise
+    
+    # Web Scraping Configuration
+    scrape_warm_browser: bool = True  # Launch Chromium once at startup and share it between scrapes
+    scrape_user_data_dir: Optional[str] = ".playwright-profile"  # Persistent profile (HTTP cache) for the shared browser
+    scrape_block_resources: bool = True  # Skip images, fonts, media, CSS and analytics when loading pages
+    scrape_cache_dir: Optional[str] = ".scrape-cache"  # On-disk cache of successful scrapes (None disables)
+    scrape_cache_ttl: int = 21600  # seconds a cached scrape is reused
+    scrape_max_concurrency: int = 8  # Pages scraped at once by /scrape/batch (one shared browser)
+    scrape_embed_batch_size: int = 128  # Chunks from several URLs embedded together in batch scrapes
+    scrape_upsert_batch_size: int = 512  # Embedded chunks buffered per Qdrant write in batch scrapes
+    scrape_upsert_max_wait: float = 2.0  # seconds a partial buffer may wait before it is written
+    scrape_process_workers: Optional[int] = None  # Chunking processes (defaults to the CPU count)
+    
     # Security Configuration
     secret_key: str = "your-secret-key-change-in-production"
     access_token_expire_minutes: int = 30
@@ -38,6 +112,11 @@ class Settings(BaseSettings):
     
     # CORS Configuration
     allowed_origins: list[str] = ["http://localhost:3000", "http://localhost:8080"]
+    cors_max_age: int = 86400  # Seconds browsers may cache a preflight response
+    
+    # Response compression (gzip, for clients that accept it)
+    gzip_minimum_size: int = 1024  # Smaller responses are sent as-is
+    gzip_compress_level: int = 5
     
     class Config:
         env_file = ".env"
@@ -3,12 +3,69 @@ AURAX Sprint 4 - Load Testing with Locust
 Comprehensive load testing scenarios for AURAX backend API
 """
 
+import itertools
 import json
 import random
 from locust import HttpUser, task, between
 from typing import Dict, Any, List
 
 
+# Request payload pools, built once instead of on every task call
+TEXT_PROMPTS = (
+    "Explain quantum computing in simple terms",
+    "What are the benefits of renewable energy?",
+    "How does machine learning work?",
+    "Describe the process of photosynthesis",
+    "What is the history of artificial intelligence?",
+    "Explain blockchain technology",
+    "How do vaccines work in the human body?",
+    "What are the main causes of climate change?",
+)
+
+CODE_PROMPTS = (
+    "Write a Python function to sort a list of dictionaries by a key",
+    "Create a JavaScript function to validate email addresses",
+    "Implement a binary search algorithm in Python",
+    "Write a SQL query to find duplicate records",
+    "Create a REST API endpoint in FastAPI",
+    "Write a React component for user authentication",
+    "Implement a simple caching mechanism in Python",
+    "Create a function to calculate fibonacci numbers",
+)
+
+IMAGE_PROMPTS = (
+    "A beautiful sunset over mountains",
+    "A futuristic cityscape with flying cars",
+    "A peaceful forest with a small stream",
+    "An abstract painting with vibrant colors",
+    "A modern office workspace",
+    "A vintage car on a country road",
+    "A space station orbiting Earth",
+    "A cozy library with old books",
+)
+
+ROUTING_QUERIES = (
+    "Write a Python function",
+    "Create an image of a cat",
+    "Explain machine learning",
+    "Debug this JavaScript code",
+    "Generate a landscape photo",
+    "What is quantum physics?",
+)
+
+BURST_PROMPTS = (
+    "Hello",
+    "Test",
+    "Quick response",
+    "Fast query",
+    "Simple question",
+)
+
+# Seeds for the per-user generators: each spawned user gets the next one,
+# so a run with the same user count replays the same request sequence
+_user_seeds = itertools.count(1)
+
+
 class AuraxLoadTestUser(HttpUser):
     """
     Simulates realistic user behavior for AURAX API load testing
@@ -21,7 +78,9 @@ class AuraxLoadTestUser(HttpUser):
     host = "http://localhost:8000"
     
     def on_start(self):
-        """Initialize test user - check system health"""
+        """Initialize test user - seed its generator and check system health"""
+        self.rng = random.Random(next(_user_seeds))
+        
         with self.client.get("/health", catch_response=True) as response:
             if response.status_code != 200:
                 response.failure("Health check failed")
@@ -30,21 +89,10 @@ class AuraxLoadTestUser(HttpUser):
     def test_generate_text(self):
         """Test text generation endpoint with various prompts"""
         
-        text_prompts = [
-            "Explain quantum computing in simple terms",
-            "What are the benefits of renewable energy?",
-            "How does machine learning work?",
-            "Describe the process of photosynthesis",
-            "What is the history of artificial intelligence?",
-            "Explain blockchain technology",
-            "How do vaccines work in the human body?",
-            "What are the main causes of climate change?",
-        ]
-        
         payload = {
-            "prompt": random.choice(text_prompts),
-            "max_tokens": random.randint(500, 1500),
-            "context_threshold": round(random.uniform(0.3, 0.8), 2)
+            "prompt": self.rng.choice(TEXT_PROMPTS),
+            "max_tokens": self.rng.randint(500, 1500),
+            "context_threshold": round(self.rng.uniform(0.3, 0.8), 2)
         }
         
         with self.client.post(
@@ -68,21 +116,10 @@ class AuraxLoadTestUser(HttpUser):
     def test_generate_code(self):
         """Test code generation with programming prompts"""
         
-        code_prompts = [
-            "Write a Python function to sort a list of dictionaries by a key",
-            "Create a JavaScript function to validate email addresses",
-            "Implement a binary search algorithm in Python",
-            "Write a SQL query to find duplicate records",
-            "Create a REST API endpoint in FastAPI",
-            "Write a React component for user authentication",
-            "Implement a simple caching mechanism in Python",
-            "Create a function to calculate fibonacci numbers",
-        ]
-        
         payload = {
-            "prompt": random.choice(code_prompts),
+            "prompt": self.rng.choice(CODE_PROMPTS),
             "model": "qwen3:coder",
-            "max_tokens": random.randint(800, 2000),
+            "max_tokens": self.rng.randint(800, 2000),
             "context_threshold": 0.3,
             "routing_metadata": {"preferred_model": "code"}
         }
@@ -110,19 +147,8 @@ class AuraxLoadTestUser(HttpUser):
     def test_generate_image(self):
         """Test image generation requests"""
         
-        image_prompts = [
-            "A beautiful sunset over mountains",
-            "A futuristic cityscape with flying cars",
-            "A peaceful forest with a small stream",
-            "An abstract painting with vibrant colors",
-            "A modern office workspace",
-            "A vintage car on a country road",
-            "A space station orbiting Earth",
-            "A cozy library with old books",
-        ]
-        
         payload = {
-            "prompt": f"Create an image of: {random.choice(image_prompts)}",
+            "prompt": f"Create an image of: {self.rng.choice(IMAGE_PROMPTS)}",
             "routing_metadata": {"preferred_model": "image"}
         }
         
@@ -147,17 +173,8 @@ class AuraxLoadTestUser(HttpUser):
     def test_model_routing(self):
         """Test model routing endpoint"""
         
-        test_queries = [
-            "Write a Python function",
-            "Create an image of a cat",
-            "Explain machine learning",
-            "Debug this JavaScript code",
-            "Generate a landscape photo",
-            "What is quantum physics?",
-        ]
-        
         payload = {
-            "query": random.choice(test_queries),
+            "query": self.rng.choice(ROUTING_QUERIES),
             "metadata": {"test": True}
         }
         
@@ -247,16 +264,8 @@ class AuraxBurstUser(AuraxLoadTestUser):
     def burst_generate_requests(self):
         """Generate burst of requests to test scaling"""
         
-        simple_prompts = [
-            "Hello",
-            "Test",
-            "Quick response",
-            "Fast query",
-            "Simple question",
-        ]
-        
         payload = {
-            "prompt": random.choice(simple_prompts),
+            "prompt": self.rng.choice(BURST_PROMPTS),
             "max_tokens": 100,
             "context_threshold": 0.5
         }